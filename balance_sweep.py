@@ -0,0 +1,255 @@
+"""
+Balance sweep runner for game.py
+
+Run:
+  - python balance_sweep.py --param LIGHT_DAMAGE=4,6,8 --param HEAVY_REACH=50,60
+  - python balance_sweep.py --grid grid.json --matches 2000 --csv results.csv
+
+Description:
+  - Plays headless bot-vs-bot matches for every combination in a grid of
+    game.py tuning constants (ATTACK_DURATION, HURT_DURATION, INVULN_DURATION,
+    BLOCK_STUN, LIGHT_/HEAVY_ DAMAGE, REACH and KNOCKBACK, ...).
+  - Matches are split into shards and spread over all cores.
+  - Every finished shard is appended to a JSON-lines checkpoint file; rerunning
+    the same command skips shards already in it, so long sweeps can be
+    interrupted and resumed. Records are keyed by the config, the shard and
+    the run settings (--matches, --bot, --max-frames, --shard-size, --seed),
+    so a run with different settings never reuses them.
+  - Prints a table of P1 win rate, draw rate, match length and damage per
+    configuration (optionally also written to CSV).
+
+A grid file is a JSON object mapping constant names to lists of values.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import game
+from game_ai import CPUOpponent, ScriptedBot
+
+MAX_FRAMES = 60 * 99   # a 99 second round at 60 FPS
+SHARD_SIZE = 50
+
+
+def parse_value(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def load_grid(params, grid_file):
+    """Merge --param NAME=a,b,c options and a JSON grid file into one dict."""
+    grid = {}
+    if grid_file:
+        with open(grid_file) as f:
+            grid.update(json.load(f))
+    for param in params:
+        name, _, values = param.partition('=')
+        grid[name.strip()] = [parse_value(v) for v in values.split(',')]
+    for name in grid:
+        if not hasattr(game, name):
+            raise SystemExit(f'game.py has no constant named {name}')
+    return grid
+
+
+def expand(grid):
+    names = sorted(grid)
+    return [dict(zip(names, values))
+            for values in itertools.product(*(grid[n] for n in names))]
+
+
+def config_key(config):
+    return json.dumps(config, sort_keys=True)
+
+
+def run_key(matches, bot, max_frames, shard_size, seed):
+    """The settings besides the config that decide a shard's result; only
+    checkpoint records with the same run key are reused."""
+    return json.dumps({'matches': matches, 'bot': bot,
+                       'max_frames': max_frames, 'shard_size': shard_size,
+                       'seed': seed}, sort_keys=True)
+
+
+def play_match(seed, bot='scripted', max_frames=MAX_FRAMES):
+    """Play one headless match; return (winner, frames, p1_damage, p2_damage).
+
+    winner is 1 or 2, or 0 if the round timed out.
+    """
+    p1 = game.Player(200, game.GROUND_Y - game.PLAYER_HEIGHT, game.P1_COLOR,
+                     game.P1_CONTROLS)
+    p2 = game.Player(700, game.GROUND_Y - game.PLAYER_HEIGHT, game.P2_COLOR,
+                     game.P2_CONTROLS)
+    bot1 = ScriptedBot(seed=seed * 2)
+    if bot == 'rollout':
+        bot2 = CPUOpponent(workers=0, seed=seed * 2 + 1)
+    else:
+        bot2 = ScriptedBot(seed=seed * 2 + 1)
+    winner = None
+    frame = 0
+    while frame < max_frames and not winner:
+        winner = game.step_match(p1, p2, bot1.keys(p1, p2), bot2.keys(p2, p1))
+        frame += 1
+    code = {'Player 1': 1, 'Player 2': 2}.get(winner, 0)
+    return code, frame, game.MAX_HEALTH - p2.health, game.MAX_HEALTH - p1.health
+
+
+def run_shard(config, seeds, bot, max_frames):
+    """Pool worker: apply a config to this process's game module and play."""
+    for name, value in config.items():
+        setattr(game, name, value)
+    stats = {'matches': 0, 'p1_wins': 0, 'p2_wins': 0, 'draws': 0,
+             'frames': 0, 'frames_sq': 0, 'p1_damage': 0, 'p2_damage': 0}
+    for seed in seeds:
+        winner, frames, dmg1, dmg2 = play_match(seed, bot, max_frames)
+        stats['matches'] += 1
+        stats[('draws', 'p1_wins', 'p2_wins')[winner]] += 1
+        stats['frames'] += frames
+        stats['frames_sq'] += frames * frames
+        stats['p1_damage'] += dmg1
+        stats['p2_damage'] += dmg2
+    return stats
+
+
+def load_checkpoint(path, run):
+    done = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue   # torn last line from an interrupted run
+                if rec.get('run') == run:
+                    done[(rec['config'], rec['shard'])] = rec['stats']
+    return done
+
+
+def summarize(config, shards):
+    total = {}
+    for stats in shards:
+        for k, v in stats.items():
+            total[k] = total.get(k, 0) + v
+    n = total.get('matches', 0) or 1
+    mean_len = total.get('frames', 0) / n
+    var_len = max(0.0, total.get('frames_sq', 0) / n - mean_len ** 2)
+    row = dict(config)
+    row.update({
+        'matches': total.get('matches', 0),
+        'p1_win': total.get('p1_wins', 0) / n,
+        'draw': total.get('draws', 0) / n,
+        'len_mean': mean_len,
+        'len_std': var_len ** 0.5,
+        'p1_dmg': total.get('p1_damage', 0) / n,
+        'p2_dmg': total.get('p2_damage', 0) / n,
+    })
+    return row
+
+
+def print_table(rows):
+    if not rows:
+        return
+    cols = list(rows[0])
+    cells = [[f'{r[c]:.3f}' if isinstance(r[c], float) else str(r[c])
+              for c in cols] for r in rows]
+    widths = [max(len(c), *(len(row[i]) for row in cells))
+              for i, c in enumerate(cols)]
+    print('  '.join(c.rjust(w) for c, w in zip(cols, widths)))
+    for row in cells:
+        print('  '.join(v.rjust(w) for v, w in zip(row, widths)))
+
+
+def sweep(grid, matches, workers=None, checkpoint=None, bot='scripted',
+          max_frames=MAX_FRAMES, shard_size=SHARD_SIZE, seed=0):
+    configs = expand(grid)
+    run = run_key(matches, bot, max_frames, shard_size, seed)
+    done = load_checkpoint(checkpoint, run)
+    n_shards = (matches + shard_size - 1) // shard_size
+    todo = []
+    for config in configs:
+        key = config_key(config)
+        for shard in range(n_shards):
+            if (key, shard) not in done:
+                lo = seed + shard * shard_size
+                seeds = range(lo, min(seed + matches, lo + shard_size))
+                todo.append((key, shard, config, list(seeds)))
+
+    total = len(configs) * n_shards
+    print(f'{len(configs)} configs x {matches} matches: '
+          f'{total - len(todo)}/{total} shards already checkpointed',
+          file=sys.stderr)
+    start = time.perf_counter()
+    out = open(checkpoint, 'a') if checkpoint else None
+    try:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = {pool.submit(run_shard, config, seeds, bot, max_frames):
+                       (key, shard) for key, shard, config, seeds in todo}
+            for i, fut in enumerate(as_completed(futures), 1):
+                key, shard = futures[fut]
+                stats = fut.result()
+                done[(key, shard)] = stats
+                if out:
+                    out.write(json.dumps({'run': run, 'config': key,
+                                          'shard': shard, 'stats': stats})
+                              + '\n')
+                    out.flush()
+                print(f'\r{i}/{len(todo)} shards '
+                      f'({time.perf_counter() - start:.1f}s)',
+                      end='', file=sys.stderr)
+    finally:
+        if out:
+            out.close()
+        print(file=sys.stderr)
+
+    rows = []
+    for config in configs:
+        key = config_key(config)
+        rows.append(summarize(config, [done[(key, s)]
+                                       for s in range(n_shards)]))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--param', action='append', default=[],
+                        help='NAME=v1,v2,... (repeatable)')
+    parser.add_argument('--grid', help='JSON file of NAME -> [values]')
+    parser.add_argument('--matches', type=int, default=500,
+                        help='matches per configuration')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: all cores)')
+    parser.add_argument('--checkpoint', default='balance_sweep.ckpt.jsonl',
+                        help='resumable JSON-lines checkpoint ("" to disable)')
+    parser.add_argument('--bot', choices=['scripted', 'rollout'],
+                        default='scripted',
+                        help='Player 2 bot (Player 1 is always scripted)')
+    parser.add_argument('--max-frames', type=int, default=MAX_FRAMES)
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--csv', help='also write the table to this CSV file')
+    args = parser.parse_args()
+
+    grid = load_grid(args.param, args.grid)
+    if not grid:
+        parser.error('give at least one --param or a --grid file')
+    rows = sweep(grid, args.matches, args.workers, args.checkpoint or None,
+                 args.bot, args.max_frames, args.shard_size, args.seed)
+    print_table(rows)
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    main()
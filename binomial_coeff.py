@@ -1,23 +1,23 @@
-"""A Python program to compute binomial coefficients using factorials."""
+"""A Python program to compute binomial coefficients."""
+
+import sys
+
+from combinatorics import comb, factorial
 
 
 def fact(n):
     """Compute factorial of n."""
-    if n == 0:
-        return 1
-    return n * fact(n - 1)
+    return factorial(n)
 
 
 def binomial_coeff(n, r):
-    """Compute binomial coefficient C(n, r)."""
-    if r == 0 or r == 1:
-        return 1
-    else:
-        return fact(n) // (fact(r) * fact(n - r))
+    """Compute binomial coefficient C(n, r) (0 when r is out of range)."""
+    return comb(n, r)
 
 
 def main():
     """Main function to execute binomial coefficient computation."""
+    sys.set_int_max_str_digits(0)
     n = int(input("Enter n (total items): "))
     r = int(input("Enter r (items to choose): "))
     print(f"The binomial coefficient C({n}, {r}) is: {binomial_coeff(n, r)}")
@@ -0,0 +1,235 @@
+"""
+Uniform-grid broadphase for game.py hit detection
+
+Run:
+  - python broadphase.py              (benchmark, entity counts 8 .. 1024)
+  - python broadphase.py --max 4096
+  - python broadphase.py --check      (game.step_ffa against brute force)
+
+Description:
+  - Targets' hurtboxes are binned into a fixed grid of CELL x CELL cells.
+  - Each active attacker (a fighter mid-attack or a projectile) looks only at
+    the cells its hitbox touches, so only nearby (attacker, target) pairs are
+    reported; the exact colliderect test is left to resolve_hit().
+  - Pairs come out in the same order as brute_pairs() (attackers, then
+    targets in list order), so hits resolve exactly as if every pair were
+    tried; --check plays game.step_ffa() both ways and compares.
+  - Cell lists, the pair list and the dedup set are allocated once and
+    reused every frame; entities refresh their own preallocated Rects.
+"""
+
+import argparse
+import random
+import time
+
+CELL = 128
+
+
+class UniformGrid:
+    def __init__(self, width, height, cell=CELL):
+        self.cell = cell
+        self.cols = width // cell + 1
+        self.rows = height // cell + 1
+        self.cells = [[] for _ in range(self.cols * self.rows)]
+        self.used = []       # indices of cells filled this frame
+        self.seen = set()    # indices of targets near the current attacker
+        self.pairs = []
+
+    def _span(self, rect):
+        c = self.cell
+        x0 = min(max(rect.left // c, 0), self.cols - 1)
+        x1 = min(max((rect.right - 1) // c, 0), self.cols - 1)
+        y0 = min(max(rect.top // c, 0), self.rows - 1)
+        y1 = min(max((rect.bottom - 1) // c, 0), self.rows - 1)
+        return x0, x1, y0, y1
+
+    def candidate_pairs(self, attackers, targets):
+        """Return (attacker, target) pairs whose boxes share a grid cell,
+        ordered like brute_pairs().
+
+        The returned list is reused by the next call.
+        """
+        cells = self.cells
+        for i in self.used:
+            cells[i].clear()
+        self.used.clear()
+
+        cols = self.cols
+        for j, t in enumerate(targets):
+            x0, x1, y0, y1 = self._span(t.get_hurtbox())
+            for cy in range(y0, y1 + 1):
+                for cx in range(x0, x1 + 1):
+                    i = cy * cols + cx
+                    if not cells[i]:
+                        self.used.append(i)
+                    cells[i].append(j)
+
+        pairs = self.pairs
+        pairs.clear()
+        seen = self.seen
+        for a in attackers:
+            if not a.attacking():
+                continue
+            seen.clear()
+            x0, x1, y0, y1 = self._span(a.get_hitbox())
+            for cy in range(y0, y1 + 1):
+                for cx in range(x0, x1 + 1):
+                    seen.update(cells[cy * cols + cx])
+            for j in sorted(seen):
+                t = targets[j]
+                if t is not a:
+                    pairs.append((a, t))
+        return pairs
+
+
+def brute_pairs(attackers, targets):
+    """Every (active attacker, other target) pair, for comparison."""
+    return [(a, t) for a in attackers if a.attacking()
+            for t in targets if t is not a]
+
+
+class BruteForce:
+    """Stand-in for UniformGrid in game.step_ffa() that tries every pair."""
+
+    def candidate_pairs(self, attackers, targets):
+        return brute_pairs(attackers, targets)
+
+
+def make_scene(count, rng, width, height):
+    import game
+    fighters = []
+    for i in range(count // 2 or 1):
+        pl = game.Player(rng.randrange(0, width - game.PLAYER_WIDTH),
+                         rng.randrange(0, height - game.PLAYER_HEIGHT),
+                         game.WHITE, game.P1_CONTROLS)
+        pl.facing = rng.choice(list(game.Facing))
+        if rng.random() < 0.3:
+            pl.start_attack(rng.choice(('light', 'heavy')))
+        fighters.append(pl)
+    projectiles = [game.Projectile(rng.randrange(0, width),
+                                   rng.randrange(0, height),
+                                   rng.choice((-1, 1)), rng.choice(fighters))
+                   for _ in range(count - len(fighters))]
+    return fighters, projectiles
+
+
+def ffa_world(count, seed):
+    """count fighters spread along the floor, each with its own ScriptedBot."""
+    import game
+    from game_ai import ScriptedBot
+    gap = (game.SCREEN_W - 40 - game.PLAYER_WIDTH) // max(count - 1, 1)
+    fighters = [game.Player(20 + i * gap, game.GROUND_Y - game.PLAYER_HEIGHT,
+                            game.WHITE, game.P1_CONTROLS)
+                for i in range(count)]
+    bots = [ScriptedBot(seed=seed * count + i) for i in range(count)]
+    return fighters, bots
+
+
+def ffa_keys(fighters, bots):
+    """Keys for every fighter; each bot goes after the nearest live rival."""
+    keys = []
+    for pl, bot in zip(fighters, bots):
+        rivals = [o for o in fighters if o is not pl and o.health > 0]
+        if not rivals:
+            keys.append(bot.keys(pl, pl))
+            continue
+        rival = min(rivals, key=lambda o: abs(o.rect.centerx - pl.rect.centerx))
+        keys.append(bot.keys(pl, rival))
+    return keys
+
+
+def ffa_state(fighters, projectiles):
+    return ([pl.snapshot() for pl in fighters],
+            [(tuple(pr.rect), pr.alive, fighters.index(pr.owner))
+             for pr in projectiles])
+
+
+def check_ffa(frames=20000, count=8, fire_every=15, seed=0):
+    """Play game.step_ffa() free-for-alls with the grid and with BruteForce
+    from the same start and bots; assert every fighter and projectile agrees
+    after every frame. Returns (rounds, hits)."""
+    import game
+    rounds = hits = 0
+    frame = 0
+    while frame < frames:
+        worlds = []
+        for grid in (UniformGrid(game.SCREEN_W, game.SCREEN_H), BruteForce()):
+            fighters, bots = ffa_world(count, seed + rounds)
+            worlds.append((fighters, bots, [], grid))
+        winner = None
+        while frame < frames and winner is None:
+            results = []
+            for fighters, bots, projectiles, grid in worlds:
+                if frame % fire_every == 0:
+                    # the fighters take turns to fire
+                    pl = fighters[frame // fire_every % count]
+                    if pl.health > 0:
+                        d = 1 if pl.facing == game.Facing.RIGHT else -1
+                        projectiles.append(game.Projectile(
+                            pl.rect.centerx, pl.rect.centery, d, pl))
+                before = sum(pl.health for pl in fighters)
+                winner = game.step_ffa(fighters, ffa_keys(fighters, bots),
+                                       projectiles, grid)
+                results.append((ffa_state(fighters, projectiles),
+                                None if winner is None
+                                else fighters.index(winner),
+                                before - sum(pl.health for pl in fighters)))
+            assert results[0] == results[1], \
+                f'grid and brute force differ at frame {frame}'
+            hits += results[0][2] > 0
+            frame += 1
+        rounds += 1
+    return rounds, hits
+
+
+def benchmark(max_count, frames=50, seed=0):
+    rng = random.Random(seed)
+    count = 8
+    print(f'{"entities":>8} {"brute ms":>9} {"grid ms":>8} '
+          f'{"brute pairs":>11} {"grid pairs":>10} {"hits":>5}')
+    while count <= max_count:
+        # the arena grows with the crowd so density stays comparable
+        side = int(400 * (count / 8) ** 0.5)
+        fighters, projectiles = make_scene(count, rng, side, side)
+        attackers = fighters + projectiles
+        grid = UniformGrid(side, side)
+
+        t = time.perf_counter()
+        for _ in range(frames):
+            pairs = brute_pairs(attackers, fighters)
+            brute_hits = {(id(a), id(b)) for a, b in pairs
+                          if a.get_hitbox().colliderect(b.get_hurtbox())}
+        brute_ms = (time.perf_counter() - t) * 1000 / frames
+        n_brute = len(pairs)
+
+        t = time.perf_counter()
+        for _ in range(frames):
+            pairs = grid.candidate_pairs(attackers, fighters)
+            grid_hits = {(id(a), id(b)) for a, b in pairs
+                         if a.get_hitbox().colliderect(b.get_hurtbox())}
+        grid_ms = (time.perf_counter() - t) * 1000 / frames
+        assert grid_hits == brute_hits, 'broadphase missed a collision'
+
+        print(f'{count:>8} {brute_ms:>9.3f} {grid_ms:>8.3f} '
+              f'{n_brute:>11} {len(pairs):>10} {len(grid_hits):>5}')
+        count *= 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description='broadphase benchmark')
+    parser.add_argument('--max', type=int, default=1024,
+                        help='largest entity count (doubles from 8)')
+    parser.add_argument('--frames', type=int, default=50)
+    parser.add_argument('--check', action='store_true',
+                        help='compare step_ffa with brute force and exit')
+    args = parser.parse_args()
+    if args.check:
+        rounds, hits = check_ffa()
+        print(f'step_ffa with the grid matches brute force: {rounds} rounds, '
+              f'{hits} frames with hits')
+    else:
+        benchmark(args.max, args.frames)
+
+
+if __name__ == '__main__':
+    main()
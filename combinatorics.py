@@ -0,0 +1,188 @@
+"""Factorials and binomial coefficients, exact and modulo a prime.
+
+Run `python combinatorics.py` for a benchmark.
+"""
+
+import argparse
+import math
+import random
+import time
+
+MAX_TABLE = 10**7  # factorial table entries ModComb will build (two lists)
+
+
+def _product(lo, hi):
+    """Product of the integers in [lo, hi), split in halves so the big
+    multiplications are between numbers of similar size."""
+    if hi - lo <= 16:
+        result = 1
+        for i in range(lo, hi):
+            result *= i
+        return result
+    mid = (lo + hi) // 2
+    return _product(lo, mid) * _product(mid, hi)
+
+
+def factorial(n):
+    """Compute n! by binary splitting (no recursion limit on n)."""
+    if n < 0:
+        raise ValueError("factorial is not defined for negative numbers")
+    return _product(2, n + 1)
+
+
+def comb(n, r):
+    """Compute C(n, r) with the multiplicative formula, using the smaller of
+    r and n - r. Every partial result is itself a binomial coefficient, so
+    the division is always exact."""
+    if r < 0 or r > n:
+        return 0
+    r = min(r, n - r)
+    result = 1
+    for i in range(1, r + 1):
+        result = result * (n - r + i) // i
+    return result
+
+
+class ModComb:
+    """C(n, r) mod a prime p from precomputed factorial tables.
+
+    Tables cover n < min(p, n_max + 1). For a small p the tables cover every
+    residue, and Lucas' theorem handles any n: C(n, r) is the product of
+    C(n_i, r_i) over the base-p digits of n and r. Tables are limited to
+    MAX_TABLE entries, so a large p needs an n_max.
+    """
+
+    def __init__(self, p, n_max=None):
+        self.p = p
+        size = p if n_max is None else min(p, n_max + 1)
+        if size > MAX_TABLE:
+            raise ValueError(f"tables for p={p} would have {size:,} entries "
+                             f"(limit {MAX_TABLE:,}); pass an n_max below "
+                             f"{MAX_TABLE:,}")
+        fact = [1] * size
+        for i in range(1, size):
+            fact[i] = fact[i - 1] * i % p
+        inv = [1] * size
+        inv[-1] = pow(fact[-1], p - 2, p)
+        for i in range(size - 1, 0, -1):
+            inv[i - 1] = inv[i] * i % p
+        self.fact = fact
+        self.inv_fact = inv
+        self.size = size
+        self._arrays = None
+
+    def _small(self, n, r):
+        if r < 0 or r > n:
+            return 0
+        return self.fact[n] * self.inv_fact[r] % self.p * self.inv_fact[n - r] % self.p
+
+    def comb(self, n, r):
+        if r < 0 or r > n:
+            return 0
+        if n < self.size:
+            return self._small(n, r)
+        if self.size < self.p:
+            raise ValueError(f"n={n} is beyond the table (n_max={self.size - 1})")
+        # Lucas' theorem
+        p = self.p
+        result = 1
+        while n or r:
+            result = result * self._small(n % p, r % p) % p
+            if not result:
+                return 0
+            n //= p
+            r //= p
+        return result
+
+    def comb_many(self, ns, rs):
+        """C(n, r) mod p for many queries at once.
+
+        With NumPy installed, queries within the table are answered with
+        array lookups (p must be below 2**31 so products fit in int64) and
+        only the rest, which need Lucas, one by one; without NumPy every
+        query goes one by one.
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            return [self.comb(n, r) for n, r in zip(ns, rs)]
+        ns = np.asarray(ns, dtype=np.int64)
+        rs = np.asarray(rs, dtype=np.int64)
+        if self.p >= 1 << 31:
+            return np.array([self.comb(int(n), int(r)) for n, r in zip(ns, rs)],
+                            dtype=object if self.p >= 1 << 63 else np.int64)
+        if self._arrays is None:
+            self._arrays = (np.array(self.fact, dtype=np.int64),
+                            np.array(self.inv_fact, dtype=np.int64))
+        fact, inv = self._arrays
+        valid = (rs >= 0) & (rs <= ns)
+        table = valid & (ns < self.size)
+        r = np.where(table, rs, 0)
+        n = np.where(table, ns, 0)
+        out = fact[n] * inv[r] % self.p * inv[n - r] % self.p
+        out[~valid] = 0
+        for i in np.flatnonzero(valid & ~table):
+            out[i] = self.comb(int(ns[i]), int(rs[i]))
+        return out
+
+
+def _naive_factorial(n):
+    result = 1
+    for i in range(1, n + 1):
+        result *= i
+    return result
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    return value, (time.perf_counter() - start) * 1000
+
+
+def benchmark(queries=10**6, seed=0):
+    print(f"{'n':>7} {'naive loop':>11} {'binary split':>13} "
+          f"{'math.factorial':>15}")
+    for n in (10**3, 10**4, 10**5):
+        a, naive = _timed(_naive_factorial, n)
+        b, split = _timed(factorial, n)
+        c, builtin = _timed(math.factorial, n)
+        assert a == b == c
+        print(f"{n:>7} {naive:>8.2f} ms {split:>10.2f} ms {builtin:>12.2f} ms")
+
+    n, r = 10**5, 500
+    exact, ms = _timed(comb, n, r)
+    _, three = _timed(lambda: factorial(n) // (factorial(r) * factorial(n - r)))
+    assert exact == math.comb(n, r)
+    print(f"C({n}, {r}): multiplicative {ms:.2f} ms, "
+          f"three factorials {three:.2f} ms")
+
+    rng = random.Random(seed)
+    p = 10**9 + 7
+    table, ms = _timed(ModComb, p, 10**6)
+    print(f"mod 1e9+7 tables up to 10**6 built in {ms:.0f} ms")
+    ns = [rng.randrange(10**6) for _ in range(queries)]
+    rs = [rng.randrange(n + 1) for n in ns]
+    loop, ms = _timed(lambda: [table.comb(n, r) for n, r in zip(ns, rs)])
+    print(f"{queries} queries one by one: {queries / ms * 1000:,.0f}/s")
+    batch, ms = _timed(table.comb_many, ns, rs)
+    print(f"{queries} queries with comb_many: {queries / ms * 1000:,.0f}/s")
+    assert list(batch) == loop
+
+    small = ModComb(10007)
+    big = [(rng.randrange(10**18), rng.randrange(10**12))
+           for _ in range(queries // 10)]
+    _, ms = _timed(lambda: [small.comb(n, r) for n, r in big])
+    print(f"{len(big)} Lucas queries (n < 1e18, p = 10007): "
+          f"{len(big) / ms * 1000:,.0f}/s")
+    assert small.comb(1000, 300) == math.comb(1000, 300) % 10007
+
+
+def main():
+    parser = argparse.ArgumentParser(description="combinatorics benchmark")
+    parser.add_argument("--queries", type=int, default=10**6)
+    args = parser.parse_args()
+    benchmark(args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""External merge sort for text files of integers larger than memory.
+
+    python external_sort.py numbers.txt sorted.txt --budget-mb 256 --workers 4
+    python external_sort.py --benchmark 2048 --budget-mb 256
+
+The input holds integers separated by any whitespace; the output has one
+per line. Sorting happens in two phases:
+
+  1. The input is read in runs that fit the memory budget. Each run is
+     sorted (in worker processes when --workers > 1) and spilled to a temp
+     file as raw 64-bit integers (array("q")), 8 bytes per number.
+  2. The runs are k-way merged with heapq.merge, each read through a small
+     buffer, and written out in batches. With more than MAX_FANIN runs,
+     groups of runs are first merged into longer binary runs.
+
+Numbers must fit in a signed 64-bit integer.
+"""
+
+import argparse
+import heapq
+import os
+import random
+import shutil
+import tempfile
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# While a run is sorted each number is held twice: in the run's array
+# (8 bytes) and in the sorted list (an int object, which takes a 48-byte
+# allocator block for a full 64-bit value, plus an 8-byte pointer), and the
+# sort's merge space needs up to 4 bytes more (measured: about 68 in all).
+ITEM_BYTES = 72
+READ_BYTES = 1 << 20  # input read size while collecting a run
+MERGE_BUFFER = 1 << 13  # numbers per run buffered while merging
+WRITE_BATCH = 1 << 16  # numbers per output write
+MAX_FANIN = 128  # runs merged at once (open files)
+
+
+def read_runs(path, run_items):
+    """Yield the numbers of path as arrays of up to run_items, streaming."""
+    run = array("q")
+    carry = b""
+    with open(path, "rb") as f:
+        while block := f.read(READ_BYTES):
+            block = carry + block
+            # a number may straddle the block end: keep it for the next read
+            cut = max(block.rfind(b" "), block.rfind(b"\n"), block.rfind(b"\t"))
+            if cut < 0:
+                carry = block
+                continue
+            carry = block[cut + 1:]
+            tokens = block[:cut].split()
+            while tokens:
+                take = run_items - len(run)
+                run.extend(map(int, tokens[:take]))
+                del tokens[:take]
+                if len(run) == run_items:
+                    yield run
+                    run = array("q")
+        run.extend(map(int, carry.split()))
+    if run:
+        yield run
+
+
+def _sort_run(run, path):
+    """Sort one run and spill it to path; returns path."""
+    ordered = sorted(run)
+    del run[:]  # the caller's array is not needed any more
+    with open(path, "wb") as f:
+        for i in range(0, len(ordered), WRITE_BATCH):
+            array("q", ordered[i:i + WRITE_BATCH]).tofile(f)
+    return path
+
+
+def _read_run(path):
+    """Yield the numbers of a binary run through a MERGE_BUFFER buffer."""
+    with open(path, "rb") as f:
+        while True:
+            buffer = array("q")
+            try:
+                buffer.fromfile(f, MERGE_BUFFER)
+            except EOFError:  # last, partial buffer
+                yield from buffer
+                return
+            yield from buffer
+
+
+def _merge_runs(paths, out_path):
+    """Merge binary runs into one binary run."""
+    merged = heapq.merge(*map(_read_run, paths))
+    with open(out_path, "wb") as f:
+        while batch := array("q", islice(merged, WRITE_BATCH)):
+            batch.tofile(f)
+    for path in paths:
+        os.remove(path)
+    return out_path
+
+
+def spill_runs(input_path, tmp_dir, budget, workers):
+    """Phase 1: sorted binary runs of input_path in tmp_dir; returns their
+    paths in input order."""
+    # each worker holds a run while the main process collects the next
+    per_run = budget // (workers + 1) if workers > 1 else budget
+    run_items = max(1, per_run // ITEM_BYTES)
+    paths = []
+
+    def run_path():
+        paths.append(os.path.join(tmp_dir, f"run-{len(paths):06d}.bin"))
+        return paths[-1]
+
+    if workers <= 1:
+        for run in read_runs(input_path, run_items):
+            _sort_run(run, run_path())
+        return paths
+    with ProcessPoolExecutor(workers) as pool:
+        pending = []
+        for run in read_runs(input_path, run_items):
+            if len(pending) >= workers:  # keep the budget: wait for a slot
+                pending.pop(0).result()
+            pending.append(pool.submit(_sort_run, run, run_path()))
+        for future in pending:
+            future.result()
+    return paths
+
+
+def merge_runs(paths, output_path, tmp_dir):
+    """Phase 2: merge the runs into the text output (in passes of
+    MAX_FANIN runs while there are more)."""
+    level = 0
+    while len(paths) > MAX_FANIN:
+        level += 1
+        paths = [_merge_runs(paths[i:i + MAX_FANIN],
+                             os.path.join(tmp_dir, f"merge-{level}-{i:06d}.bin"))
+                 for i in range(0, len(paths), MAX_FANIN)]
+    merged = heapq.merge(*map(_read_run, paths))
+    count = 0
+    with open(output_path, "w") as out:
+        while batch := list(islice(merged, WRITE_BATCH)):
+            out.write("\n".join(map(str, batch)))
+            out.write("\n")
+            count += len(batch)
+    return count
+
+
+def external_sort(input_path, output_path, budget=256 << 20, workers=1,
+                  tmp_dir=None):
+    """Sort the integers in input_path into output_path using about budget
+    bytes of memory. Returns (numbers sorted, number of runs)."""
+    run_dir = tempfile.mkdtemp(prefix="external_sort-", dir=tmp_dir)
+    try:
+        paths = spill_runs(input_path, run_dir, budget, workers)
+        return merge_runs(paths, output_path, run_dir), len(paths)
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+
+def _peak_rss_mib():
+    try:
+        import resource
+    except ImportError:   # not on Windows
+        return None
+    peak = max(resource.getrusage(who).ru_maxrss for who in
+               (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+    return peak / 1024
+
+
+def report(input_path, count, runs, secs):
+    size = os.path.getsize(input_path)
+    line = (f"sorted {count:,} numbers ({size / 1e6:,.1f} MB) in {runs} runs, "
+            f"{secs:.1f}s: {size / 1e6 / secs:,.1f} MB/s")
+    peak = _peak_rss_mib()
+    if peak is not None:
+        line += f", peak RSS {peak:.0f} MiB"
+    print(line)
+
+
+def _write_random(path, size, seed):
+    rng = random.Random(seed)
+    written = 0
+    with open(path, "w") as f:
+        while written < size:
+            text = "\n".join(str(rng.randrange(-2**63, 2**63))
+                             for _ in range(WRITE_BATCH)) + "\n"
+            f.write(text)
+            written += len(text)
+
+
+def _check_sorted(path):
+    previous, count = None, 0
+    with open(path, "rb") as f:
+        for line in f:
+            value = int(line)
+            if previous is not None and value < previous:
+                return False, count
+            previous = value
+            count += 1
+    return True, count
+
+
+def benchmark(size_mb, budget, workers, tmp_dir=None, seed=0):
+    """Sort size_mb of random integers with the given budget and check
+    the output."""
+    work = tempfile.mkdtemp(prefix="external_sort-bench-", dir=tmp_dir)
+    try:
+        numbers = os.path.join(work, "numbers.txt")
+        output = os.path.join(work, "sorted.txt")
+        start = time.perf_counter()
+        _write_random(numbers, size_mb << 20, seed)
+        print(f"wrote {size_mb} MiB of random 64-bit integers in "
+              f"{time.perf_counter() - start:.1f}s, budget {budget >> 20} MiB "
+              f"(the input is {(size_mb << 20) / budget:.1f}x that), "
+              f"{workers} worker(s)")
+        start = time.perf_counter()
+        count, runs = external_sort(numbers, output, budget, workers, work)
+        report(numbers, count, runs, time.perf_counter() - start)
+        ok, checked = _check_sorted(output)
+        assert ok and checked == count, "output is not sorted"
+        print(f"output verified: {checked:,} numbers in order")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def add_arguments(parser):
+    parser.add_argument("--budget-mb", type=int, default=256,
+                        help="memory budget in MiB (default: 256)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes sorting runs (default: 1)")
+    parser.add_argument("--tmp-dir", help="where runs are spilled")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="external merge sort")
+    parser.add_argument("input", nargs="?")
+    parser.add_argument("output", nargs="?")
+    parser.add_argument("--benchmark", type=int, metavar="MB",
+                        help="sort MB of random integers instead")
+    add_arguments(parser)
+    args = parser.parse_args()
+    budget = args.budget_mb << 20
+    if args.benchmark:
+        benchmark(args.benchmark, budget, args.workers, args.tmp_dir)
+        return
+    if not (args.input and args.output):
+        parser.error("give INPUT and OUTPUT files, or --benchmark MB")
+    start = time.perf_counter()
+    count, runs = external_sort(args.input, args.output, budget, args.workers,
+                                args.tmp_dir)
+    report(args.input, count, runs, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
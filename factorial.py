@@ -1,5 +1,9 @@
+import sys
+
+from combinatorics import factorial
+
+# n! passes Python's default 4300-digit str() limit at n = 1750
+sys.set_int_max_str_digits(0)
+
 n = int(input("Enter the number:"))
-factorial = 1
-for i in range(1, n + 1):
-    factorial = factorial * i
-print(f"The factorial of {n} is {factorial}")
+print(f"The factorial of {n} is {factorial(n)}")
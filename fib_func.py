@@ -1,24 +1,18 @@
 """A simple Python function to compute Fibonacci numbers and print them."""
 
+import sys
 
-def fib(n):
-    """Compute the nth Fibonacci number."""
-    if n <= 0:
-        return 0
-    elif n == 1:
-        return 1
-    else:
-        return fib(n - 1) + fib(n - 2)
+from fibonacci import fib, fib_sequence  # noqa: F401 (re-exported)
 
 
 def main():
     """Main function to execute the Fibonacci computation and printing."""
+    # fib(n) passes Python's default 4300-digit str() limit at n = 20,578
+    sys.set_int_max_str_digits(0)
     n = int(input("Enter a number to compute its Fibonacci: "))
-    for i in range(n):
-        if i == n - 1:
-            print(f"{fib(i)}")  # Last number without comma
-        else:
-            print(f"{fib(i)}", end=" ,")
+    if n > 0:
+        # stream the terms instead of recomputing each one from scratch
+        print(" ,".join(str(value) for value in fib_sequence(n)))
     return 0
 
 
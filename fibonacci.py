@@ -0,0 +1,123 @@
+"""Fast Fibonacci numbers: fast doubling, streaming and modular.
+
+Run `python fibonacci.py` for a benchmark up to n = 10**6.
+"""
+
+import argparse
+import time
+from functools import lru_cache
+
+# Moduli up to this size have their Pisano period cached and used to
+# shrink n before computing fib(n) mod m.
+PISANO_LIMIT = 10**6
+
+
+def fib_pair(n, m=None):
+    """Return (F(n), F(n+1)) by fast doubling, optionally modulo m.
+
+    Uses F(2k) = F(k) * (2F(k+1) - F(k)) and F(2k+1) = F(k)^2 + F(k+1)^2,
+    walking the bits of n from the top, so it takes O(log n) steps.
+    """
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        if m is not None:
+            c %= m
+            d %= m
+        if bit == "1":
+            a, b = d, c + d
+            if m is not None:
+                b %= m
+        else:
+            a, b = c, d
+    return a, b
+
+
+def fib(n):
+    """Compute the nth Fibonacci number (0 for n <= 0)."""
+    if n <= 0:
+        return 0
+    return fib_pair(n)[0]
+
+
+def fib_sequence(count):
+    """Yield the first count Fibonacci numbers, F(0) .. F(count - 1)."""
+    a, b = 0, 1
+    for _ in range(count):
+        yield a
+        a, b = b, a + b
+
+
+@lru_cache(maxsize=None)
+def pisano_period(m):
+    """Period of the Fibonacci numbers modulo m (at most 6m)."""
+    if m == 1:
+        return 1
+    a, b = 0, 1
+    for i in range(1, 6 * m + 1):
+        a, b = b, (a + b) % m
+        if a == 0 and b == 1:
+            return i
+    raise AssertionError("unreachable: the Pisano period is at most 6m")
+
+
+def fib_mod(n, m):
+    """Compute F(n) mod m without ever building the full F(n)."""
+    if m <= 0:
+        raise ValueError("modulus must be positive")
+    if n <= 0:
+        return 0
+    if m <= PISANO_LIMIT:
+        n %= pisano_period(m)
+    return fib_pair(n, m)[0] % m
+
+
+def _naive(n):
+    return n if n <= 1 else _naive(n - 1) + _naive(n - 2)
+
+
+def benchmark(max_n=10**6):
+    """Time fib(n) for growing n, plus the naive recursion and streaming."""
+    print(f"{'n':>9} {'fast doubling':>14} {'bits':>8}")
+    n = 10
+    while n <= max_n:
+        start = time.perf_counter()
+        value = fib(n)
+        secs = time.perf_counter() - start
+        print(f"{n:>9} {secs * 1000:>11.3f} ms {value.bit_length():>8}")
+        n *= 10
+
+    start = time.perf_counter()
+    _naive(25)
+    naive = time.perf_counter() - start
+    start = time.perf_counter()
+    fib(25)
+    fast = time.perf_counter() - start
+    print(f"n=25: naive recursion {naive * 1000:.1f} ms, "
+          f"fast doubling {fast * 1000:.4f} ms")
+
+    count = 10**4
+    start = time.perf_counter()
+    for _ in fib_sequence(count):
+        pass
+    print(f"first {count} terms streamed in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    value = fib_mod(10**18, 10**9 + 7)
+    print(f"F(10**18) mod 1e9+7 = {value} in "
+          f"{(time.perf_counter() - start) * 1000:.3f} ms")
+    assert fib_mod(12345, 1000) == fib(12345) % 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fibonacci benchmark")
+    parser.add_argument("--max", type=int, default=10**6,
+                        help="largest n (grows by 10x from 10)")
+    args = parser.parse_args()
+    benchmark(args.max)
+
+
+if __name__ == "__main__":
+    main()
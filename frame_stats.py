@@ -0,0 +1,108 @@
+"""
+Frame-pacing metrics and on-screen profiler for game.py
+
+Description:
+  - FrameStats records, per rendered frame, the wall time since the previous
+    frame, how many fixed simulation steps ran, and the time spent in
+    simulation, drawing and display flip.
+  - The overlay (toggled with F3 in game.py) shows the averages over the last
+    HISTORY frames, an FPS histogram and dropped-frame / catch-up counters.
+  - Running totals give averages over the whole run too, for summaries.
+  - write_csv() dumps every recorded frame, which is what headless mode uses.
+"""
+
+import csv
+from collections import deque
+
+import pygame
+
+HISTORY = 240   # frames kept for the overlay averages
+# FPS histogram bucket lower bounds; the last bucket is open-ended
+FPS_BUCKETS = (0, 20, 30, 40, 50, 55, 58, 62)
+CSV_FIELDS = ('frame', 'frame_ms', 'steps', 'sim_ms', 'draw_ms', 'flip_ms')
+
+
+class FrameStats:
+    def __init__(self, target_fps, keep_all=False):
+        self.target_ms = 1000.0 / target_fps
+        self.recent = deque(maxlen=HISTORY)
+        self.all = [] if keep_all else None
+        self.totals = [0.0] * 5   # frame_ms, steps, sim, draw, flip sums
+        self.frames = 0
+        self.dropped = 0       # frames that overran 1.5x the target interval
+        self.catchup = 0       # extra sim steps run to catch up after a hitch
+        self.clamped = 0       # frames where sim time had to be thrown away
+        self.histogram = [0] * len(FPS_BUCKETS)
+        self.visible = False
+
+    def record(self, frame_ms, steps, sim_ms, draw_ms, flip_ms,
+               clamped=False):
+        row = (self.frames, frame_ms, steps, sim_ms, draw_ms, flip_ms)
+        self.frames += 1
+        self.recent.append(row)
+        for i, value in enumerate(row[1:]):
+            self.totals[i] += value
+        if self.all is not None:
+            self.all.append(row)
+        if frame_ms > self.target_ms * 1.5:
+            self.dropped += 1
+        if steps > 1:
+            self.catchup += steps - 1
+        if clamped:
+            self.clamped += 1
+        fps = 1000.0 / frame_ms if frame_ms > 0 else FPS_BUCKETS[-1]
+        bucket = 0
+        for i, lo in enumerate(FPS_BUCKETS):
+            if fps >= lo:
+                bucket = i
+        self.histogram[bucket] += 1
+
+    def averages(self, whole_run=False):
+        """Mean frame_ms, steps, sim_ms, draw_ms and flip_ms over the last
+        HISTORY frames, or over every frame recorded with whole_run."""
+        if whole_run:
+            n = self.frames or 1
+            return [total / n for total in self.totals]
+        n = len(self.recent) or 1
+        return [sum(r[i] for r in self.recent) / n for i in range(1, 6)]
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    def draw(self, surf, font, x=10, y=70):
+        if not self.visible:
+            return
+        frame_ms, steps, sim_ms, draw_ms, flip_ms = self.averages()
+        fps = 1000.0 / frame_ms if frame_ms else 0.0
+        lines = [
+            f'fps {fps:5.1f}  frame {frame_ms:5.2f} ms  steps {steps:4.2f}',
+            f'sim {sim_ms:5.2f}  draw {draw_ms:5.2f}  flip {flip_ms:5.2f} ms',
+            f'dropped {self.dropped}  catch-up {self.catchup}  '
+            f'clamped {self.clamped}',
+        ]
+        panel = pygame.Surface((360, 20 * len(lines) + 80), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        for i, text in enumerate(lines):
+            panel.blit(font.render(text, True, (255, 255, 255)), (8, 6 + i * 20))
+
+        # FPS histogram, one bar per bucket, scaled to the tallest bar
+        top = max(self.histogram) or 1
+        bar_w = 340 // len(FPS_BUCKETS)
+        base = panel.get_height() - 8
+        for i, count in enumerate(self.histogram):
+            h = int(50 * count / top)
+            color = (80, 200, 80) if FPS_BUCKETS[i] >= 55 else (220, 90, 60)
+            pygame.draw.rect(panel, color,
+                             (8 + i * bar_w, base - h, bar_w - 4, h))
+        surf.blit(panel, (x, y))
+
+    def write_csv(self, path):
+        rows = self.all if self.all is not None else self.recent
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_FIELDS)
+            for row in rows:
+                frame, frame_ms, steps, sim_ms, draw_ms, flip_ms = row
+                writer.writerow([frame, f'{frame_ms:.4f}', steps,
+                                 f'{sim_ms:.4f}', f'{draw_ms:.4f}',
+                                 f'{flip_ms:.4f}'])
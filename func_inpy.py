@@ -1,22 +1,14 @@
 """ this is a TEST or Dummy python file """
 
+import sys
 
-def fact(n):
-    """Compute factorial of n(dummy implementation)."""
-    if n == 0:
-        return 1
-    else:
-        return n * fact(n - 1)
+from combinatorics import factorial
+from fibonacci import fib
 
 
-def fib(n):
-    """Compute nth Fibonacci number(dummy implementation)."""
-    if n <= 0:
-        return 0
-    elif n == 1:
-        return 1
-    else:
-        return fib(n - 1) + fib(n - 2)
+def fact(n):
+    """Compute factorial of n(dummy implementation)."""
+    return factorial(n)
 
 
 def greet(name):
@@ -25,12 +17,11 @@ def greet(name):
 
 
 def main():
+    # n! passes Python's default 4300-digit str() limit at n = 1750
+    sys.set_int_max_str_digits(0)
     print("This is a dummy Python file for testing purposes.")
     n = int(input("Enter the number to compute factorial: "))
     name = input("Enter your name: ")
-    fact(n)
-    fib(n)
-    greet(name)
     print(f"Factorial of {n} is {fact(n)}")
     print(f"{name}, the {n}th Fibonacci number is {fib(n)}")
     print(greet(name))
@@ -10,7 +10,8 @@ Description:
   - Simple state machine: idle, walk, jump, attack, hurt, knockdown
   - Hitbox/hurtbox collision for attacks
   - Health bars, round system, simple win/lose
-  - Placeholder rectangle art; easily replaced with sprites
+  - Placeholder rectangle art; --sprites switches to atlas animations
+    (see sprites.py)
 
 Controls:
   Player 1 (Left):
@@ -29,20 +30,33 @@ Controls:
 
   Misc:
     R: restart round
+    F3: frame-time profiler overlay
     ESC: quit
 
+  CPU opponent:
+    python game.py --cpu   (Player 2 is driven by game_ai.CPUOpponent)
+
+  Headless metrics:
+    python game.py --headless 3000 --metrics-csv frames.csv
+
 This is an educational example, not a production engine.
 """
 
 import pygame
+import os
 import sys
 import math
+import time
 from enum import Enum
 
+from frame_stats import FrameStats
+
 # ----- CONFIG -----
 SCREEN_W = 1000
 SCREEN_H = 600
 FPS = 60
+SIM_DT = 1000.0 / FPS  # ms of game time per simulation step
+MAX_SIM_STEPS = 5      # catch-up limit per rendered frame
 TILE = 32
 GRAVITY = 0.8
 GROUND_Y = SCREEN_H - 120
@@ -65,9 +79,37 @@ ATTACK_DURATION = 18  # frames
 HURT_DURATION = 20
 INVULN_DURATION = 30
 BLOCK_STUN = 10
+LIGHT_DAMAGE = 6
+HEAVY_DAMAGE = 12
+LIGHT_REACH = 40
+HEAVY_REACH = 60
+LIGHT_KNOCKBACK = 6
+HEAVY_KNOCKBACK = 12
+PROJECTILE_SIZE = 16
+PROJECTILE_SPEED = 9
+PROJECTILE_DAMAGE = 8
+PROJECTILE_KNOCKBACK = 4
 
 MAX_HEALTH = 100
 
+# controls mapping
+P1_CONTROLS = {
+    'left': pygame.K_a,
+    'right': pygame.K_d,
+    'jump': pygame.K_w,
+    'crouch': pygame.K_s,
+    'light': pygame.K_f,
+    'heavy': pygame.K_g
+}
+P2_CONTROLS = {
+    'left': pygame.K_LEFT,
+    'right': pygame.K_RIGHT,
+    'jump': pygame.K_UP,
+    'crouch': pygame.K_DOWN,
+    'light': pygame.K_k,
+    'heavy': pygame.K_l
+}
+
 # ----- ENUMS -----
 
 
@@ -106,10 +148,49 @@ class Player:
         self.blocking = False
         self.combo = 0
         self.rounds = 0
+        self.animator = None  # sprites.Animator, when sprites are enabled
+        # preallocated collision boxes, refreshed by get_hurtbox/get_hitbox
+        self.hurtbox = pygame.Rect(0, 0, 0, 0)
+        self.hitbox = pygame.Rect(0, 0, 0, 0)
 
     def center(self):
         return self.rect.centerx, self.rect.centery
 
+    def clone(self):
+        # cheap copy for lookahead: the Rects (rect, hurtbox, hitbox) are the
+        # mutable members step_match changes in place, so each clone gets its
+        # own; the rest are immutable values or the shared controls dict.
+        # animator is shared on purpose: only the main loop calls
+        # animator.update/draw, never a rollout, so clones only carry the
+        # reference
+        other = Player.__new__(Player)
+        other.__dict__.update(self.__dict__)
+        other.rect = self.rect.copy()
+        other.hurtbox = self.hurtbox.copy()
+        other.hitbox = self.hitbox.copy()
+        return other
+
+    def snapshot(self):
+        # plain tuple (no enums/Rects) so it pickles across processes
+        return (tuple(self.rect), self.vx, self.vy, self.on_ground,
+                self.state.value, self.facing.value, self.health,
+                self.attack_timer, self.hurt_timer, self.invuln_timer,
+                getattr(self, 'attack_type', 'light'), self.controls)
+
+    @classmethod
+    def from_snapshot(cls, snap):
+        (rect, vx, vy, on_ground, state, facing, health, attack_timer,
+         hurt_timer, invuln_timer, attack_type, controls) = snap
+        pl = cls(rect[0], rect[1], WHITE, controls)
+        pl.vx, pl.vy, pl.on_ground = vx, vy, on_ground
+        pl.state, pl.facing = State(state), Facing(facing)
+        pl.health = health
+        pl.attack_timer = attack_timer
+        pl.hurt_timer = hurt_timer
+        pl.invuln_timer = invuln_timer
+        pl.attack_type = attack_type
+        return pl
+
     def update(self, keys, opponent):
         # timers
         if self.invuln_timer > 0:
@@ -171,32 +252,29 @@ class Player:
         self.collide_ground()
 
         # collisions with opponent's hurtboxes
-        if self.state == State.ATTACK and self.attack_timer > 0:
-            hb = self.get_hitbox()
-            if hb.colliderect(opponent.get_hurtbox()):
-                # hit!
-                if opponent.invuln_timer == 0 and opponent.state != State.DOWN:
-                    damage = 6 if self.attack_type == 'light' else 12
-                    # simple block check: if opponent is crouching and facing away from attack, reduce
-                    blocked = False
-                    if opponent.state == State.CROUCH:
-                        blocked = True
-                    if blocked:
-                        opponent.hurt_timer = BLOCK_STUN
-                        opponent.vx = 0
-                        opponent.vy = 0
-                        opponent.invuln_timer = INVULN_DURATION
-                    else:
-                        opponent.health -= damage
-                        opponent.hurt_timer = HURT_DURATION
-                        # knockback
-                        kb = 6 if self.attack_type == 'light' else 12
-                        dir = 1 if self.facing == Facing.RIGHT else -1
-                        opponent.vx = kb * dir
-                        opponent.vy = -6
-                        opponent.invuln_timer = INVULN_DURATION
-                    # prevent repeated hits in same attack window
-                    self.attack_timer = min(self.attack_timer, 4)
+        if opponent is not None:
+            self.resolve_hit(opponent)
+
+    def attacking(self):
+        return self.state == State.ATTACK and self.attack_timer > 0
+
+    def resolve_hit(self, opponent):
+        """Apply this player's active attack to opponent if it connects."""
+        if not self.attacking():
+            return False
+        if not self.get_hitbox().colliderect(opponent.get_hurtbox()):
+            return False
+        # hit!
+        if opponent.invuln_timer != 0 or opponent.state == State.DOWN:
+            return False
+        light = self.attack_type == 'light'
+        damage = LIGHT_DAMAGE if light else HEAVY_DAMAGE
+        kb = LIGHT_KNOCKBACK if light else HEAVY_KNOCKBACK
+        dir = 1 if self.facing == Facing.RIGHT else -1
+        apply_hit(opponent, damage, kb, dir)
+        # prevent repeated hits in same attack window
+        self.attack_timer = min(self.attack_timer, 4)
+        return True
 
     def start_attack(self, typ):
         self.state = State.ATTACK
@@ -217,13 +295,15 @@ class Player:
             self.on_ground = False
 
     def get_hurtbox(self):
-        # slightly smaller than rect
-        hb = self.rect.inflate(-8, -12)
+        # slightly smaller than rect; updated in place, no new Rect per call
+        hb = self.hurtbox
+        hb.update(self.rect.x + 4, self.rect.y + 6,
+                  self.rect.width - 8, self.rect.height - 12)
         return hb
 
     def get_hitbox(self):
         # create a hitbox in front of player depending on attack type
-        reach = 40 if self.attack_type == 'light' else 60
+        reach = LIGHT_REACH if self.attack_type == 'light' else HEAVY_REACH
         w = reach
         h = 30
         if self.facing == Facing.RIGHT:
@@ -231,7 +311,8 @@ class Player:
         else:
             x = self.rect.left - w
         y = self.rect.centery - h//2
-        return pygame.Rect(x, y, w, h)
+        self.hitbox.update(x, y, w, h)
+        return self.hitbox
 
     def reset(self, x, y):
         self.rect.x = x
@@ -244,9 +325,101 @@ class Player:
         self.hurt_timer = 0
         self.invuln_timer = 0
 
+
+
+def apply_hit(target, damage, kb, dir):
+    """Damage (or block) target and knock it back in direction dir."""
+    # simple block check: if opponent is crouching and facing away from attack, reduce
+    blocked = False
+    if target.state == State.CROUCH:
+        blocked = True
+    if blocked:
+        target.hurt_timer = BLOCK_STUN
+        target.vx = 0
+        target.vy = 0
+        target.invuln_timer = INVULN_DURATION
+    else:
+        target.health -= damage
+        target.hurt_timer = HURT_DURATION
+        # knockback
+        target.vx = kb * dir
+        target.vy = -6
+        target.invuln_timer = INVULN_DURATION
+
+
+class Projectile:
+    def __init__(self, x, y, dir, owner):
+        self.rect = pygame.Rect(x, y, PROJECTILE_SIZE, PROJECTILE_SIZE)
+        self.vx = PROJECTILE_SPEED * dir
+        self.dir = dir
+        self.owner = owner
+        self.alive = True
+
+    def update(self):
+        self.rect.x += self.vx
+        if self.rect.right < 0 or self.rect.left > SCREEN_W:
+            self.alive = False
+
+    def attacking(self):
+        return self.alive
+
+    def get_hitbox(self):
+        return self.rect
+
+    def resolve_hit(self, target):
+        if not self.alive or target is self.owner:
+            return False
+        if not self.rect.colliderect(target.get_hurtbox()):
+            return False
+        if target.invuln_timer != 0 or target.state == State.DOWN:
+            return False
+        apply_hit(target, PROJECTILE_DAMAGE, PROJECTILE_KNOCKBACK, self.dir)
+        self.alive = False
+        return True
+
 # ----- GAME LOOP -----
 
 
+def clamp_to_stage(pl):
+    pl.rect.left = max(20, min(pl.rect.left, SCREEN_W-20-PLAYER_WIDTH))
+
+
+def step_match(p1, p2, keys1, keys2):
+    """Advance the match by one frame; return the winner's name or None."""
+    p1.update(keys1, p2)
+    p2.update(keys2, p1)
+
+    # basic clamp to stage
+    clamp_to_stage(p1)
+    clamp_to_stage(p2)
+
+    # check deaths
+    if p1.health <= 0 or p2.health <= 0:
+        return 'Player 1' if p2.health <= 0 else 'Player 2'
+    return None
+
+
+def step_ffa(fighters, keys_list, projectiles, grid):
+    """Advance a free-for-all by one frame.
+
+    Everyone moves first; hits are then resolved only on the candidate pairs
+    the broadphase grid reports. Returns the last fighter standing or None.
+    """
+    for pl, keys in zip(fighters, keys_list):
+        pl.update(keys, None)
+        clamp_to_stage(pl)
+    for pr in projectiles:
+        pr.update()
+
+    for attacker, target in grid.candidate_pairs(fighters + projectiles,
+                                                 fighters):
+        attacker.resolve_hit(target)
+    projectiles[:] = [pr for pr in projectiles if pr.alive]
+
+    alive = [pl for pl in fighters if pl.health > 0]
+    return alive[0] if len(alive) == 1 else None
+
+
 def draw_health_bar(surf, x, y, w, h, pct, name, color):
     pygame.draw.rect(surf, HEALTH_BG, (x, y, w, h))
     inner_w = max(0, int(w * (pct/100.0)))
@@ -259,114 +432,202 @@ def draw_health_bar(surf, x, y, w, h, pct, name, color):
     surf.blit(txt, (x+4, y-22))
 
 
-def main():
+def quit_game(cpu=None):
+    if cpu:
+        cpu.close()
+    pygame.quit()
+    sys.exit()
+
+
+def draw_player(screen, pl):
+    # players (with simple flash if invuln)
+    if pl.invuln_timer > 0 and (pl.invuln_timer//3) % 2 == 0:
+        # flash
+        s = pygame.Surface(
+            (pl.rect.width, pl.rect.height), pygame.SRCALPHA)
+        s.fill((255, 255, 255, 100))
+        screen.blit(s, (pl.rect.x, pl.rect.y))
+    if pl.animator:
+        pl.animator.draw(screen, pl.rect, pl.facing)
+    else:
+        pygame.draw.rect(screen, pl.color, pl.rect)
+    # draw hurtbox
+    hb = pl.get_hurtbox()
+    pygame.draw.rect(screen, (0, 0, 0), hb, 1)
+    # draw hitbox for active attacks
+    if pl.state == State.ATTACK and pl.attack_timer > 0:
+        hb2 = pl.get_hitbox()
+        pygame.draw.rect(screen, (255, 255, 0), hb2, 2)
+
+
+def draw_scene(screen, font, p1, p2, winner):
+    screen.fill(BG_COLOR)
+    # ground
+    pygame.draw.rect(screen, (50, 50, 60),
+                     (0, GROUND_Y, SCREEN_W, SCREEN_H-GROUND_Y))
+
+    draw_player(screen, p1)
+    draw_player(screen, p2)
+
+    # HUD
+    draw_health_bar(screen, 40, 30, 380, 24, p1.health, 'P1', P1_COLOR)
+    draw_health_bar(screen, SCREEN_W-420, 30, 380,
+                    24, p2.health, 'P2', P2_COLOR)
+
+    if winner:
+        info = font.render(
+            f'{winner} wins! Press R to restart.', True, WHITE)
+        screen.blit(
+            info, (SCREEN_W//2 - info.get_width()//2, SCREEN_H//2 - 20))
+
+    # Controls hint
+    hint = font.render(
+        'P1: A/D W S  F/G  |  P2: ←/→ ↑ ↓  K/L  |  R restart', True, WHITE)
+    screen.blit(hint, (SCREEN_W//2 - hint.get_width()//2, SCREEN_H - 40))
+
+
+def main(cpu_opponent=False, cpu_workers=None, headless_frames=None,
+         metrics_csv=None, sprites=None):
+    """Run the game.
+
+    The simulation advances in fixed SIM_DT steps from an accumulator, so a
+    slow frame is caught up with several steps instead of slowing the game.
+    With headless_frames set, both fighters are bots, nothing is shown, every
+    frame is fed exactly one SIM_DT and the run stops after that many frames.
+    sprites is an atlas path, '' for the generated placeholder atlas, or None
+    for plain rectangles.
+    """
+    if headless_frames:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+    cpu = None
+    if cpu_opponent:
+        # start the rollout pool before the window exists
+        from game_ai import CPUOpponent
+        cpu = CPUOpponent(workers=cpu_workers)
+    bot1, bot2 = None, cpu
+    if headless_frames:
+        from game_ai import ScriptedBot
+        bot1 = ScriptedBot(seed=1)
+        bot2 = cpu or ScriptedBot(seed=2)
+
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_W, SCREEN_H))
     pygame.display.set_caption('2D Fighting Game - Pygame')
     clock = pygame.time.Clock()
     font = pygame.font.SysFont('consolas', 24)
-
-    # controls mapping
-    p1_controls = {
-        'left': pygame.K_a,
-        'right': pygame.K_d,
-        'jump': pygame.K_w,
-        'crouch': pygame.K_s,
-        'light': pygame.K_f,
-        'heavy': pygame.K_g
-    }
-    p2_controls = {
-        'left': pygame.K_LEFT,
-        'right': pygame.K_RIGHT,
-        'jump': pygame.K_UP,
-        'crouch': pygame.K_DOWN,
-        'light': pygame.K_k,
-        'heavy': pygame.K_l
-    }
-
-    p1 = Player(200, GROUND_Y-PLAYER_HEIGHT, P1_COLOR, p1_controls)
-    p2 = Player(700, GROUND_Y-PLAYER_HEIGHT, P2_COLOR, p2_controls)
+    small_font = pygame.font.SysFont('consolas', 16)
+    stats = FrameStats(FPS, keep_all=metrics_csv is not None)
+
+    p1 = Player(200, GROUND_Y-PLAYER_HEIGHT, P1_COLOR, P1_CONTROLS)
+    p2 = Player(700, GROUND_Y-PLAYER_HEIGHT, P2_COLOR, P2_CONTROLS)
+    if sprites is not None:
+        # atlases are loaded and converted exactly once, here
+        from sprites import Animator, SpriteAtlas
+        for pl in (p1, p2):
+            atlas = (SpriteAtlas.load(sprites) if sprites
+                     else SpriteAtlas.placeholder(pl.color))
+            pl.animator = Animator(atlas)
 
     round_active = True
     winner = None
     round_timer = 0
 
+    accumulator = 0.0
+    prev = time.perf_counter()
     while True:
-        dt = clock.tick(FPS)
+        now = time.perf_counter()
+        frame_ms = (now - prev) * 1000.0
+        prev = now
+        if headless_frames:
+            accumulator += SIM_DT
+        else:
+            accumulator += frame_ms
+        # after a long stall, drop the backlog instead of spiralling
+        clamped = accumulator > SIM_DT * MAX_SIM_STEPS
+        if clamped:
+            accumulator = SIM_DT * MAX_SIM_STEPS
+
+        restart = False
         keys = pygame.key.get_pressed()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                quit_game(cpu)
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
-                    pygame.quit()
-                    sys.exit()
+                    quit_game(cpu)
                 if event.key == pygame.K_r:
-                    p1.reset(200, GROUND_Y-PLAYER_HEIGHT)
-                    p2.reset(700, GROUND_Y-PLAYER_HEIGHT)
-                    round_active = True
-                    winner = None
-
-        if round_active:
-            p1.update(keys, p2)
-            p2.update(keys, p1)
-
-            # basic clamp to stage
-            p1.rect.left = max(20, min(p1.rect.left, SCREEN_W-20-PLAYER_WIDTH))
-            p2.rect.left = max(20, min(p2.rect.left, SCREEN_W-20-PLAYER_WIDTH))
-
-            # check deaths
-            if p1.health <= 0 or p2.health <= 0:
+                    restart = True
+                if event.key == pygame.K_F3:
+                    stats.toggle()
+        if headless_frames and not round_active:
+            restart = True
+        if restart:
+            p1.reset(200, GROUND_Y-PLAYER_HEIGHT)
+            p2.reset(700, GROUND_Y-PLAYER_HEIGHT)
+            round_active = True
+            winner = None
+
+        t_sim = time.perf_counter()
+        # one CPU thinking budget per rendered frame, shared by catch-up steps
+        deadline = t_sim + cpu.budget if cpu else None
+        steps = 0
+        while accumulator >= SIM_DT:
+            accumulator -= SIM_DT
+            steps += 1
+            if not round_active:
+                continue
+            keys1 = bot1.keys(p1, p2) if bot1 else keys
+            keys2 = bot2.keys(p2, p1, deadline) if bot2 else keys
+            winner = step_match(p1, p2, keys1, keys2)
+            for pl in (p1, p2):
+                if pl.animator:
+                    pl.animator.update(pl.state)
+            if winner:
                 round_active = False
-                winner = 'Player 1' if p2.health <= 0 else 'Player 2'
                 round_timer = pygame.time.get_ticks()
 
-        # draw
-        screen.fill(BG_COLOR)
-        # ground
-        pygame.draw.rect(screen, (50, 50, 60),
-                         (0, GROUND_Y, SCREEN_W, SCREEN_H-GROUND_Y))
-
-        # players (with simple flash if invuln)
-        def draw_player(pl):
-            alpha = 255
-            if pl.invuln_timer > 0 and (pl.invuln_timer//3) % 2 == 0:
-                # flash
-                s = pygame.Surface(
-                    (pl.rect.width, pl.rect.height), pygame.SRCALPHA)
-                s.fill((255, 255, 255, 100))
-                screen.blit(s, (pl.rect.x, pl.rect.y))
-            pygame.draw.rect(screen, pl.color, pl.rect)
-            # draw hurtbox
-            hb = pl.get_hurtbox()
-            pygame.draw.rect(screen, (0, 0, 0), hb, 1)
-            # draw hitbox for active attacks
-            if pl.state == State.ATTACK and pl.attack_timer > 0:
-                hb2 = pl.get_hitbox()
-                pygame.draw.rect(screen, (255, 255, 0), hb2, 2)
-
-        draw_player(p1)
-        draw_player(p2)
-
-        # HUD
-        draw_health_bar(screen, 40, 30, 380, 24, p1.health, 'P1', P1_COLOR)
-        draw_health_bar(screen, SCREEN_W-420, 30, 380,
-                        24, p2.health, 'P2', P2_COLOR)
-
-        if not round_active:
-            info = font.render(
-                f'{winner} wins! Press R to restart.', True, WHITE)
-            screen.blit(
-                info, (SCREEN_W//2 - info.get_width()//2, SCREEN_H//2 - 20))
-
-        # Controls hint
-        hint = font.render(
-            'P1: A/D W S  F/G  |  P2: ←/→ ↑ ↓  K/L  |  R restart', True, WHITE)
-        screen.blit(hint, (SCREEN_W//2 - hint.get_width()//2, SCREEN_H - 40))
+        t_draw = time.perf_counter()
+        draw_scene(screen, font, p1, p2, winner)
+        stats.draw(screen, small_font)
 
+        t_flip = time.perf_counter()
         pygame.display.flip()
+        t_end = time.perf_counter()
+
+        stats.record(frame_ms, steps, (t_draw - t_sim) * 1000.0,
+                     (t_flip - t_draw) * 1000.0, (t_end - t_flip) * 1000.0,
+                     clamped)
+        if headless_frames and stats.frames >= headless_frames:
+            break
+        if not headless_frames:
+            clock.tick(FPS)
+
+    if metrics_csv:
+        stats.write_csv(metrics_csv)
+    frame_ms, steps, sim_ms, draw_ms, flip_ms = stats.averages(whole_run=True)
+    print(f'{stats.frames} frames: sim {sim_ms:.3f} ms, draw {draw_ms:.3f} ms,'
+          f' flip {flip_ms:.3f} ms, dropped {stats.dropped}')
+    if cpu:
+        cpu.close()
+    pygame.quit()
 
 
 if __name__ == '__main__':
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description='2D local fighting game')
+    parser.add_argument('--cpu', action='store_true',
+                        help='Player 2 is controlled by the CPU')
+    parser.add_argument('--cpu-workers', type=int, default=None,
+                        help='rollout processes for the CPU (0 = in-process)')
+    parser.add_argument('--headless', type=int, metavar='FRAMES',
+                        help='run bots without a window for FRAMES frames')
+    parser.add_argument('--metrics-csv', metavar='PATH',
+                        help='write per-frame timings to a CSV file on exit')
+    parser.add_argument('--sprites', nargs='?', const='', metavar='ATLAS',
+                        help='draw animated sprites (no ATLAS: placeholder)')
+    args = parser.parse_args()
+    # let game_ai's `import game` resolve to this module, not a second copy
+    sys.modules.setdefault('game', sys.modules[__name__])
+    main(args.cpu, args.cpu_workers, args.headless, args.metrics_csv,
+         args.sprites)
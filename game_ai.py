@@ -0,0 +1,201 @@
+"""
+CPU opponent for game.py
+
+Run:
+  - python game.py --cpu
+  - python game.py --cpu --cpu-workers 0   (no process pool, rollouts in-process)
+
+Description:
+  - Every few frames the CPU scores each candidate action with Monte Carlo
+    rollouts: it plays the action on a cloned copy of the match, then random
+    actions for both fighters, and measures the health swing.
+  - Rollouts are farmed out to a process pool. The game loop never waits for
+    them longer than a per-frame budget, so rendering stays at 60 FPS; results
+    that are not ready yet are simply picked up on a later frame.
+  - The chosen action is turned into a virtual `keys` mapping that
+    `Player.update` reads through the player's normal `controls` dict.
+"""
+
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+import game
+
+# action name -> control names held down while it is active
+ACTIONS = {
+    'idle': (),
+    'left': ('left',),
+    'right': ('right',),
+    'jump': ('jump',),
+    'jump_left': ('jump', 'left'),
+    'jump_right': ('jump', 'right'),
+    'crouch': ('crouch',),
+    'light': ('light',),
+    'heavy': ('heavy',),
+}
+ACTION_NAMES = list(ACTIONS)
+
+BUDGET_MS = 4.0     # max time spent by the CPU per rendered frame
+ROLLOUTS = 12       # rollouts per action per decision
+DEPTH = 45          # frames simulated per rollout
+HOLD = 6            # frames an action is held before a new one is chosen
+
+
+class VirtualKeys(dict):
+    """Stand-in for pygame.key.get_pressed(); unknown keys are not pressed."""
+
+    def __missing__(self, key):
+        return False
+
+
+def press(controls, names):
+    """Build a VirtualKeys with the given control names held down."""
+    return VirtualKeys({controls[name]: True for name in names})
+
+
+def rollout(me, opp, action, rng, depth=DEPTH, hold=HOLD):
+    """Play `action` on clones of the fighters and return the health swing."""
+    me = me.clone()
+    opp = opp.clone()
+    start = me.health - opp.health
+    me_keys = press(me.controls, ACTIONS[action])
+    opp_keys = press(opp.controls, ACTIONS[rng.choice(ACTION_NAMES)])
+    for frame in range(depth):
+        if frame and frame % hold == 0:
+            me_keys = press(me.controls, ACTIONS[rng.choice(ACTION_NAMES)])
+            opp_keys = press(opp.controls, ACTIONS[rng.choice(ACTION_NAMES)])
+        if game.step_match(me, opp, me_keys, opp_keys):
+            break
+    # small pull towards the opponent so the CPU doesn't idle at range
+    distance = abs(me.rect.centerx - opp.rect.centerx)
+    return (me.health - opp.health) - start - distance * 0.01
+
+
+def evaluate_action(me_snap, opp_snap, action, rollouts, seed,
+                    depth=DEPTH, hold=HOLD):
+    """Pool worker: mean rollout score of one action from a match snapshot."""
+    me = game.Player.from_snapshot(me_snap)
+    opp = game.Player.from_snapshot(opp_snap)
+    rng = random.Random(seed)
+    total = 0.0
+    for _ in range(rollouts):
+        total += rollout(me, opp, action, rng, depth, hold)
+    return total / rollouts
+
+
+class CPUOpponent:
+    """Chooses actions by rollouts and hands them back as virtual keys."""
+
+    def __init__(self, workers=None, budget_ms=BUDGET_MS, rollouts=ROLLOUTS,
+                 depth=DEPTH, hold=HOLD, seed=None):
+        # workers=None -> one per core, workers=0 -> no pool
+        self.pool = ProcessPoolExecutor(workers) if workers != 0 else None
+        self.budget = budget_ms / 1000.0
+        self.rollouts = rollouts
+        self.depth = depth
+        self.hold = hold
+        self.rng = random.Random(seed)
+        self.action = 'idle'
+        self.frame = 0
+        self.pending = {}   # future -> action
+        self.totals = {}    # action -> summed score
+        self.counts = {}    # action -> rollouts behind the sum
+
+    def keys(self, me, opponent, deadline=None):
+        """Virtual key state for `me` this step; never blocks past the
+        deadline. The caller passes one deadline per rendered frame, so
+        catch-up steps share a single budget (default: budget from now)."""
+        if deadline is None:
+            deadline = time.perf_counter() + self.budget
+        if self.pool:
+            self._think_pooled(me, opponent, deadline)
+        else:
+            self._think_inline(me, opponent, deadline)
+        self.frame += 1
+        return press(me.controls, ACTIONS[self.action])
+
+    def _think_pooled(self, me, opponent, deadline):
+        if self.pending:
+            done, _ = wait(self.pending,
+                           timeout=max(0.0, deadline - time.perf_counter()))
+            for fut in done:
+                action = self.pending.pop(fut)
+                self._record(action, fut.result() * self.rollouts,
+                             self.rollouts)
+            if not self.pending:
+                self._decide()
+        elif self.frame % self.hold == 0:
+            me_snap, opp_snap = me.snapshot(), opponent.snapshot()
+            for action in ACTION_NAMES:
+                fut = self.pool.submit(evaluate_action, me_snap, opp_snap,
+                                       action, self.rollouts,
+                                       self.rng.getrandbits(32),
+                                       self.depth, self.hold)
+                self.pending[fut] = action
+
+    def _think_inline(self, me, opponent, deadline):
+        # round-robin single rollouts until the frame budget is spent
+        i = 0
+        while time.perf_counter() < deadline:
+            action = ACTION_NAMES[i % len(ACTION_NAMES)]
+            if self.counts.get(action, 0) < self.rollouts:
+                self._record(action, rollout(me, opponent, action, self.rng,
+                                             self.depth, self.hold), 1)
+            elif all(self.counts.get(a, 0) >= self.rollouts
+                     for a in ACTION_NAMES):
+                break
+            i += 1
+        if self.frame % self.hold == self.hold - 1:
+            self._decide()
+
+    def _record(self, action, total, count):
+        self.totals[action] = self.totals.get(action, 0.0) + total
+        self.counts[action] = self.counts.get(action, 0) + count
+
+    def _decide(self):
+        if self.counts:
+            self.action = max(self.counts,
+                              key=lambda a: self.totals[a] / self.counts[a])
+        self.totals.clear()
+        self.counts.clear()
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+
+class ScriptedBot:
+    """Cheap rule-based fighter for headless matches and balance sweeps."""
+
+    def __init__(self, seed=None, aggression=0.6, heavy_ratio=0.35):
+        self.rng = random.Random(seed)
+        self.aggression = aggression
+        self.heavy_ratio = heavy_ratio
+        self.action = 'idle'
+        self.frame = 0
+
+    def keys(self, me, opponent, deadline=None):
+        # deadline is accepted for CPUOpponent compatibility; choosing is cheap
+        if self.frame % HOLD == 0:
+            self.action = self._choose(me, opponent)
+        self.frame += 1
+        return press(me.controls, ACTIONS[self.action])
+
+    def _choose(self, me, opponent):
+        dx = opponent.rect.centerx - me.rect.centerx
+        toward = 'right' if dx > 0 else 'left'
+        facing_ok = (dx > 0) == (me.facing == game.Facing.RIGHT)
+        gap = abs(dx) - game.PLAYER_WIDTH // 2
+        r = self.rng.random()
+        if not facing_ok or gap > game.HEAVY_REACH:
+            return 'jump_' + toward if r < 0.05 else toward
+        if gap > game.LIGHT_REACH:
+            # only the heavy attack connects from here
+            return 'heavy' if r < self.aggression * self.heavy_ratio else toward
+        if r < self.aggression:
+            return 'heavy' if self.rng.random() < self.heavy_ratio else 'light'
+        if r < self.aggression + 0.2:
+            return 'crouch'
+        return 'idle'
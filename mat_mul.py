@@ -1,46 +1,46 @@
-"""This program is for calculation of matrix multiplication."""
-
-# Get dimensions
-r1, c1 = map(int, input("Enter the row and column of first matrix: ").split())
-r2, c2 = map(int, input("Enter the row and column of second matrix: ").split())
-
-# Check if multiplication is possible
-if c1 != r2:
-    print("Matrix multiplication not possible! Columns of first matrix must equal rows of second.")
-else:
-    # Initialize matrices
-    matrix1 = []
-    matrix2 = []
-    result = []
-
-    # Input first matrix
-    print("\n--- First Matrix ---")
-    for i in range(r1):
-        row = []
-        for j in range(c1):
-            val = int(input(f"Enter element [{i+1}][{j+1}]: "))
-            row.append(val)
-        matrix1.append(row)
+"""This program is for calculation of matrix multiplication.
 
-    # Input second matrix
-    print("\n--- Second Matrix ---")
-    for i in range(r2):
+Run without arguments to type the matrices in, or multiply matrix files
+(CSV or .npy) with `python mat_mul.py a.csv b.csv -o result.csv`. With
+--sparse the inputs are Matrix Market coordinate files multiplied as CSR
+(see sparse.py); a .mtx output stays sparse, anything else is dense.
+"""
+
+import argparse
+import time
+
+from matrix import BACKENDS, load, matmul, save, shape
+from sparse import read_coordinate, write_coordinate
+
+
+def read_matrix(rows, cols):
+    """Read a rows x cols matrix element by element from input()."""
+    matrix = []
+    for i in range(rows):
         row = []
-        for j in range(c2):
+        for j in range(cols):
             val = int(input(f"Enter element [{i+1}][{j+1}]: "))
             row.append(val)
-        matrix2.append(row)
+        matrix.append(row)
+    return matrix
 
-    # Initialize result matrix with zeros
-    for i in range(r1):
-        row = [0] * c2
-        result.append(row)
 
-    # Matrix multiplication
-    for i in range(r1):
-        for j in range(c2):
-            for k in range(c1):
-                result[i][j] += matrix1[i][k] * matrix2[k][j]
+def interactive():
+    # Get dimensions
+    r1, c1 = map(int, input("Enter the row and column of first matrix: ").split())
+    r2, c2 = map(int, input("Enter the row and column of second matrix: ").split())
+
+    # Check if multiplication is possible
+    if c1 != r2:
+        print("Matrix multiplication not possible! "
+              "Columns of first matrix must equal rows of second.")
+        return
+
+    print("\n--- First Matrix ---")
+    matrix1 = read_matrix(r1, c1)
+    print("\n--- Second Matrix ---")
+    matrix2 = read_matrix(r2, c2)
+    result = matmul(matrix1, matrix2, backend="python")
 
     # Display matrices
     print("\n--- First Matrix ---")
@@ -54,3 +54,41 @@ else:
     print("\n--- Result Matrix ---")
     for row in result:
         print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="matrix multiplication")
+    parser.add_argument("files", nargs="*", metavar="FILE",
+                        help="two input matrices (.csv or .npy)")
+    parser.add_argument("-o", "--output", default="result.csv",
+                        help="result file, .csv or .npy, or .mtx with --sparse "
+                             "(default: result.csv)")
+    parser.add_argument("--backend", choices=BACKENDS, default="auto")
+    parser.add_argument("--sparse", action="store_true",
+                        help="inputs are sparse coordinate (.mtx) files")
+    args = parser.parse_args()
+    if not args.files:
+        interactive()
+        return
+    if len(args.files) != 2:
+        parser.error("give exactly two matrix files")
+    a, b = (read_coordinate(path) if args.sparse else load(path)
+            for path in args.files)
+    start = time.perf_counter()
+    try:
+        result = a @ b if args.sparse else matmul(a, b, args.backend)
+    except ValueError as e:
+        parser.exit(1, f"Matrix multiplication not possible! {e}\n")
+    secs = time.perf_counter() - start
+    if not args.sparse:
+        save(args.output, result)
+    elif args.output.endswith(".mtx"):
+        write_coordinate(args.output, result)
+    else:
+        save(args.output, result.to_dense())
+    rows, cols = result.shape if args.sparse else shape(result)
+    print(f"{rows}x{cols} result written to {args.output} in {secs * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
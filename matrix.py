@@ -0,0 +1,298 @@
+"""Matrix multiplication for matrices stored in files.
+
+Matrices are read from CSV (one row per line) or .npy files and the
+product is written in either format, picked by the output's extension:
+
+    python matrix.py a.csv b.npy -o c.csv
+    python matrix.py --benchmark
+
+Backends:
+  - numpy: `a @ b` (BLAS for floats).
+  - strassen: Strassen's recursion down to STRASSEN_LEAF-sized blocks. It is
+    used automatically for integer matrices once every dimension reaches
+    STRASSEN_MIN, since NumPy has no BLAS for integers; leaves use the
+    NumPy kernel, or the pure-Python one without NumPy.
+  - python: a cache-blocked i-k-j kernel on lists, used when NumPy is not
+    installed. It works on Python ints, so results are exact; NumPy integer
+    products wrap around at 64 bits.
+"""
+
+import argparse
+import csv
+import random
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BLOCK = 64  # tile size of the pure-Python kernel
+STRASSEN_MIN = 256  # smallest dimension at which integer products use Strassen
+STRASSEN_LEAF = 64  # recursion stops at blocks this small
+BACKENDS = ("auto", "numpy", "strassen", "python")
+
+
+def parse_number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def read_csv(path):
+    """Rows of a CSV file as lists of ints/floats (blank lines skipped)."""
+    with open(path, newline="") as f:
+        return [[parse_number(x) for x in row] for row in csv.reader(f) if row]
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        csv.writer(f).writerows(rows)
+
+
+def load(path):
+    """A matrix from a .npy or CSV file (an array when NumPy is installed,
+    else a list of rows)."""
+    if path.endswith(".npy"):
+        if np is None:
+            raise ImportError(".npy files need NumPy")
+        return np.load(path)
+    rows = read_csv(path)
+    if rows and any(len(row) != len(rows[0]) for row in rows):
+        raise ValueError(f"{path}: rows have different lengths")
+    return rows if np is None else np.array(rows)
+
+
+def save(path, matrix):
+    """Write a matrix to .npy or CSV, by the extension of path."""
+    if path.endswith(".npy"):
+        if np is None:
+            raise ImportError(".npy files need NumPy")
+        np.save(path, np.asarray(matrix))
+    else:
+        write_csv(path, matrix.tolist() if hasattr(matrix, "tolist") else matrix)
+
+
+def shape(matrix):
+    if hasattr(matrix, "shape"):
+        return matrix.shape
+    return len(matrix), len(matrix[0]) if matrix else 0
+
+
+def is_integer(matrix):
+    if hasattr(matrix, "dtype"):
+        return np.issubdtype(matrix.dtype, np.integer)
+    return all(type(x) is int for row in matrix for x in row)
+
+
+def matmul_python(a, b, block=BLOCK):
+    """Product of two lists of rows, blocked over k and j so each inner
+    step is one row-slice update c[i][j:j+block] += a[i][k] * b[k][j:j+block]
+    on rows that stay in cache."""
+    n, m, p = len(a), len(b), len(b[0]) if b else 0
+    c = [[0] * p for _ in range(n)]
+    for k0 in range(0, m, block):
+        k1 = min(k0 + block, m)
+        for j0 in range(0, p, block):
+            j1 = min(j0 + block, p)
+            tiles = [b[k][j0:j1] for k in range(k0, k1)]
+            for i in range(n):
+                ai = a[i]
+                acc = c[i][j0:j1]
+                for k in range(k0, k1):
+                    aik = ai[k]
+                    if aik:
+                        acc = [x + aik * y for x, y in zip(acc, tiles[k - k0])]
+                c[i][j0:j1] = acc
+    return c
+
+
+class _ArrayOps:
+    @staticmethod
+    def quarters(x, h, w):
+        return x[:h, :w], x[:h, w:], x[h:, :w], x[h:, w:]
+
+    @staticmethod
+    def add(x, y):
+        return x + y
+
+    @staticmethod
+    def sub(x, y):
+        return x - y
+
+    @staticmethod
+    def join(c11, c12, c21, c22):
+        return np.block([[c11, c12], [c21, c22]])
+
+    @staticmethod
+    def pad(x, rows, cols):
+        return np.pad(x, ((0, rows - x.shape[0]), (0, cols - x.shape[1])))
+
+    @staticmethod
+    def crop(x, rows, cols):
+        return x[:rows, :cols]
+
+    mul = staticmethod(lambda x, y: x @ y)
+
+
+class _ListOps:
+    @staticmethod
+    def quarters(x, h, w):
+        return ([row[:w] for row in x[:h]], [row[w:] for row in x[:h]],
+                [row[:w] for row in x[h:]], [row[w:] for row in x[h:]])
+
+    @staticmethod
+    def add(x, y):
+        return [[u + v for u, v in zip(r, s)] for r, s in zip(x, y)]
+
+    @staticmethod
+    def sub(x, y):
+        return [[u - v for u, v in zip(r, s)] for r, s in zip(x, y)]
+
+    @staticmethod
+    def join(c11, c12, c21, c22):
+        return [r + s for r, s in zip(c11, c12)] + [r + s for r, s in zip(c21, c22)]
+
+    @staticmethod
+    def pad(x, rows, cols):
+        padded = [row + [0] * (cols - len(row)) for row in x]
+        return padded + [[0] * cols for _ in range(rows - len(x))]
+
+    @staticmethod
+    def crop(x, rows, cols):
+        return [row[:cols] for row in x[:rows]]
+
+    mul = staticmethod(matmul_python)
+
+
+def _strassen(a, b, ops, leaf):
+    (n, m), p = shape(a), shape(b)[1]
+    if min(n, m, p) <= leaf:
+        return ops.mul(a, b)
+    if n % 2 or m % 2 or p % 2:
+        n2, m2, p2 = n + n % 2, m + m % 2, p + p % 2
+        c = _strassen(ops.pad(a, n2, m2), ops.pad(b, m2, p2), ops, leaf)
+        return ops.crop(c, n, p)
+    a11, a12, a21, a22 = ops.quarters(a, n // 2, m // 2)
+    b11, b12, b21, b22 = ops.quarters(b, m // 2, p // 2)
+    add, sub = ops.add, ops.sub
+    m1 = _strassen(add(a11, a22), add(b11, b22), ops, leaf)
+    m2 = _strassen(add(a21, a22), b11, ops, leaf)
+    m3 = _strassen(a11, sub(b12, b22), ops, leaf)
+    m4 = _strassen(a22, sub(b21, b11), ops, leaf)
+    m5 = _strassen(add(a11, a12), b22, ops, leaf)
+    m6 = _strassen(sub(a21, a11), add(b11, b12), ops, leaf)
+    m7 = _strassen(sub(a12, a22), add(b21, b22), ops, leaf)
+    return ops.join(add(sub(add(m1, m4), m5), m7), add(m3, m5),
+                    add(m2, m4), add(add(sub(m1, m2), m3), m6))
+
+
+def strassen(a, b, leaf=STRASSEN_LEAF):
+    """Strassen product: 7 half-size products per level instead of 8."""
+    if hasattr(a, "shape") or hasattr(b, "shape"):
+        return _strassen(np.asarray(a), np.asarray(b), _ArrayOps, leaf)
+    return _strassen(a, b, _ListOps, leaf)
+
+
+def matmul(a, b, backend="auto"):
+    """Product of two matrices (arrays or lists of rows); see the module
+    docstring for the backends. Returns an array when NumPy did the work,
+    else a list of rows."""
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}")
+    (n, m), (m2, p) = shape(a), shape(b)
+    if m != m2:
+        raise ValueError(f"cannot multiply {n}x{m} by {m2}x{p}: columns of the "
+                         "first matrix must equal rows of the second")
+    if backend == "auto":
+        if is_integer(a) and is_integer(b) and min(n, m, p) >= STRASSEN_MIN:
+            backend = "strassen"
+        else:
+            backend = "python" if np is None else "numpy"
+    if backend == "python":
+        if hasattr(a, "tolist"):
+            a = a.tolist()
+        if hasattr(b, "tolist"):
+            b = b.tolist()
+        return matmul_python(a, b)
+    if np is None and backend == "numpy":
+        raise ImportError("the numpy backend needs NumPy")
+    if backend == "strassen":
+        if np is not None:
+            a, b = np.asarray(a), np.asarray(b)
+        return strassen(a, b)
+    return np.asarray(a) @ np.asarray(b)
+
+
+def _naive(a, b):
+    n, m, p = len(a), len(b), len(b[0])
+    c = [[0] * p for _ in range(n)]
+    for i in range(n):
+        for j in range(p):
+            for k in range(m):
+                c[i][j] += a[i][k] * b[k][j]
+    return c
+
+
+def benchmark(sizes=(64, 128, 256, 512, 1024), python_max=256, seed=0):
+    """Time every backend on random integer matrices (and NumPy on floats)."""
+    rng = random.Random(seed)
+    columns = ["i-j-k loop", "python", "python+strassen"]
+    if np is not None:
+        columns = ["numpy float", "numpy int", "numpy+strassen"] + columns
+    print(f"{'n':>5}" + "".join(f"{name:>17}" for name in columns))
+    for n in sizes:
+        a = [[rng.randrange(-100, 100) for _ in range(n)] for _ in range(n)]
+        b = [[rng.randrange(-100, 100) for _ in range(n)] for _ in range(n)]
+        runs = []
+        if np is not None:
+            x, y = np.array(a), np.array(b)
+            runs += [(lambda: x.astype(float) @ y.astype(float)),
+                     (lambda: x @ y), (lambda: strassen(x, y))]
+        small = n <= python_max
+        runs += [(lambda: _naive(a, b)) if n <= 128 else None,
+                 (lambda: matmul_python(a, b)) if small else None,
+                 (lambda: strassen(a, b)) if small else None]
+        cells = []
+        expected = None
+        for run in runs:
+            if run is None:
+                cells.append(f"{'-':>17}")
+                continue
+            start = time.perf_counter()
+            c = run()
+            secs = time.perf_counter() - start
+            c = c.tolist() if hasattr(c, "tolist") else c
+            if expected is None:
+                expected = c
+            assert c == expected, "backends disagree"
+            cells.append(f"{secs * 1000:>14.1f} ms")
+        print(f"{n:>5}" + "".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="multiply matrix files")
+    parser.add_argument("a", nargs="?", help="first matrix (.csv or .npy)")
+    parser.add_argument("b", nargs="?", help="second matrix (.csv or .npy)")
+    parser.add_argument("-o", "--output", help="result file (.csv or .npy)")
+    parser.add_argument("--backend", choices=BACKENDS, default="auto")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="time the backends on random matrices")
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark()
+        return
+    if not (args.a and args.b and args.output):
+        parser.error("give two input matrices and -o OUTPUT, or --benchmark")
+    a, b = load(args.a), load(args.b)
+    start = time.perf_counter()
+    c = matmul(a, b, args.backend)
+    secs = time.perf_counter() - start
+    save(args.output, c)
+    n, p = shape(c)
+    print(f"{n}x{p} result written to {args.output} ({secs * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
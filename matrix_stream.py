@@ -0,0 +1,243 @@
+"""Out-of-core matrix addition: add two matrices that do not fit in RAM.
+
+    python matrix_stream.py a.npy b.npy -o sum.npy
+    python matrix_stream.py a.bin b.bin -o sum.bin --shape 50000 50000 --dtype int32
+    python matrix_stream.py a.csv b.csv -o sum.csv
+
+Binary inputs (.npy, or raw C-order data with --shape and --dtype) are
+memory-mapped and added CHUNK_BYTES at a time into one reused buffer, which
+is appended to the output file. Pages of the inputs are dropped from the
+mapping once a chunk is done, so memory use stays constant however big
+the files are. Shapes and dtypes come from the .npy headers (for raw files
+the file size must match --shape) and are checked before anything is
+written.
+
+CSV inputs are streamed row by row with the csv module and need no NumPy.
+
+The output format follows the output extension: .npy gets a header, .csv
+is text and anything else is raw data. A binary sum of a 2-D C-order
+matrix can be written as CSV; CSV inputs can only be written as CSV, since
+their shape and dtype are not known until the last row has been read.
+"""
+
+import argparse
+import csv
+import mmap
+import os
+import time
+from itertools import zip_longest
+
+from matrix import parse_number
+
+CHUNK_BYTES = 16 << 20  # output bytes per chunk
+
+
+class Mapped:
+    """A binary matrix file mapped read-only: .npy (shape and dtype from its
+    header) or raw C-order data (shape and dtype given)."""
+
+    def __init__(self, path, shape=None, dtype=None):
+        import numpy as np
+
+        self.path = path
+        if not path.endswith(".npy") and (shape is None or dtype is None):
+            raise ValueError(f"{path}: raw files need --shape and --dtype")
+        self.file = open(path, "rb")
+        if path.endswith(".npy"):
+            version = np.lib.format.read_magic(self.file)
+            if version == (1, 0):
+                header = np.lib.format.read_array_header_1_0(self.file)
+            else:
+                header = np.lib.format.read_array_header_2_0(self.file)
+            self.shape, self.fortran_order, self.dtype = header
+            self.offset = self.file.tell()
+        else:
+            self.shape, self.dtype = tuple(shape), np.dtype(dtype)
+            self.fortran_order = False
+            self.offset = 0
+        self.size = 1
+        for dim in self.shape:
+            self.size *= dim
+        self.nbytes = self.size * self.dtype.itemsize
+        actual = os.fstat(self.file.fileno()).st_size - self.offset
+        if actual != self.nbytes:
+            self.file.close()
+            raise ValueError(f"{path}: {actual} data bytes, but shape "
+                             f"{self.shape} of {self.dtype} needs {self.nbytes}")
+        self.map = (mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+                    if self.nbytes else None)
+        self.released = 0
+
+    def chunk(self, start, stop):
+        """Elements start..stop (in storage order) as a read-only array."""
+        import numpy as np
+
+        return np.frombuffer(self.map, self.dtype, stop - start,
+                             self.offset + start * self.dtype.itemsize)
+
+    def release(self, stop):
+        """Drop mapped pages before element stop; they are faulted back in
+        from the page cache if needed again. A no-op where madvise has no
+        MADV_DONTNEED (Windows)."""
+        if not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        end = self.offset + stop * self.dtype.itemsize
+        end -= end % mmap.PAGESIZE
+        if end > self.released:
+            self.map.madvise(mmap.MADV_DONTNEED, self.released,
+                             end - self.released)
+            self.released = end
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def add_binary(a_path, b_path, out_path, shape=None, dtype=None,
+               chunk_bytes=CHUNK_BYTES):
+    """Add two binary matrix files into out_path (.npy gets a header, .csv
+    is written as text, any other extension raw). Returns the number of
+    bytes read."""
+    import numpy as np
+
+    with Mapped(a_path, shape, dtype) as a, Mapped(b_path, shape, dtype) as b:
+        if a.shape != b.shape:
+            raise ValueError(f"Matrix addition not possible! Shapes {a.shape} "
+                             f"and {b.shape} differ.")
+        if a.fortran_order != b.fortran_order:
+            raise ValueError("both .npy files must use the same memory order")
+        out_dtype = np.result_type(a.dtype, b.dtype)
+        step = max(1, chunk_bytes // out_dtype.itemsize)
+        as_csv = out_path.endswith(".csv")
+        if as_csv:
+            if len(a.shape) != 2 or a.fortran_order:
+                raise ValueError(f"{out_path}: only a 2-D C-order matrix can "
+                                 f"be written as CSV (shape {a.shape})")
+            width = a.shape[1]
+            if width:
+                step = max(1, step // width) * width   # whole rows per chunk
+        buffer = np.empty(min(step, a.size), dtype=out_dtype)
+        with open(out_path, "w" if as_csv else "wb",
+                  newline="" if as_csv else None) as out:
+            if as_csv:
+                writer = csv.writer(out)
+            elif out_path.endswith(".npy"):
+                np.lib.format.write_array_header_2_0(out, {
+                    "descr": np.lib.format.dtype_to_descr(out_dtype),
+                    "fortran_order": a.fortran_order,
+                    "shape": a.shape,
+                })
+            for start in range(0, a.size, step):
+                stop = min(start + step, a.size)
+                chunk = buffer[:stop - start]
+                np.add(a.chunk(start, stop), b.chunk(start, stop), out=chunk)
+                if as_csv:
+                    writer.writerows(chunk.reshape(-1, width).tolist())
+                else:
+                    out.write(chunk.data)
+                a.release(stop)
+                b.release(stop)
+        return a.nbytes + b.nbytes
+
+
+def add_csv(a_path, b_path, out_path):
+    """Add two CSV matrices row by row into out_path. Returns the number of
+    bytes read. Row counts and lengths are checked as the rows arrive, so a
+    mismatch removes the partly written output."""
+    try:
+        with open(a_path, newline="") as fa, open(b_path, newline="") as fb, \
+                open(out_path, "w", newline="") as out:
+            _add_rows(csv.reader(fa), csv.reader(fb), csv.writer(out))
+    except ValueError:
+        os.remove(out_path)
+        raise
+    return os.path.getsize(a_path) + os.path.getsize(b_path)
+
+
+def _add_rows(reader_a, reader_b, writer):
+    rows_a = (row for row in reader_a if row)
+    rows_b = (row for row in reader_b if row)
+    width = None
+    for i, (ra, rb) in enumerate(zip_longest(rows_a, rows_b)):
+        if ra is None or rb is None:
+            raise ValueError("Matrix addition not possible! The files have "
+                             "a different number of rows.")
+        if width is None:
+            width = len(ra)
+        if len(ra) != width or len(rb) != width:
+            raise ValueError(f"Matrix addition not possible! Row {i + 1} "
+                             f"has {len(ra)} and {len(rb)} columns, "
+                             f"expected {width}.")
+        writer.writerow([parse_number(x) + parse_number(y)
+                         for x, y in zip(ra, rb)])
+
+
+def add_files(a_path, b_path, out_path, shape=None, dtype=None,
+              chunk_bytes=CHUNK_BYTES):
+    """Add two matrix files, both CSV or both binary, in the format of
+    out_path's extension. Returns bytes read and seconds taken."""
+    csv_inputs = [path.endswith(".csv") for path in (a_path, b_path)]
+    if csv_inputs[0] != csv_inputs[1]:
+        raise ValueError("inputs must both be CSV or both be binary")
+    if csv_inputs[0] and not out_path.endswith(".csv"):
+        raise ValueError(f"{out_path}: the sum of CSV inputs can only be "
+                         "written to a .csv file")
+    start = time.perf_counter()
+    if csv_inputs[0]:
+        nbytes = add_csv(a_path, b_path, out_path)
+    else:
+        nbytes = add_binary(a_path, b_path, out_path, shape, dtype, chunk_bytes)
+    return nbytes, time.perf_counter() - start
+
+
+def _peak_rss_mib():
+    try:
+        import resource
+    except ImportError:   # not on Windows
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def report(nbytes, secs):
+    line = (f"read {nbytes / 1e6:,.1f} MB in {secs:.2f}s: "
+            f"{nbytes / 1e6 / max(secs, 1e-9):,.1f} MB/s")
+    peak = _peak_rss_mib()
+    if peak is not None:
+        line += f" (peak RSS {peak:.0f} MiB)"
+    print(line)
+
+
+def add_arguments(parser):
+    parser.add_argument("--shape", type=int, nargs=2, metavar=("ROWS", "COLS"),
+                        help="shape of raw binary inputs")
+    parser.add_argument("--dtype", help="dtype of raw binary inputs, e.g. int32")
+    parser.add_argument("--chunk-mb", type=int, default=CHUNK_BYTES >> 20,
+                        help="output chunk size in MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="out-of-core matrix sum")
+    parser.add_argument("a")
+    parser.add_argument("b")
+    parser.add_argument("-o", "--output", required=True,
+                        help=".npy, .csv or raw binary (any other extension)")
+    add_arguments(parser)
+    args = parser.parse_args()
+    try:
+        nbytes, secs = add_files(args.a, args.b, args.output, args.shape,
+                                 args.dtype, args.chunk_mb << 20)
+    except ValueError as e:
+        parser.exit(1, f"{e}\n")
+    print(f"sum written to {args.output}")
+    report(nbytes, secs)
+
+
+if __name__ == "__main__":
+    main()
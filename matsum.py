@@ -1,9 +1,29 @@
-"""This progranm is for calculation of matrix summation."""
-r1, c1 = map(int, input("Enter the row and column of first matrix: ").split())
-r2, c2 = map(int, input("Enter the row and column of second matrix: ").split())
-if r1 != r2 or c1 != c2:
-    print("Matrix addition not possible! Both matrices must have the same dimensions.")
-else:
+"""This progranm is for calculation of matrix summation.
+
+Run without arguments to type the matrices in, or add matrix files that
+need not fit in memory: `python matsum.py a.npy b.npy -o sum.npy` (also
+raw binary with --shape/--dtype, or two CSV files; see matrix_stream.py).
+The output extension picks its format (.npy, .csv or raw); by default the
+sum is written as sum.npy, or sum.csv for CSV inputs.
+With --sparse the inputs are Matrix Market coordinate files added as CSR
+(see sparse.py); a .mtx output (the default, sum.mtx) stays sparse,
+anything else is dense.
+"""
+
+import argparse
+import sys
+
+from matrix import save
+from sparse import read_coordinate, write_coordinate
+
+
+def interactive():
+    r1, c1 = map(int, input("Enter the row and column of first matrix: ").split())
+    r2, c2 = map(int, input("Enter the row and column of second matrix: ").split())
+    if r1 != r2 or c1 != c2:
+        print("Matrix addition not possible! "
+              "Both matrices must have the same dimensions.")
+        return
     a = []
     b = []
     result = []  # Renamed from 'sum' to avoid shadowing built-in
@@ -34,3 +54,59 @@ else:
     print("\n--- Result Matrix ---")
     for row in result:
         print(row)
+
+
+def add_sparse(a_path, b_path, out_path, parser):
+    a, b = read_coordinate(a_path), read_coordinate(b_path)
+    try:
+        result = a + b
+    except ValueError as e:
+        parser.exit(1, f"{e}\n")
+    if out_path.endswith(".mtx"):
+        write_coordinate(out_path, result)
+    else:
+        save(out_path, result.to_dense())
+    print(f"sum written to {out_path} ({result.nnz} nonzeros)")
+
+
+def main():
+    if len(sys.argv) == 1:
+        interactive()
+        return
+    # the file modes only: the interactive sum runs anywhere
+    from matrix_stream import add_arguments, add_files, report
+
+    parser = argparse.ArgumentParser(description="matrix summation")
+    parser.add_argument("files", nargs="*", metavar="FILE",
+                        help="two input matrices (.npy, raw binary or .csv)")
+    parser.add_argument("-o", "--output",
+                        help="result file; its extension picks the format "
+                             "(default: sum.csv for CSV inputs, sum.mtx with "
+                             "--sparse, else sum.npy)")
+    parser.add_argument("--sparse", action="store_true",
+                        help="inputs are sparse coordinate (.mtx) files")
+    add_arguments(parser)
+    args = parser.parse_args()
+    if len(args.files) != 2:
+        parser.error("give exactly two matrix files")
+    if args.output is None:
+        if args.sparse:
+            args.output = "sum.mtx"
+        elif all(path.endswith(".csv") for path in args.files):
+            args.output = "sum.csv"
+        else:
+            args.output = "sum.npy"
+    if args.sparse:
+        add_sparse(*args.files, args.output, parser)
+        return
+    try:
+        nbytes, secs = add_files(*args.files, args.output, args.shape,
+                                 args.dtype, args.chunk_mb << 20)
+    except ValueError as e:
+        parser.exit(1, f"{e}\n")
+    print(f"sum written to {args.output}")
+    report(nbytes, secs)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,24 @@
+import math
+
+from primes import cached_sieve, miller_rabin
+
+# Below this, trial division beats a Miller-Rabin round of pow() calls.
+TRIAL_LIMIT = 50_000
+
+
 def check(n):
-    """Check if a number is prime."""
+    """Check if a number is prime, with the fastest test for its size."""
     if n <= 1:
         return False
-    for i in range(2, int(n**0.5) + 1):
-        if n % i == 0:
-            return False
-    return True
+    sieve = cached_sieve()
+    if sieve is not None and n < sieve.limit:
+        return n in sieve
+    if n < TRIAL_LIMIT:
+        for i in range(2, math.isqrt(n) + 1):
+            if n % i == 0:
+                return False
+        return True
+    return miller_rabin(n)
 
 
 def main():
@@ -0,0 +1,321 @@
+"""Prime tests and prime queries backed by a segmented sieve.
+
+The sieve is an odd-only bitset (bit i stands for 2i + 1), built one
+segment at a time with NumPy and cached to disk in CACHE_PATH, so later
+runs only load it. Numbers beyond the sieve use Miller-Rabin, which is
+deterministic below 3.3 * 10**24 (so for every 64-bit input).
+
+Run `python primes.py` for a benchmark.
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+
+import numpy as np
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "primes_cache.npz")
+DEFAULT_LIMIT = 10**8
+SEGMENT = 1 << 21  # odd numbers per sieve segment (a multiple of 8)
+# Sieving primes for ranges too far out for an exact segmented sieve.
+PARTIAL_BASE = 1 << 20
+
+# The first 13 primes as bases make Miller-Rabin exact for n < 3.3e24;
+# below 2**64 these 7 bases (Jim Sinclair's set) are enough.
+MR_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+MR_BASES_64 = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def small_primes(n):
+    """All primes below n as an int64 array (plain odd-only sieve)."""
+    if n <= 2:
+        return np.zeros(0, dtype=np.int64)
+    flags = np.ones(n // 2, dtype=bool)  # flags[i] is 2i + 1
+    flags[0] = False
+    for i in range(1, (math.isqrt(n - 1) - 1) // 2 + 1):
+        if flags[i]:
+            p = 2 * i + 1
+            flags[p * p // 2::p] = False
+    return np.concatenate(([2], 2 * np.flatnonzero(flags) + 1)).astype(np.int64)
+
+
+def _odd_segment(lo, hi, base):
+    """Flags for the odd numbers lo, lo + 2, ... below hi (lo odd), crossed
+    off by the primes in base; exact when base holds every prime up to
+    sqrt(hi)."""
+    size = (hi - lo + 1) // 2
+    flags = np.ones(size, dtype=bool)
+    base = base[(base > 2) & (base <= math.isqrt(hi - 1))]
+    for p in base[base < size].tolist():
+        start = max(p * p, -(-lo // p) * p)
+        if start % 2 == 0:
+            start += p
+        flags[(start - lo) // 2::p] = False
+    # primes at least as long as the segment hit it at most once
+    big = base[base >= size]
+    if len(big):
+        # offsets from lo, so nothing overflows near 2**63 (lo is odd)
+        offset = np.maximum(big * big - lo, -lo % big)
+        offset += np.where(offset % 2 == 1, big, 0)
+        index = offset // 2
+        flags[index[index < size]] = False
+    if lo == 1 and size:
+        flags[0] = False
+    return flags
+
+
+class Sieve:
+    """Primality of every number below limit, as a packed odd-only bitset."""
+
+    def __init__(self, limit, bits):
+        self.limit = limit
+        self.bits = bits
+
+    @classmethod
+    def build(cls, limit):
+        limit += -limit % (2 * SEGMENT)  # whole segments only
+        base = small_primes(math.isqrt(limit) + 1)
+        chunks = []
+        for lo in range(1, limit, 2 * SEGMENT):
+            flags = _odd_segment(lo, lo + 2 * SEGMENT, base)
+            chunks.append(np.packbits(flags, bitorder="little"))
+        return cls(limit, np.concatenate(chunks))
+
+    @classmethod
+    def load(cls, path=CACHE_PATH):
+        with np.load(path) as data:
+            return cls(int(data["limit"]), data["bits"])
+
+    def save(self, path=CACHE_PATH):
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, limit=self.limit, bits=self.bits)
+        os.replace(tmp, path)
+
+    def __contains__(self, n):
+        """Scalar lookup: `n in sieve` for one int 0 <= n < limit."""
+        return n == 2 or bool(n & 1 and (self.bits[n >> 4] >> ((n >> 1) & 7)) & 1)
+
+    def contains(self, n):
+        """Primality of each n (0 <= n < limit) as a bool array."""
+        n = np.asarray(n, dtype=np.int64)
+        i = n >> 1
+        bit = (self.bits[i >> 3] >> (i & 7).astype(np.uint8)) & 1
+        return (n == 2) | ((n & 1).astype(bool) & bit.astype(bool))
+
+    def primes(self, lo, hi):
+        """Primes in [lo, hi), hi <= limit."""
+        lo, hi = max(lo, 0), min(hi, self.limit)
+        if lo >= hi:
+            return np.zeros(0, dtype=np.int64)
+        first, last = lo // 2, (hi + 1) // 2  # odd indices covering [lo, hi)
+        byte_lo, byte_hi = first >> 3, (last + 7) >> 3
+        flags = np.unpackbits(self.bits[byte_lo:byte_hi], bitorder="little")
+        offset = first - 8 * byte_lo
+        flags = flags[offset:offset + last - first]
+        odd = 2 * (np.flatnonzero(flags) + first) + 1
+        odd = odd[(odd >= lo) & (odd < hi)]
+        return np.concatenate(([2], odd)) if lo <= 2 < hi else odd
+
+    def nth_odd_prime(self, k):
+        """The kth odd prime (k >= 1), or None if it is not below limit."""
+        block = 1 << 12
+        counts = POPCOUNT[self.bits].astype(np.int64)
+        pad = -len(counts) % block
+        sums = np.cumsum(np.pad(counts, (0, pad)).reshape(-1, block).sum(1))
+        b = int(np.searchsorted(sums, k))
+        if b == len(sums):
+            return None
+        before = int(sums[b - 1]) if b else 0
+        flags = np.unpackbits(self.bits[b * block:(b + 1) * block],
+                              bitorder="little")
+        i = int(np.flatnonzero(flags)[k - before - 1]) + 8 * b * block
+        return 2 * i + 1
+
+
+_sieve = None
+
+
+def get_sieve(limit=DEFAULT_LIMIT, path=CACHE_PATH):
+    """The shared sieve, covering at least limit: loaded from the cache file
+    when it is big enough, otherwise built (at least doubling) and saved."""
+    global _sieve
+    if _sieve is None and path and os.path.exists(path):
+        _sieve = Sieve.load(path)
+    if _sieve is None or _sieve.limit < limit:
+        if _sieve is not None:
+            limit = max(limit, 2 * _sieve.limit)
+        _sieve = Sieve.build(limit)
+        if path:
+            _sieve.save(path)
+    return _sieve
+
+
+def cached_sieve(path=CACHE_PATH):
+    """The shared sieve if it is loaded or cached on disk, without building
+    one; None otherwise."""
+    global _sieve
+    if _sieve is None and os.path.exists(path):
+        _sieve = Sieve.load(path)
+    return _sieve
+
+
+def miller_rabin(n):
+    """Miller-Rabin: exact below 3.3e24 and a (very) probable prime test
+    above."""
+    if n < 2:
+        return False
+    for p in MR_BASES:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in MR_BASES_64 if n < 1 << 64 else MR_BASES:
+        x = pow(a, d, n)
+        if x <= 1 or x == n - 1:  # x == 0: a is a multiple of n
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def is_prime(values):
+    """Primality of each value in an int array (bool array of the same
+    shape): a sieve lookup below the sieve limit, Miller-Rabin above."""
+    values = np.asarray(values)
+    flat = values.ravel()
+    result = np.zeros(flat.shape, dtype=bool)
+    sieve = get_sieve()
+    small = (flat >= 0) & (flat < sieve.limit)
+    result[small] = sieve.contains(flat[small].astype(np.int64))
+    big = np.flatnonzero(~small & (flat > 0))
+    if len(big):
+        rest = flat[big]
+        # cheap vectorised trial division first; only survivors need pow()
+        maybe = np.ones(len(big), dtype=bool)
+        for p in MR_BASES:
+            maybe &= rest % p != 0
+        result[big[maybe]] = [miller_rabin(int(n)) for n in rest[maybe]]
+    return result.reshape(values.shape)
+
+
+def primes_in_range(lo, hi):
+    """Primes in [lo, hi) as an int64 array (hi <= 2**63).
+
+    Below the sieve limit this reads the bitset. Above it the range is
+    sieved in segments; when sqrt(hi) is past the sieve too, the segments
+    are only sieved by primes below PARTIAL_BASE and the survivors are
+    confirmed with Miller-Rabin.
+    """
+    if hi > 1 << 63:
+        raise ValueError("hi must be at most 2**63")
+    if hi <= lo:
+        return np.zeros(0, dtype=np.int64)
+    sieve = get_sieve()
+    if hi <= sieve.limit:
+        return sieve.primes(lo, hi)
+    root = math.isqrt(hi - 1) + 1
+    exact = root <= sieve.limit
+    base = sieve.primes(0, root if exact else PARTIAL_BASE)
+    found = [sieve.primes(lo, sieve.limit)] if lo < sieve.limit else []
+    start = max(lo, sieve.limit) | 1
+    for seg in range(start, hi, 2 * SEGMENT):
+        flags = _odd_segment(seg, min(seg + 2 * SEGMENT, hi), base)
+        odd = seg + 2 * np.flatnonzero(flags).astype(np.int64)
+        if not exact:
+            odd = odd[[miller_rabin(int(n)) for n in odd]]
+        found.append(odd)
+    return np.concatenate(found)
+
+
+def nth_prime(n):
+    """The nth prime, counting 2 as the first."""
+    if n < 1:
+        raise ValueError("n must be at least 1")
+    if n == 1:
+        return 2
+    # p_n < n (ln n + ln ln n) for n >= 6
+    bound = int(n * (math.log(n) + math.log(math.log(n)))) + 16 if n >= 6 else 16
+    p = get_sieve(min(DEFAULT_LIMIT, bound)).nth_odd_prime(n - 1)
+    if p is None:
+        p = get_sieve(bound).nth_odd_prime(n - 1)
+    return p
+
+
+def _trial_division(n):
+    if n <= 1:
+        return False
+    for i in range(2, math.isqrt(n) + 1):
+        if n % i == 0:
+            return False
+    return True
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - start
+
+
+def benchmark(limit=DEFAULT_LIMIT, count=10**6, seed=0):
+    global _sieve
+    cached = os.path.exists(CACHE_PATH)
+    sieve, secs = _timed(get_sieve, limit)
+    how = "loaded from cache" if cached and sieve.limit >= limit else "built"
+    print(f"sieve to {sieve.limit:,} {how} in {secs:.2f}s "
+          f"({sieve.bits.nbytes / 2**20:.1f} MiB)")
+    _sieve = None
+    _, secs = _timed(get_sieve, limit)
+    print(f"reloaded from {os.path.basename(CACHE_PATH)} in {secs * 1000:.0f} ms")
+
+    rng = np.random.default_rng(seed)
+    values = rng.integers(0, sieve.limit, count)
+    flags, secs = _timed(is_prime, values)
+    print(f"is_prime on {count:,} numbers below the limit: "
+          f"{count / secs:,.0f}/s")
+    sample = values[:2000].tolist()
+    _, secs = _timed(lambda: [_trial_division(n) for n in sample])
+    print(f"trial division on the same numbers: {len(sample) / secs:,.0f}/s")
+    assert [_trial_division(n) for n in sample[:200]] == flags[:200].tolist()
+
+    big = rng.integers(1 << 62, (1 << 63) - 1, count // 10, dtype=np.int64)
+    flags, secs = _timed(is_prime, big)
+    print(f"is_prime on {len(big):,} 63-bit numbers (Miller-Rabin): "
+          f"{len(big) / secs:,.0f}/s, {int(flags.sum())} primes")
+
+    lo = 10**18
+    found, secs = _timed(primes_in_range, lo, lo + 10**6)
+    print(f"primes_in_range(1e18, 1e18 + 1e6): {len(found)} primes in "
+          f"{secs * 1000:.0f} ms")
+    assert all(miller_rabin(int(p)) for p in found[:100])
+
+    p, secs = _timed(nth_prime, 10**6)
+    print(f"nth_prime(10**6) = {p} in {secs * 1000:.0f} ms")
+    assert p == 15_485_863
+    check = random.Random(seed).randrange(2, 10**5)
+    assert sieve.primes(0, check).tolist() == [
+        n for n in range(check) if _trial_division(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="prime sieve benchmark")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT,
+                        help="sieve limit (cached in primes_cache.npz)")
+    parser.add_argument("--count", type=int, default=10**6,
+                        help="numbers per batch test")
+    args = parser.parse_args()
+    benchmark(args.limit, args.count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Durable append-only balance ledger for the slot server
+
+Description:
+  - Every balance change (deposit, spin, cashout) is one JSON line with a
+    sequence number and the player's balance after it, appended to a log
+    segment (log.<first seq>.jsonl) in the ledger directory.
+  - Group commit: append() queues a record and returns a future; one
+    committer task writes everything queued since its last write with a
+    single write() + fsync(), then resolves all of those futures. While one
+    fsync runs, the next batch builds up, so throughput grows with load.
+  - Every snapshot_every records the committed balances are written to
+    snapshot.json (temp file, fsync, rename) and the log rotates to a new
+    segment; segments the snapshot covers are deleted.
+  - On open, the snapshot is loaded and newer log records are replayed. A
+    torn last line (crash mid-write) was never acknowledged, so it is cut.
+  - If a write, fsync or snapshot fails (ENOSPC, EIO, ...) the ledger stops:
+    every queued future gets the error, later append() calls raise at
+    once and close() re-raises it. Nothing after the failure is committed.
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+
+SNAPSHOT = "snapshot.json"
+
+
+class Ledger:
+    def __init__(self, path, snapshot_every=10_000):
+        self.path = path
+        self.snapshot_every = snapshot_every
+        os.makedirs(path, exist_ok=True)
+        self.balances = {}   # committed balances
+        self.seq = 0         # last sequence number handed out
+        self.committed = 0   # last sequence number on disk
+        self.pending = []
+        self.records = 0
+        self.commits = 0
+        self.latencies = deque(maxlen=100_000)
+        self._since_snapshot = 0
+        self._wakeup = None
+        self._task = None
+        self.error = None    # the write error that stopped the committer
+        self._recover()
+        self._open_segment(self.seq + 1)
+
+    # ----- files -----
+
+    def _segments(self):
+        segments = []
+        for name in os.listdir(self.path):
+            if name.startswith("log.") and name.endswith(".jsonl"):
+                segments.append((int(name.split(".")[1]),
+                                 os.path.join(self.path, name)))
+        return sorted(segments)
+
+    def _recover(self):
+        snapshot = os.path.join(self.path, SNAPSHOT)
+        if os.path.exists(snapshot):
+            with open(snapshot) as f:
+                state = json.load(f)
+            self.balances = state["balances"]
+            self.seq = state["seq"]
+        for _, segment in self._segments():
+            with open(segment, "rb+") as f:
+                offset = 0
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("torn record")
+                        record = json.loads(line)
+                    except ValueError:
+                        f.truncate(offset)
+                        break
+                    offset += len(line)
+                    if record["seq"] > self.seq:
+                        self.balances[record["player"]] = record["balance"]
+                        self.seq = record["seq"]
+        self.committed = self.seq
+
+    def _open_segment(self, first):
+        name = os.path.join(self.path, f"log.{first}.jsonl")
+        self.file = open(name, "ab")
+
+    def _write(self, data):
+        self.file.write(data)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def _snapshot(self, balances, seq):
+        tmp = os.path.join(self.path, SNAPSHOT + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"seq": seq, "balances": balances}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.path, SNAPSHOT))
+        self.file.close()
+        self._open_segment(seq + 1)
+        current = self.file.name
+        for _, segment in self._segments():
+            if segment != current:
+                os.remove(segment)
+        # make the rename and the deletions durable
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    # ----- group commit -----
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._committer())
+
+    def append(self, player, balance, **fields):
+        """Queue a record; the returned future resolves once it is on disk,
+        or gets the error if the write fails."""
+        if self.error is not None:
+            raise RuntimeError(f"ledger stopped after a failed write: "
+                               f"{self.error}") from self.error
+        self.seq += 1
+        record = {"seq": self.seq, "player": player, "balance": balance,
+                  **fields}
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((record, future, time.perf_counter()))
+        self._wakeup.set()
+        return future
+
+    async def _committer(self):
+        batch = []
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                if not self.pending:
+                    continue
+                batch, self.pending = self.pending, []
+                data = b"".join(json.dumps(record).encode() + b"\n"
+                                for record, _, _ in batch)
+                await asyncio.to_thread(self._write, data)
+                now = time.perf_counter()
+                for record, future, queued in batch:
+                    self.balances[record["player"]] = record["balance"]
+                    self.latencies.append(now - queued)
+                    if not future.done():
+                        future.set_result(record["seq"])
+                self.committed = batch[-1][0]["seq"]
+                self.records += len(batch)
+                self.commits += 1
+                self._since_snapshot += len(batch)
+                batch = []
+                if self._since_snapshot >= self.snapshot_every:
+                    self._since_snapshot = 0
+                    await asyncio.to_thread(self._snapshot,
+                                            dict(self.balances), self.committed)
+        except Exception as e:
+            # fail the batch being written and everything queued behind it
+            self.error = e
+            failed, self.pending = batch + self.pending, []
+            for _, future, _ in failed:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def close(self):
+        """Commit everything queued, then stop the committer. Raises the
+        write error if the ledger failed."""
+        while self.committed < self.seq and self.error is None:
+            self._wakeup.set()
+            await asyncio.sleep(0.001)
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self.file.close()
+        if self.error is not None:
+            raise self.error
+
+    def stats(self):
+        lat = sorted(self.latencies)
+
+        def pct(p):
+            return lat[min(len(lat) - 1, int(p * len(lat)))] * 1000 if lat else 0
+
+        return {"records": self.records, "commits": self.commits,
+                "batch_mean": self.records / self.commits if self.commits else 0,
+                "commit_ms_p50": pct(0.50), "commit_ms_p99": pct(0.99)}
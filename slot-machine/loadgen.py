@@ -0,0 +1,122 @@
+"""
+Load generator for server.py
+
+Run:
+  - python loadgen.py                           (in-process server, temp ledger)
+  - python loadgen.py --players 5000 --spins 20
+  - python loadgen.py --port 8765               (against a running server.py)
+
+Description:
+  - Every simulated player opens its own connection, deposits, spins
+    --spins times (bet and lines picked at random) and cashes out; all
+    players run at once on one asyncio loop.
+  - Reports spins/s, client-side request latency and the server's ledger
+    stats: records, fsync commits, mean group-commit batch size and commit
+    latency (queued to on disk).
+  - Without --port a server is started in this process on a temporary
+    ledger; afterwards the ledger is reopened from disk and its recovered
+    balances are checked against the server's.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import resource
+import tempfile
+import time
+
+from ledger import Ledger
+from main import MAX_LINES
+from server import start_server
+
+
+async def request(reader, writer, **req):
+    writer.write(json.dumps(req).encode() + b"\n")
+    await writer.drain()
+    reply = json.loads(await reader.readline())
+    if not reply["ok"]:
+        raise RuntimeError(reply["error"])
+    return reply
+
+
+async def player(name, host, port, spins, rng, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        await request(reader, writer, op="deposit", player=name, amount=1000)
+        for _ in range(spins):
+            start = time.perf_counter()
+            await request(reader, writer, op="spin", player=name,
+                          bet=rng.randint(1, 10),
+                          lines=rng.randint(1, MAX_LINES))
+            latencies.append(time.perf_counter() - start)
+        await request(reader, writer, op="cashout", player=name)
+    finally:
+        writer.close()
+
+
+async def run(args):
+    # one socket per player on each side of the connection
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    want = min(hard, max(soft, 2 * args.players + 64))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (want, hard))
+
+    server = slots = tmp = None
+    host, port = args.host, args.port
+    if port is None:
+        tmp = tempfile.TemporaryDirectory()
+        server, slots = await start_server(tmp.name, host, 0,
+                                           args.snapshot_every)
+        port = server.sockets[0].getsockname()[1]
+
+    rng = random.Random(args.seed)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(player(f"p{i}", host, port, args.spins,
+                                  random.Random(rng.random()), latencies)
+                           for i in range(args.players)))
+    secs = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    stats = await request(reader, writer, op="stats")
+    writer.close()
+
+    latencies.sort()
+    n = len(latencies)
+    print(f"{args.players} players, {n} spins in {secs:.2f}s: "
+          f"{n / secs:,.0f} spins/s")
+    print(f"request latency: p50 {latencies[n // 2] * 1000:.2f} ms, "
+          f"p99 {latencies[int(n * 0.99)] * 1000:.2f} ms")
+    print(f"ledger: {stats['records']} records in {stats['commits']} "
+          f"commits ({stats['batch_mean']:.1f} per fsync), commit latency "
+          f"p50 {stats['commit_ms_p50']:.2f} ms, "
+          f"p99 {stats['commit_ms_p99']:.2f} ms")
+
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+        await slots.ledger.close()
+        reopened = Ledger(tmp.name)
+        recovered = reopened.balances
+        await reopened.close()
+        assert recovered == slots.balances, "recovered ledger differs"
+        print(f"recovery check: {len(recovered)} balances match")
+        tmp.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="slot server load test")
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--spins", type=int, default=10,
+                        help="spins per player")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None,
+                        help="server port (default: start one in-process)")
+    parser.add_argument("--snapshot-every", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
-import random
-import time
+import asyncio
+import os
+import sys
+
+from paylines import Paylines, column_lines, pay_dict, wild_symbol
+from reels import Reels
+from terminal import TerminalRenderer, slot_frame
 
 MAX_LINES = 3
 MAX_BET = 100
@@ -19,61 +24,69 @@ symbol_config = {
 }
 
 symbols = list(symbol_config.keys())
+symbol_values = {s: symbol_config[s]["value"] for s in symbols}
+reels = Reels.from_config(symbol_config, COLS)
+# scored exactly like rtp_sim.py/rtp_exact.py: wilds plus full and partial runs
+paylines = Paylines(column_lines(ROWS, COLS), ROWS, COLS,
+                    wild=wild_symbol(symbol_config))
+pays = pay_dict(symbol_config, paylines.length)
+symbol_width = max(len(s) for s in symbols)
+renderer = TerminalRenderer()
 
 
-def check_winnings(rows, lines, bet, symbol_values):
+def check_winnings(rows, lines, bet, pays):
     winnings = 0
     winning_lines = []
 
-    for line in range(lines):
-        symbols_in_line = [rows[r][line] for r in range(ROWS)]
-        if len(set(symbols_in_line)) == 1:
-            symbol = symbols_in_line[0]
-            winnings += symbol_values[symbol] * bet
-            winning_lines.append(line + 1)
+    for line, symbol, run in paylines.matches(rows, lines):
+        pay = pays[symbol].get(run, 0)
+        if pay:
+            winnings += pay * bet
+            winning_lines.append(line)
 
     return winnings, winning_lines
 
 
-def spin_animation(rows, cols):
-    symbols_list = list(symbol_config.keys())
-    for _ in range(8):
-        temp_display = []
-        for _ in range(ROWS):
-            row = [random.choice(symbols_list) for _ in range(COLS)]
-            temp_display.append(row)
-        print_slot_machine(temp_display)
-        time.sleep(0.1)
-        print()
+def watch_enter(skip):
+    """Set skip when the player presses ENTER, read without blocking the
+    loop; returns a function that stops watching. Only on a terminal whose
+    event loop can watch stdin (not Windows' proactor loop)."""
+    if not (renderer.tty and sys.stdin.isatty()):
+        return lambda: None
+    loop = asyncio.get_running_loop()
+    fd = sys.stdin.fileno()
+
+    def on_input():
+        os.read(fd, 1024)   # the line just typed, so input() won't see it
+        loop.remove_reader(fd)
+        renderer.echoed()
+        skip.set()
+
+    try:
+        loop.add_reader(fd, on_input)
+    except NotImplementedError:
+        return lambda: None
+    return lambda: loop.remove_reader(fd)
+
+
+async def spin_animation(rows, cols):
+    """Play the spin on the running loop; ENTER skips to the result."""
+    frames = (slot_frame(reels.spin(ROWS), symbol_width) for _ in range(8))
+    skip = asyncio.Event()
+    stop_watching = watch_enter(skip)
+    try:
+        await renderer.animate(frames, slot_frame(rows, symbol_width),
+                               skip=skip)
+    finally:
+        stop_watching()
 
 
 def get_slot_machine_spin(rows, cols):
-    all_symbols = []
-    for symbol, config in symbol_config.items():
-        all_symbols.extend([symbol] * config["count"])
-
-    result = []
-    for _ in range(ROWS):
-        row = random.choices(all_symbols, k=cols)
-        result.append(row)
-
-    return result
+    return reels.spin(ROWS)
 
 
 def print_slot_machine(rows, highlight_lines=None):
-    print(" " + "┌───┬───┬───┐")
-    for r in range(ROWS):
-        line = "│"
-        for c in range(COLS):
-            symbol = rows[r][c]
-            if highlight_lines and r + 1 in highlight_lines:
-                line += f" {symbol} │"
-            else:
-                line += f" {symbol} │"
-        print(" " + line)
-        if r < ROWS - 1:
-            print(" " + "├───┼───┼───┤")
-    print(" " + "└───┴───┘")
+    print(slot_frame(rows, symbol_width))
 
 
 def deposit():
@@ -126,7 +139,9 @@ def get_spin_choice():
         print("Invalid input. Press ENTER to spin or 'q' to quit.")
 
 
-def game():
+async def play():
+    # one event loop for the whole session; the prompts below are plain
+    # input() calls, made only while no animation task is running
     balance = deposit()
 
     while True:
@@ -157,12 +172,10 @@ def game():
         print(f"\nSpinning ${total_bet} ({bet} x {lines} lines)...")
 
         rows = get_slot_machine_spin(ROWS, COLS)
-        spin_animation(rows, COLS)
-
-        print_slot_machine(rows)
-
-        symbol_values = {s: symbol_config[s]["value"] for s in symbols}
-        winnings, winning_lines = check_winnings(rows, lines, bet, symbol_values)
+        animation = asyncio.create_task(spin_animation(rows, COLS))
+        # the outcome is already decided: score it while the reels turn
+        winnings, winning_lines = check_winnings(rows, lines, bet, pays)
+        await animation
 
         if winnings > 0:
             balance += winnings
@@ -176,6 +189,10 @@ def game():
         print(f"New balance: ${balance}")
 
 
+def game():
+    asyncio.run(play())
+
+
 if __name__ == "__main__":
     game()
 
@@ -0,0 +1,199 @@
+"""
+Configurable paylines for the slot machine
+
+Run:
+  - python paylines.py                    (benchmark: 5x3 grid, 25 lines)
+  - python paylines.py --spins 200000 --lines 20
+
+Description:
+  - A payline is either one row index per column, e.g. [0, 1, 2, 1, 0] for
+    a V, or an explicit list of (row, col) cells, e.g. main.py's vertical
+    lines [(0, c), (1, c), (2, c)]. Paylines compiles every line once into
+    flat indices over the row-major grid (cell (r, c) is r * cols + c).
+  - Lines are scored left-aligned: the line's symbol is its first non-wild
+    symbol, and the run is how many leading cells show that symbol or a
+    wild. A run of only wilds counts as the wild symbol itself.
+  - matches() does this in pure Python for one grid (used by the game);
+    runs() and evaluate() do it with NumPy for many spins and lines at
+    once (used by the simulators and the benchmark).
+  - Pay tables come from symbol_config: "value" pays a full line, and an
+    optional "pays": {"3": 5, "4": 20, "5": 50} pays partial runs. A
+    symbol with "wild": true substitutes for every other symbol.
+"""
+
+import argparse
+import time
+
+# Common 5x3 video slot lines (row per reel, 0 = top row)
+LINES_5X3 = [
+    [1, 1, 1, 1, 1], [0, 0, 0, 0, 0], [2, 2, 2, 2, 2], [0, 1, 2, 1, 0],
+    [2, 1, 0, 1, 2], [0, 0, 1, 2, 2], [2, 2, 1, 0, 0], [1, 0, 1, 2, 1],
+    [1, 2, 1, 0, 1], [0, 1, 1, 1, 0], [2, 1, 1, 1, 2], [1, 0, 0, 0, 1],
+    [1, 2, 2, 2, 1], [0, 1, 0, 1, 0], [2, 1, 2, 1, 2], [1, 1, 0, 1, 1],
+    [1, 1, 2, 1, 1], [0, 0, 2, 0, 0], [2, 2, 0, 2, 2], [0, 2, 2, 2, 0],
+    [2, 0, 0, 0, 2], [1, 0, 2, 0, 1], [1, 2, 0, 2, 1], [0, 2, 0, 2, 0],
+    [2, 0, 2, 0, 2],
+]
+
+
+def column_lines(rows, cols):
+    """main.py's lines: line c is column c read top to bottom."""
+    return [[(r, c) for r in range(rows)] for c in range(cols)]
+
+
+class Paylines:
+    def __init__(self, lines, rows, cols, wild=None):
+        self.rows = rows
+        self.cols = cols
+        self.wild = wild
+        self.cells = []
+        for line in lines:
+            if all(isinstance(cell, int) for cell in line):
+                line = [(r, c) for c, r in enumerate(line)]
+            for r, c in line:
+                if not (0 <= r < rows and 0 <= c < cols):
+                    raise ValueError(f"cell {(r, c)} is outside the "
+                                     f"{rows}x{cols} grid")
+            self.cells.append(tuple(r * cols + c for r, c in line))
+        self.length = len(self.cells[0])
+        if any(len(cells) != self.length for cells in self.cells):
+            raise ValueError("all paylines must have the same length")
+        self._index = None
+
+    def __len__(self):
+        return len(self.cells)
+
+    def matches(self, grid, lines=None):
+        """Yield (line number, symbol, run length) for the first lines of a
+        grid given as a list of rows."""
+        flat = [symbol for row in grid for symbol in row]
+        wild = self.wild
+        for n, cells in enumerate(self.cells[:lines], 1):
+            target = wild
+            run = 0
+            for i in cells:
+                symbol = flat[i]
+                if symbol == wild or target == wild or symbol == target:
+                    if symbol != wild:
+                        target = symbol
+                    run += 1
+                else:
+                    break
+            yield n, target, run
+
+    def runs(self, grids, lines=None):
+        """(symbol, run length) arrays of shape (spins, lines) for a
+        (spins, rows, cols) array of symbol indices."""
+        import numpy as np
+        if self._index is None:
+            self._index = np.array(self.cells, dtype=np.intp)
+        index = self._index[:lines]
+        sym = grids.reshape(len(grids), -1)[:, index]   # (spins, lines, len)
+        if self.wild is None:
+            target = sym[:, :, 0]
+            match = sym == target[:, :, None]
+        else:
+            is_wild = sym == self.wild
+            first = (~is_wild).argmax(axis=2)
+            target = np.take_along_axis(sym, first[:, :, None], axis=2)[:, :, 0]
+            # all-wild lines have argmax 0, which is a wild: target stays wild
+            match = (sym == target[:, :, None]) | is_wild
+        run = np.where(match.all(axis=2), self.length, match.argmin(axis=2))
+        return target, run
+
+    def evaluate(self, grids, pays, lines=None, bet=1):
+        """(spins, lines) payouts; pays[symbol, run] is a pay_table()."""
+        target, run = self.runs(grids, lines)
+        return pays[target, run] * bet
+
+
+def pay_dict(config, length):
+    """{symbol: {run length: pay}} from a symbol_config."""
+    table = {}
+    for symbol, c in config.items():
+        pays = {int(n): v for n, v in c.get("pays", {}).items()}
+        pays.setdefault(length, c["value"])
+        table[symbol] = pays
+    return table
+
+
+def pay_table(config, symbols, length):
+    """pay_dict() as a (symbols, length + 1) NumPy array indexed by symbol
+    index and run length."""
+    import numpy as np
+    table = pay_dict(config, length)
+    pays = np.zeros((len(symbols), length + 1), dtype=np.int64)
+    for i, symbol in enumerate(symbols):
+        for n, v in table[symbol].items():
+            pays[i, n] = v
+    return pays
+
+
+def wild_symbol(config):
+    wilds = [symbol for symbol, c in config.items() if c.get("wild")]
+    if len(wilds) > 1:
+        raise ValueError("only one wild symbol is supported")
+    return wilds[0] if wilds else None
+
+
+# ----- benchmark -----
+
+DEMO_CONFIG = {
+    "W": {"count": 2, "value": 100, "pays": {"3": 20, "4": 50}, "wild": True},
+    "7": {"count": 3, "value": 50, "pays": {"3": 10, "4": 25}},
+    "A": {"count": 5, "value": 25, "pays": {"3": 5, "4": 10}},
+    "K": {"count": 6, "value": 15, "pays": {"3": 3, "4": 6}},
+    "Q": {"count": 8, "value": 10, "pays": {"3": 2, "4": 4}},
+    "J": {"count": 9, "value": 8, "pays": {"3": 1, "4": 3}},
+    "10": {"count": 10, "value": 5, "pays": {"3": 1, "4": 2}},
+}
+
+
+def benchmark(spins, n_lines, seed=0, check=2000):
+    import numpy as np
+    from reels import Reels
+
+    rows, cols = 3, 5
+    reels = Reels.from_config(DEMO_CONFIG, cols)
+    symbols = reels.symbols
+    wild = wild_symbol(DEMO_CONFIG)
+    lines = Paylines(LINES_5X3[:n_lines], rows, cols, symbols.index(wild))
+    pays = pay_table(DEMO_CONFIG, symbols, lines.length)
+    grids = reels.spin_array(spins, rows, np.random.default_rng(seed))
+
+    start = time.perf_counter()
+    payout = lines.evaluate(grids, pays)
+    vec = time.perf_counter() - start
+
+    # the pure-Python path on the same spins must agree
+    py_lines = Paylines(LINES_5X3[:n_lines], rows, cols, wild)
+    table = pay_dict(DEMO_CONFIG, py_lines.length)
+    check = min(check, spins)
+    start = time.perf_counter()
+    for s in range(check):
+        grid = [[symbols[i] for i in row] for row in grids[s]]
+        got = [table[symbol].get(run, 0)
+               for _, symbol, run in py_lines.matches(grid)]
+        assert got == payout[s].tolist(), f"spin {s}: {got}"
+    py = time.perf_counter() - start
+
+    rtp = payout.sum() / (spins * n_lines)
+    print(f"{rows}x{cols} grid, {n_lines} lines, RTP {rtp:.2%}")
+    print(f"NumPy:  {spins / vec:>12,.0f} spins/s "
+          f"({spins * n_lines / vec:,.0f} lines/s)")
+    print(f"Python: {check / py:>12,.0f} spins/s "
+          f"({check * n_lines / py:,.0f} lines/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="payline benchmark")
+    parser.add_argument("--spins", type=int, default=1_000_000)
+    parser.add_argument("--lines", type=int, default=len(LINES_5X3),
+                        help=f"paylines to score (at most {len(LINES_5X3)})")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    benchmark(args.spins, min(args.lines, len(LINES_5X3)), args.seed)
+
+
+if __name__ == "__main__":
+    main()
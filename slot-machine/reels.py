@@ -0,0 +1,129 @@
+"""
+Reel strips for the slot machine, compiled once from a symbol config
+
+Description:
+  - A ReelStrip turns {symbol: count} weights into a cumulative-weight array
+    (for random.choices, used by the game) and, for batched NumPy draws in
+    the simulators, a lookup table with one slot per unit of count (one
+    random integer per cell) or, for large or fractional weights, a Vose
+    alias table. All of them are built once.
+  - Reels holds one strip per column, so each reel can have its own symbol
+    weights as on a real machine. In symbol_config a symbol's "count" is
+    used for every reel; "counts": [c1, c2, ...] gives one count per reel.
+  - A draw from the cumulative array maps random() to the same symbol that
+    random.choices(all_symbols) would, so the odds are exactly the counts.
+"""
+
+import random
+from itertools import accumulate
+
+MAX_SLOTS = 1 << 16
+
+
+class ReelStrip:
+    def __init__(self, weights):
+        # weights: {symbol: count}; zero counts are allowed
+        self.symbols = list(weights)
+        self.weights = [weights[s] for s in self.symbols]
+        self.cum_weights = list(accumulate(self.weights))
+        self.total = self.cum_weights[-1]
+        if self.total <= 0:
+            raise ValueError("a reel needs at least one symbol with count > 0")
+        self.prob, self.alias = self._alias_table()
+        # symbol index per unit of count: a uniform slot is an exact draw
+        self.slots = None
+        if all(isinstance(w, int) for w in self.weights) and \
+                self.total <= MAX_SLOTS:
+            self.slots = [i for i, w in enumerate(self.weights)
+                          for _ in range(w)]
+
+    def _alias_table(self):
+        # Vose's alias method: column i keeps i with probability prob[i] and
+        # otherwise gives alias[i]
+        n = len(self.weights)
+        scaled = [w * n / self.total for w in self.weights]
+        prob = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            g = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = g
+            scaled[g] -= 1.0 - scaled[s]
+            (small if scaled[g] < 1.0 else large).append(g)
+        return prob, alias
+
+    def probability(self, symbol):
+        return self.weights[self.symbols.index(symbol)] / self.total
+
+    def draw(self, k=1, rng=random):
+        """k symbols drawn with replacement, weighted by count."""
+        return rng.choices(self.symbols, cum_weights=self.cum_weights, k=k)
+
+
+class Reels:
+    def __init__(self, strips, values):
+        self.strips = strips
+        self.values = values  # {symbol: value}
+        self.symbols = strips[0].symbols
+        if any(strip.symbols != self.symbols for strip in strips):
+            raise ValueError("all reels must list the same symbols")
+        self._tables = None
+
+    @classmethod
+    def from_config(cls, config, cols):
+        strips = []
+        for reel in range(cols):
+            weights = {}
+            for symbol, c in config.items():
+                counts = c.get("counts")
+                weights[symbol] = counts[reel] if counts else c["count"]
+            strips.append(ReelStrip(weights))
+        values = {symbol: c["value"] for symbol, c in config.items()}
+        return cls(strips, values)
+
+    @property
+    def cols(self):
+        return len(self.strips)
+
+    def spin(self, rows, rng=random):
+        """A rows x cols grid (list of rows); column c comes from reel c."""
+        columns = [strip.draw(rows, rng) for strip in self.strips]
+        return [[column[r] for column in columns] for r in range(rows)]
+
+    def spin_array(self, spins, rows, rng):
+        """(spins, rows, cols) array of symbol indices; rng is a numpy
+        Generator."""
+        import numpy as np
+        shape = (spins, rows, self.cols)
+        reel = np.arange(self.cols)
+        if all(strip.slots is not None for strip in self.strips):
+            if self._tables is None:
+                if all(s.slots == self.strips[0].slots for s in self.strips):
+                    # identical reels: one flat table and a scalar bound
+                    self._tables = (np.array(self.strips[0].slots),
+                                    self.strips[0].total)
+                else:
+                    width = max(strip.total for strip in self.strips)
+                    slots = np.zeros((self.cols, width), dtype=np.intp)
+                    for c, strip in enumerate(self.strips):
+                        slots[c, :strip.total] = strip.slots
+                    totals = np.array([strip.total for strip in self.strips])
+                    self._tables = slots, totals
+            slots, high = self._tables
+            idx = rng.integers(0, high, size=shape, dtype=np.int32)
+            return slots[idx] if slots.ndim == 1 else slots[reel, idx]
+        if self._tables is None:
+            self._tables = (np.array([s.prob for s in self.strips]),
+                            np.array([s.alias for s in self.strips]))
+        prob, alias = self._tables
+        idx = rng.integers(0, len(self.symbols), size=shape, dtype=np.intp)
+        keep = rng.random(shape) < prob[reel, idx]
+        return np.where(keep, idx, alias[reel, idx])
+
+    def value_array(self):
+        """Value of each symbol index, for use with spin_array()."""
+        import numpy as np
+        return np.array([self.values[s] for s in self.symbols], dtype=np.int64)
@@ -0,0 +1,122 @@
+"""
+Exact RTP and payout distribution for main.py
+
+Run:
+  - python rtp_exact.py                        (main.py's paytable and grid)
+  - python rtp_exact.py --rows 4 --cols 5 --lines 5
+  - python rtp_exact.py --config paytable.json --distribution
+  - python rtp_exact.py --compare 10000000     (check against rtp_sim.py)
+
+Description:
+  - Every cell is an independent draw from its reel's strip (reels.py), so
+    a line (rows[r][i] for every row, as in check_winnings(), all on reel i)
+    shows symbol s in every row with probability p_s ** ROWS, where p_s is
+    the symbol's count / total on that reel.
+  - Lines use disjoint cells, so the payout of L lines is the convolution of
+    L single-line distributions. Probabilities are kept as Fractions, so the
+    distribution, RTP and variance are exact.
+  - --config takes a JSON file in symbol_config's format:
+    {"7": {"count": 1, "value": 10}, ...}, with "counts": [...] in place of
+    "count" for per-reel weights.
+"""
+
+import argparse
+import json
+from fractions import Fraction
+
+from main import COLS, MAX_LINES, ROWS, symbol_config
+from reels import Reels
+
+
+def line_distribution(strip, values, rows=ROWS):
+    """{payout: probability} of one line, drawn from one reel strip, for a
+    bet of 1."""
+    dist = {}
+    for symbol, count in zip(strip.symbols, strip.weights):
+        p = Fraction(count, strip.total) ** rows
+        dist[values[symbol]] = dist.get(values[symbol], 0) + p
+    dist[0] = dist.get(0, 0) + 1 - sum(dist.values())
+    return dist
+
+
+def convolve(a, b):
+    """Distribution of the sum of two independent payouts."""
+    out = {}
+    for x, px in a.items():
+        for y, py in b.items():
+            out[x + y] = out.get(x + y, 0) + px * py
+    return out
+
+
+def payout_distributions(reels, rows=ROWS, lines=MAX_LINES):
+    """Payout distributions for 1 .. lines lines; line i is reel i."""
+    dists = []
+    for strip in reels.strips[:lines]:
+        line = line_distribution(strip, reels.values, rows)
+        dists.append(convolve(dists[-1], line) if dists else line)
+    return dists
+
+
+def stats(dist, lines):
+    """(RTP, hit frequency, variance of the per-spin return) for a
+    distribution of payouts on a stake of lines."""
+    mean = sum(x * p for x, p in dist.items())
+    second = sum(x * x * p for x, p in dist.items())
+    hit = 1 - dist.get(0, 0)
+    return mean / lines, hit, (second - mean * mean) / (lines * lines)
+
+
+def report(dists, show_distribution=False):
+    print(f"{'lines':>5} {'RTP':>9} {'hit freq':>9} {'variance':>9} "
+          f"{'std dev':>8}")
+    for i, dist in enumerate(dists):
+        rtp, hit, var = stats(dist, i + 1)
+        print(f"{i + 1:>5} {float(rtp):>9.4%} {float(hit):>9.4%} "
+              f"{float(var):>9.5f} {float(var) ** 0.5:>8.4f}")
+    if show_distribution:
+        for i, dist in enumerate(dists):
+            print(f"\n{i + 1} line(s): payout  probability")
+            for x in sorted(dist):
+                print(f"  {x:>6}  {float(dist[x]):.6e}  ({dist[x]})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="exact slot machine RTP")
+    parser.add_argument("--config", help="paytable JSON (symbol_config form)")
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--cols", type=int, default=COLS)
+    parser.add_argument("--lines", type=int, default=None,
+                        help="most lines to bet (default: MAX_LINES, at most "
+                             "--cols)")
+    parser.add_argument("--distribution", action="store_true",
+                        help="print the full payout distributions")
+    parser.add_argument("--compare", type=int, metavar="SPINS", default=0,
+                        help="also run rtp_sim.py with this many spins")
+    args = parser.parse_args()
+
+    config = symbol_config
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+    if any("pays" in c or c.get("wild") for c in config.values()):
+        parser.error("partial pays and wilds are not supported here; "
+                     "use rtp_sim.py")
+    lines = args.lines or min(MAX_LINES, args.cols)
+    if lines > args.cols:
+        parser.error("each line is a column, so --lines must be <= --cols")
+
+    reels = Reels.from_config(config, args.cols)
+    dists = payout_distributions(reels, args.rows, lines)
+    report(dists, args.distribution)
+
+    if args.compare:
+        import rtp_sim
+        n, total, total_sq, hits = rtp_sim.simulate(
+            None, args.compare, config=config, rows=args.rows,
+            cols=args.cols, max_lines=lines)
+        print(f"\nsimulated ({n:,} spins):")
+        rtp_sim.report(n, total, total_sq, hits)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Monte Carlo return-to-player (RTP) simulator for main.py
+
+Run:
+  - python rtp_sim.py                         (10M spins on all cores)
+  - python rtp_sim.py --spins 50000000 --workers 4 --seed 1
+
+Description:
+  - Spins are drawn in NumPy batches of ROWS x COLS grids from the same
+    Reels the game uses (reels.py alias tables), so symbol odds follow
+    symbol_config counts, per reel when "counts" is given.
+  - Lines are scored with paylines.py exactly as check_winnings() does:
+    line i is rows[r][i] for every row and pays symbol value x bet when all
+    of its symbols match (plus any "pays" partial runs and wilds).
+  - Every worker process gets its own stream from one SeedSequence, so
+    results are reproducible for a given --seed and --workers.
+  - For each line count the report gives RTP (paid / staked), hit
+    frequency, the per-spin standard deviation of the return and a 95%
+    confidence interval for the RTP.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from main import COLS, MAX_LINES, ROWS, symbol_config
+from paylines import Paylines, column_lines, pay_table, wild_symbol
+from reels import Reels
+
+Z95 = 1.959964
+
+
+def simulate(seed_seq, spins, batch=1_000_000, config=symbol_config,
+             rows=ROWS, cols=COLS, max_lines=MAX_LINES):
+    """Play spins; return (spins, payout sums, sums of squares, hit counts),
+    each indexed by line count - 1."""
+    rng = np.random.default_rng(seed_seq)
+    reels = Reels.from_config(config, cols)
+    wild = wild_symbol(config)
+    lines = Paylines(column_lines(rows, cols), rows, cols,
+                     None if wild is None else reels.symbols.index(wild))
+    pays = pay_table(config, reels.symbols, lines.length)
+    total = np.zeros(max_lines, dtype=np.int64)
+    total_sq = np.zeros(max_lines, dtype=np.int64)
+    hits = np.zeros(max_lines, dtype=np.int64)
+    done = 0
+    while done < spins:
+        n = min(batch, spins - done)
+        grids = reels.spin_array(n, rows, rng)
+        # payout of a spin on L lines is the sum of lines 1..L
+        payout = np.cumsum(lines.evaluate(grids, pays, max_lines), axis=1)
+        total += payout.sum(axis=0)
+        total_sq += (payout * payout).sum(axis=0)
+        hits += (payout > 0).sum(axis=0)
+        done += n
+    return spins, total, total_sq, hits
+
+
+def _simulate(args):
+    return simulate(*args)
+
+
+def run(spins, workers=None, seed=None, batch=1_000_000):
+    workers = workers or os.cpu_count() or 1
+    streams = np.random.SeedSequence(seed).spawn(workers)
+    shares = [spins // workers + (i < spins % workers) for i in range(workers)]
+    jobs = [(s, n, batch) for s, n in zip(streams, shares)]
+    if workers == 1:
+        results = [_simulate(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_simulate, jobs))
+    n = sum(r[0] for r in results)
+    total = sum(r[1] for r in results)
+    total_sq = sum(r[2] for r in results)
+    hits = sum(r[3] for r in results)
+    return n, total, total_sq, hits
+
+
+def report(n, total, total_sq, hits):
+    print(f"{'lines':>5} {'RTP':>9} {'95% CI':>21} {'hit freq':>9} "
+          f"{'std dev':>8}")
+    for i in range(len(total)):
+        lines = i + 1
+        mean = total[i] / n
+        var = total_sq[i] / n - mean * mean
+        # per spin return is payout / stake, stake = lines x bet of 1
+        rtp = mean / lines
+        std = var ** 0.5 / lines
+        half = Z95 * std / n ** 0.5
+        print(f"{lines:>5} {rtp:>9.4%} "
+              f"[{rtp - half:>8.4%}, {rtp + half:>8.4%}] "
+              f"{hits[i] / n:>9.4%} {std:>8.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="slot machine RTP simulator")
+    parser.add_argument("--spins", type=int, default=10_000_000)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--batch", type=int, default=1_000_000,
+                        help="spins per NumPy batch")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n, total, total_sq, hits = run(args.spins, args.workers, args.seed,
+                                   args.batch)
+    secs = time.perf_counter() - start
+    report(n, total, total_sq, hits)
+    print(f"{n:,} spins in {secs:.2f}s: {n / secs:,.0f} spins/s")
+
+
+if __name__ == "__main__":
+    main()
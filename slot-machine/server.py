@@ -0,0 +1,147 @@
+"""
+Multi-player slot machine server
+
+Run:
+  - python server.py                         (port 8765, ledger in ./ledger)
+  - python server.py --port 9000 --ledger /var/lib/slots
+  - python loadgen.py                        (load test, see loadgen.py)
+
+Protocol: one JSON object per line over TCP, one JSON reply per line.
+  {"op": "deposit", "player": "ann", "amount": 100}
+  {"op": "spin", "player": "ann", "bet": 5, "lines": 3}
+  {"op": "cashout", "player": "ann"}
+  {"op": "balance", "player": "ann"}
+  {"op": "stats"}
+Replies have "ok": true plus the result, or "ok": false and "error".
+
+Description:
+  - Any number of sessions run concurrently on one asyncio loop. Each
+    request checks and updates the player's balance in one step (nothing
+    awaits in between), so concurrent sessions of one player stay correct.
+  - A reply is only sent once its ledger record is committed (ledger.py),
+    so every acknowledged balance survives a crash or restart.
+  - Spins use main.py's reels, paylines and paytable.
+"""
+
+import argparse
+import asyncio
+import json
+import signal
+
+from ledger import Ledger
+from main import MAX_BET, MAX_LINES, MIN_BET, ROWS, check_winnings, pays, reels
+
+
+class SlotServer:
+    def __init__(self, ledger):
+        self.ledger = ledger
+        # working balances, ahead of the ledger by uncommitted records
+        self.balances = dict(ledger.balances)
+        self.sessions = 0
+
+    async def handle(self, reader, writer):
+        self.sessions += 1
+        try:
+            while line := await reader.readline():
+                try:
+                    reply = await self.dispatch(json.loads(line))
+                except (ValueError, KeyError, TypeError) as e:
+                    reply = {"ok": False, "error": f"bad request: {e}"}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def dispatch(self, req):
+        op = req["op"]
+        if op == "stats":
+            return {"ok": True, "sessions": self.sessions,
+                    "players": len(self.balances), **self.ledger.stats()}
+        player = str(req["player"])
+        balance = self.balances.get(player, 0)
+
+        if op == "balance":
+            return {"ok": True, "balance": balance}
+
+        if op == "deposit":
+            amount = int(req["amount"])
+            if amount <= 0:
+                return {"ok": False, "error": "amount must be greater than 0"}
+            balance += amount
+            self.balances[player] = balance
+            await self.ledger.append(player, balance, op=op, amount=amount)
+            return {"ok": True, "balance": balance}
+
+        if op == "spin":
+            bet = int(req["bet"])
+            lines = int(req["lines"])
+            if not MIN_BET <= bet <= MAX_BET:
+                return {"ok": False,
+                        "error": f"bet must be between {MIN_BET} and {MAX_BET}"}
+            if not 1 <= lines <= MAX_LINES:
+                return {"ok": False,
+                        "error": f"lines must be between 1 and {MAX_LINES}"}
+            if bet * lines > balance:
+                return {"ok": False, "error": "not enough balance"}
+            grid = reels.spin(ROWS)
+            win, winning_lines = check_winnings(grid, lines, bet, pays)
+            balance += win - bet * lines
+            self.balances[player] = balance
+            await self.ledger.append(player, balance, op=op, bet=bet,
+                                     lines=lines, win=win)
+            return {"ok": True, "grid": grid, "win": win,
+                    "winning_lines": winning_lines, "balance": balance}
+
+        if op == "cashout":
+            self.balances[player] = 0
+            await self.ledger.append(player, 0, op=op, amount=balance)
+            return {"ok": True, "amount": balance, "balance": 0}
+
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+
+async def start_server(ledger_path, host="127.0.0.1", port=8765,
+                       snapshot_every=10_000):
+    """Open the ledger and start serving; returns (server, SlotServer)."""
+    ledger = Ledger(ledger_path, snapshot_every)
+    await ledger.start()
+    slots = SlotServer(ledger)
+    server = await asyncio.start_server(slots.handle, host, port,
+                                        limit=1 << 16, backlog=4096)
+    return server, slots
+
+
+async def serve(args):
+    server, slots = await start_server(args.ledger, args.host, args.port,
+                                       args.snapshot_every)
+    print(f"serving on {args.host}:{args.port}, {len(slots.balances)} "
+          f"players recovered from {args.ledger}")
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        await slots.ledger.close()
+    print("ledger closed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="slot machine server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ledger", default="ledger",
+                        help="ledger directory (created if missing)")
+    parser.add_argument("--snapshot-every", type=int, default=10_000,
+                        help="records between balance snapshots")
+    args = parser.parse_args()
+    asyncio.run(serve(args))
+
+
+if __name__ == "__main__":
+    main()
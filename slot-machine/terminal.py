@@ -0,0 +1,97 @@
+"""
+Frame-buffered terminal renderer for the slot machine
+
+Description:
+  - slot_frame() composes the whole machine (borders sized to the grid and
+    the widest symbol) into one string.
+  - TerminalRenderer.draw() writes a frame with a single write(): on a TTY
+    it first moves the cursor back up over the previous frame and clears
+    each line as it redraws, so the animation stays in place instead of
+    scrolling.
+  - animate() shows frames on an asyncio schedule (awaiting between frames),
+    so other tasks on the same loop keep running. main.py runs it as a task
+    on the game's loop and watches stdin meanwhile: ENTER sets the skip
+    event, which jumps straight to the final frame.
+  - When the stream is not a TTY (piped or redirected output), no escape
+    codes are written and only the final frame is shown, without waiting.
+"""
+
+import asyncio
+import sys
+
+CURSOR_UP = "\x1b[{}F"   # up n lines, to column 1
+CLEAR_LINE = "\x1b[K"
+HIDE_CURSOR = "\x1b[?25l"
+SHOW_CURSOR = "\x1b[?25h"
+
+
+def slot_frame(rows, width=None):
+    """The machine for a grid (list of rows) as one string, no trailing
+    newline."""
+    cols = len(rows[0])
+    if width is None:
+        width = max(len(str(symbol)) for row in rows for symbol in row)
+    bar = "─" * (width + 2)
+
+    def border(left, mid, right):
+        return " " + left + mid.join([bar] * cols) + right
+
+    lines = [border("┌", "┬", "┐")]
+    for r, row in enumerate(rows):
+        cells = "│".join(f" {str(symbol):^{width}} " for symbol in row)
+        lines.append(" │" + cells + "│")
+        if r < len(rows) - 1:
+            lines.append(border("├", "┼", "┤"))
+    lines.append(border("└", "┴", "┘"))
+    return "\n".join(lines)
+
+
+class TerminalRenderer:
+    def __init__(self, stream=None, tty=None):
+        self.stream = stream or sys.stdout
+        self.tty = self.stream.isatty() if tty is None else tty
+        self.height = 0  # lines of the frame currently on screen
+
+    def draw(self, frame):
+        """Replace the previous frame (on a TTY) or print this one."""
+        lines = frame.split("\n")
+        if self.tty:
+            out = [CURSOR_UP.format(self.height)] if self.height else []
+            out.extend(line + CLEAR_LINE + "\n" for line in lines)
+            self.height = len(lines)
+        else:
+            out = [frame, "\n"]
+        self.stream.write("".join(out))
+        self.stream.flush()
+
+    def release(self):
+        """Leave the current frame on screen; the next draw starts below."""
+        self.height = 0
+
+    def echoed(self, lines=1):
+        """The terminal echoed lines of input below the frame (the player
+        pressed ENTER mid-animation); the next draw moves up past them."""
+        if self.height:
+            self.height += lines
+
+    async def animate(self, frames, final, interval=0.1, skip=None):
+        """Show frames every interval seconds, then final in their place.
+        Setting the skip event (an asyncio.Event) jumps to final."""
+        if self.tty:
+            self.stream.write(HIDE_CURSOR)
+            try:
+                for frame in frames:
+                    if skip is not None and skip.is_set():
+                        break
+                    self.draw(frame)
+                    if skip is None:
+                        await asyncio.sleep(interval)
+                        continue
+                    try:
+                        await asyncio.wait_for(skip.wait(), interval)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self.stream.write(SHOW_CURSOR)
+        self.draw(final)
+        self.release()
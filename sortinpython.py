@@ -1,13 +1,47 @@
-"""hello world program to sort a list in ascending order using bubble sort algorithm"""
-n = int(input("Enter the number of elements to sort: "))
-t = []
-for i in range(n):
-    num = int(input(f"Enter element {i+1}: "))
-    t.append(num)
-for i in range(n):
-    for j in range(0, n-i-1):
-        if t[j] > t[j+1]:
-            t[j], t[j+1] = t[j+1], t[j]
-print("Sorted list in ascending order:")
-for i in range(n):
-    print(t[i])
+"""hello world program to sort a list in ascending order
+
+Run without arguments to type the numbers in, or sort a file of integers
+that may be larger than memory with
+`python sortinpython.py numbers.txt sorted.txt --budget-mb 256`
+(an external merge sort, see external_sort.py).
+"""
+
+import argparse
+import sys
+import time
+
+
+def interactive():
+    n = int(input("Enter the number of elements to sort: "))
+    t = []
+    for i in range(n):
+        num = int(input(f"Enter element {i+1}: "))
+        t.append(num)
+    t.sort()
+    print("Sorted list in ascending order:")
+    for i in range(n):
+        print(t[i])
+
+
+def main():
+    if len(sys.argv) == 1:
+        interactive()
+        return
+    # the file mode only: the interactive sort runs anywhere
+    from external_sort import add_arguments, external_sort, report
+
+    parser = argparse.ArgumentParser(description="sort integers")
+    parser.add_argument("files", nargs="*", metavar="FILE",
+                        help="input and output file")
+    add_arguments(parser)
+    args = parser.parse_args()
+    if len(args.files) != 2:
+        parser.error("give an input and an output file")
+    start = time.perf_counter()
+    count, runs = external_sort(*args.files, args.budget_mb << 20,
+                                args.workers, args.tmp_dir)
+    report(args.files[0], count, runs, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""Sparse matrices in compressed sparse row (CSR) form, in pure Python.
+
+A CSR matrix keeps three `array` buffers: data and indices hold the
+nonzeros and their columns row after row, and indptr[i]:indptr[i + 1] is
+row i's slice of them. Adding, multiplying and converting cost time
+proportional to the nonzeros (times the dense width, for sparse x dense),
+not to rows x cols. Integer values that do not fit in 64 bits are kept in
+a plain list instead of an array, so results stay exact.
+
+Matrices are read and written in the Matrix Market coordinate format:
+
+    %%MatrixMarket matrix coordinate integer general
+    % comments
+    3 3 2          <- rows cols nonzeros
+    1 1 5          <- row col value, 1-based
+    3 2 -1
+
+Run `python sparse.py` for a benchmark against the dense path.
+"""
+
+import argparse
+import random
+import sys
+import time
+from array import array
+
+from matrix import matmul_python, np, parse_number
+
+INT64_MIN, INT64_MAX = -1 << 63, (1 << 63) - 1
+
+
+def _store(values):
+    """values as array("q") when all are int64, array("d") when floats
+    (and int64s) mix, else a list, which keeps big ints exact."""
+    ints = [v for v in values if type(v) is int]
+    if all(INT64_MIN <= v <= INT64_MAX for v in ints):
+        return array("q" if len(ints) == len(values) else "d", values)
+    return list(values)
+
+
+class COO:
+    """Coordinate (row, col, value) triplets, for building a matrix entry by
+    entry; duplicates are summed when it becomes CSR."""
+
+    def __init__(self, shape, rows=(), cols=(), values=()):
+        self.shape = tuple(shape)
+        self.rows = array("q", rows)
+        self.cols = array("q", cols)
+        self.values = list(values)
+
+    def append(self, row, col, value):
+        self.rows.append(row)
+        self.cols.append(col)
+        self.values.append(value)
+
+    def to_csr(self):
+        n = self.shape[0]
+        # counting sort by row, then sort and merge each row by column
+        indptr = array("q", [0]) * (n + 1)
+        for r in self.rows:
+            indptr[r + 1] += 1
+        for i in range(n):
+            indptr[i + 1] += indptr[i]
+        order = array("q", [0]) * len(self.rows)
+        fill = array("q", indptr[:-1])
+        for k, r in enumerate(self.rows):
+            order[fill[r]] = k
+            fill[r] += 1
+        indices, data = array("q"), []
+        ptr = array("q", [0])
+        cols, values = self.cols, self.values
+        for i in range(n):
+            entries = sorted((cols[k], values[k])
+                             for k in order[indptr[i]:indptr[i + 1]])
+            last = -1
+            for col, value in entries:
+                if col == last:
+                    data[-1] += value
+                else:
+                    indices.append(col)
+                    data.append(value)
+                    last = col
+            ptr.append(len(indices))
+        return CSR(self.shape, ptr, indices, _store(data))
+
+
+class CSR:
+    """A sparse matrix in CSR form (see the module docstring)."""
+
+    def __init__(self, shape, indptr, indices, data):
+        self.shape = tuple(shape)
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    @property
+    def nbytes(self):
+        total = sum(a.itemsize * len(a) for a in (self.indptr, self.indices))
+        if isinstance(self.data, array):
+            return total + self.data.itemsize * len(self.data)
+        return total + sys.getsizeof(self.data) + sum(map(sys.getsizeof,
+                                                          self.data))
+
+    def __repr__(self):
+        return f"CSR({self.shape[0]}x{self.shape[1]}, nnz={self.nnz})"
+
+    @classmethod
+    def from_dense(cls, rows):
+        """CSR from a dense matrix: a list of rows or a NumPy array."""
+        if hasattr(rows, "tolist"):
+            rows = rows.tolist()
+        indptr, indices, data = array("q", [0]), array("q"), []
+        for row in rows:
+            for j, value in enumerate(row):
+                if value:
+                    indices.append(j)
+                    data.append(value)
+            indptr.append(len(indices))
+        shape = (len(rows), len(rows[0]) if rows else 0)
+        return cls(shape, indptr, indices, _store(data))
+
+    def to_dense(self):
+        """The matrix as a list of rows."""
+        n, m = self.shape
+        dense = []
+        for i in range(n):
+            row = [0] * m
+            for k in range(self.indptr[i], self.indptr[i + 1]):
+                row[self.indices[k]] = self.data[k]
+            dense.append(row)
+        return dense
+
+    def to_coo(self):
+        rows = array("q")
+        for i in range(self.shape[0]):
+            rows.extend([i] * (self.indptr[i + 1] - self.indptr[i]))
+        return COO(self.shape, rows, self.indices, self.data)
+
+    def transpose(self):
+        coo = self.to_coo()
+        return COO(self.shape[::-1], coo.cols, coo.rows, coo.values).to_csr()
+
+    def __add__(self, other):
+        """Sparse + sparse: each pair of rows is merged like sorted lists."""
+        if self.shape != other.shape:
+            raise ValueError(f"Matrix addition not possible! Shapes "
+                             f"{self.shape} and {other.shape} differ.")
+        indptr, indices, data = array("q", [0]), array("q"), []
+        ai, ad, bi, bd = self.indices, self.data, other.indices, other.data
+        for i in range(self.shape[0]):
+            p, p_end = self.indptr[i], self.indptr[i + 1]
+            q, q_end = other.indptr[i], other.indptr[i + 1]
+            while p < p_end or q < q_end:
+                if q == q_end or (p < p_end and ai[p] < bi[q]):
+                    col, value = ai[p], ad[p]
+                    p += 1
+                elif p == p_end or bi[q] < ai[p]:
+                    col, value = bi[q], bd[q]
+                    q += 1
+                else:
+                    col, value = ai[p], ad[p] + bd[q]
+                    p += 1
+                    q += 1
+                if value:
+                    indices.append(col)
+                    data.append(value)
+            indptr.append(len(indices))
+        return CSR(self.shape, indptr, indices, _store(data))
+
+    def __matmul__(self, other):
+        """Sparse x sparse gives CSR; sparse x dense (a list of rows or a
+        NumPy array) gives a list of rows."""
+        n, m = self.shape
+        if isinstance(other, CSR):
+            rows, p = other.shape
+        else:
+            if hasattr(other, "tolist"):
+                other = other.tolist()
+            rows, p = len(other), len(other[0]) if other else 0
+        if m != rows:
+            raise ValueError(f"cannot multiply {n}x{m} by {rows}x{p}: columns "
+                             "of the first matrix must equal rows of the second")
+        if isinstance(other, CSR):
+            return self._matmul_sparse(other)
+        result = []
+        for i in range(n):
+            acc = [0] * p
+            for k in range(self.indptr[i], self.indptr[i + 1]):
+                v, row = self.data[k], other[self.indices[k]]
+                acc = [x + v * y for x, y in zip(acc, row)]
+            result.append(acc)
+        return result
+
+    def _matmul_sparse(self, other):
+        # Gustavson: row i of the product accumulates v * (row k of other)
+        # for each nonzero (k, v) of row i, in a dict keyed by column
+        indptr, indices, data = array("q", [0]), array("q"), []
+        bp, bi, bd = other.indptr, other.indices, other.data
+        for i in range(self.shape[0]):
+            acc = {}
+            for k in range(self.indptr[i], self.indptr[i + 1]):
+                v, r = self.data[k], self.indices[k]
+                for q in range(bp[r], bp[r + 1]):
+                    col = bi[q]
+                    acc[col] = acc.get(col, 0) + v * bd[q]
+            for col in sorted(acc):
+                if acc[col]:
+                    indices.append(col)
+                    data.append(acc[col])
+            indptr.append(len(indices))
+        return CSR((self.shape[0], other.shape[1]), indptr, indices,
+                   _store(data))
+
+
+def read_coordinate(path):
+    """CSR from a Matrix Market coordinate file (general or symmetric;
+    integer, real or pattern values)."""
+    with open(path) as f:
+        header = f.readline()
+        banner = header.lower().split() if header.startswith("%%") else []
+        symmetric = "symmetric" in banner
+        pattern = "pattern" in banner
+        # without a banner, values are ints unless they look like floats
+        parse = (int if "integer" in banner else
+                 float if "real" in banner else None)
+        line = header
+        while line.startswith("%") or not line.strip():
+            line = f.readline()
+        n, m, _ = map(int, line.split())
+        coo = COO((n, m))
+        for line in f:
+            parts = line.split()
+            if not parts or parts[0].startswith("%"):
+                continue
+            i, j = int(parts[0]) - 1, int(parts[1]) - 1
+            if not (0 <= i < n and 0 <= j < m):
+                raise ValueError(f"{path}: entry ({i + 1}, {j + 1}) is outside "
+                                 f"the {n}x{m} matrix")
+            if pattern:
+                value = 1
+            elif parse is None:
+                value = parse_number(parts[2])
+            else:
+                value = parse(parts[2])
+            coo.append(i, j, value)
+            if symmetric and i != j:
+                coo.append(j, i, value)
+    return coo.to_csr()
+
+
+def write_coordinate(path, matrix):
+    kind = ("integer" if all(type(v) is int for v in matrix.data)
+            else "real")
+    with open(path, "w") as f:
+        f.write(f"%%MatrixMarket matrix coordinate {kind} general\n")
+        f.write(f"{matrix.shape[0]} {matrix.shape[1]} {matrix.nnz}\n")
+        coo = matrix.to_coo()
+        f.writelines(f"{i + 1} {j + 1} {v}\n"
+                     for i, j, v in zip(coo.rows, coo.cols, coo.values))
+
+
+def random_sparse(n, m, density, rng):
+    nnz = int(n * m * density)
+    coo = COO((n, m))
+    for _ in range(nnz):
+        coo.append(rng.randrange(n), rng.randrange(m), rng.randrange(1, 10))
+    return coo.to_csr()
+
+
+def _dense_bytes(rows):
+    # the list objects plus one 8-byte pointer per element (small ints are
+    # shared, so the int objects themselves are not counted)
+    return sys.getsizeof(rows) + sum(sys.getsizeof(row) for row in rows)
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    return value, (time.perf_counter() - start) * 1000
+
+
+def benchmark(n=1000, density=0.001, seed=0):
+    """CSR against dense lists (and NumPy when installed) at 99.9% zeros."""
+    rng = random.Random(seed)
+    a = random_sparse(n, n, density, rng)
+    b = random_sparse(n, n, density, rng)
+    da, db = a.to_dense(), b.to_dense()
+    print(f"{n}x{n}, {a.nnz} nonzeros ({density:.2%} dense)")
+    print(f"memory: CSR {a.nbytes / 1024:,.0f} KiB, dense lists "
+          f"{_dense_bytes(da) / 1024:,.0f} KiB, NumPy int64 "
+          f"{n * n * 8 / 1024:,.0f} KiB")
+
+    total, ms = _timed(lambda: a + b)
+    dense_sum, dense_ms = _timed(
+        lambda: [[x + y for x, y in zip(r, s)] for r, s in zip(da, db)])
+    assert total.to_dense() == dense_sum
+    print(f"add:            CSR {ms:9.1f} ms   dense lists {dense_ms:9.1f} ms")
+
+    product, ms = _timed(lambda: a @ b)
+    dense_product, dense_ms = _timed(matmul_python, da, db)
+    assert product.to_dense() == dense_product
+    line = f"sparse x sparse: CSR {ms:8.1f} ms   dense lists {dense_ms:9.1f} ms"
+    if np is not None:
+        x, y = np.array(da), np.array(db)
+        _, np_ms = _timed(lambda: x @ y)
+        line += f"   NumPy {np_ms:8.1f} ms"
+    print(line)
+
+    width = 64
+    dense = [[rng.randrange(10) for _ in range(width)] for _ in range(n)]
+    product, ms = _timed(lambda: a @ dense)
+    _, dense_ms = _timed(matmul_python, da, dense)
+    assert product == matmul_python(da, dense)
+    print(f"sparse x {n}x{width} dense: CSR {ms:.1f} ms   dense lists "
+          f"{dense_ms:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="sparse matrix benchmark")
+    parser.add_argument("--size", type=int, default=1000)
+    parser.add_argument("--density", type=float, default=0.001)
+    args = parser.parse_args()
+    benchmark(args.size, args.density)
+
+
+if __name__ == "__main__":
+    main()
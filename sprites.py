@@ -0,0 +1,203 @@
+"""
+Sprite atlas and animation system for game.py
+
+Run:
+  - python game.py --sprites            (generated placeholder atlas)
+  - python game.py --sprites fighter.png
+  - python sprites.py --stress 2000     (stress scene, prints frame timings)
+
+Description:
+  - One atlas image per fighter, loaded and convert_alpha()'d once at startup.
+    Each row is a State (in enum order), each column an animation frame of
+    FRAME_W x FRAME_H pixels, facing right.
+  - The atlas is mirrored once for Facing.LEFT; every frame of both versions
+    is a subsurface, so drawing is a plain blit with no per-frame loading,
+    converting or flipping.
+  - Animator tracks the current State and frame for one entity and is
+    advanced once per simulation step.
+"""
+
+import argparse
+import random
+import time
+
+import pygame
+
+from game import Facing, State
+
+FRAME_W = 64
+FRAME_H = 96
+
+# State -> (frame count, sim steps per frame, loops)
+ANIMATIONS = {
+    State.IDLE: (4, 10, True),
+    State.WALK: (6, 6, True),
+    State.JUMP: (2, 8, False),
+    State.FALL: (2, 8, False),
+    State.CROUCH: (1, 1, False),
+    State.ATTACK: (4, 4, False),
+    State.HURT: (2, 6, False),
+    State.DOWN: (1, 1, False),
+}
+ROWS = list(State)
+COLUMNS = max(count for count, _, _ in ANIMATIONS.values())
+
+
+class SpriteAtlas:
+    """Pre-sliced animation frames keyed by (State, Facing)."""
+
+    def __init__(self, surface):
+        # surface must already be converted; it is sliced, never copied
+        self.surface = surface
+        self.mirrored = pygame.transform.flip(surface, True, False)
+        width = surface.get_width()
+        self.frames = {}
+        for row, state in enumerate(ROWS):
+            count = ANIMATIONS[state][0]
+            y = row * FRAME_H
+            self.frames[state, Facing.RIGHT] = [
+                surface.subsurface((col * FRAME_W, y, FRAME_W, FRAME_H))
+                for col in range(count)]
+            # column c sits at the mirrored position in the flipped atlas
+            self.frames[state, Facing.LEFT] = [
+                self.mirrored.subsurface(
+                    (width - (col + 1) * FRAME_W, y, FRAME_W, FRAME_H))
+                for col in range(count)]
+
+    @classmethod
+    def load(cls, path):
+        return cls(pygame.image.load(path).convert_alpha())
+
+    @classmethod
+    def placeholder(cls, color):
+        """Procedurally drawn atlas, so the system works without art assets."""
+        surf = pygame.Surface((COLUMNS * FRAME_W, len(ROWS) * FRAME_H),
+                              pygame.SRCALPHA)
+        dark = tuple(c // 2 for c in color)
+        for row, state in enumerate(ROWS):
+            count = ANIMATIONS[state][0]
+            for col in range(count):
+                x, y = col * FRAME_W, row * FRAME_H
+                phase = col / max(1, count - 1)
+                body_h = 40 if state in (State.CROUCH, State.DOWN) else 80
+                body = pygame.Rect(0, 0, 44, body_h)
+                body.midbottom = (x + FRAME_W // 2, y + FRAME_H - 2)
+                body.y -= int(4 * phase) if state == State.IDLE else 0
+                pygame.draw.rect(surf, color, body, border_radius=8)
+                pygame.draw.rect(surf, dark, body, 2, border_radius=8)
+                # eye marks the facing direction (right)
+                pygame.draw.circle(surf, (255, 255, 255),
+                                   (body.right - 10, body.top + 12), 5)
+                if state == State.ATTACK:
+                    arm = int(10 + 14 * phase)
+                    pygame.draw.rect(surf, dark, (body.right, body.centery - 6,
+                                                  arm, 12))
+                elif state == State.WALK:
+                    stride = int(10 * (phase - 0.5))
+                    pygame.draw.line(surf, dark, (body.centerx, body.bottom),
+                                     (body.centerx + stride, y + FRAME_H), 4)
+        return cls(surf.convert_alpha())
+
+
+class Animator:
+    """Frame selection for one entity; call update() once per sim step."""
+
+    def __init__(self, atlas):
+        self.atlas = atlas
+        self.state = State.IDLE
+        self.frame = 0
+        self.ticks = 0
+
+    def update(self, state):
+        if state != self.state:
+            self.state = state
+            self.frame = 0
+            self.ticks = 0
+            return
+        count, rate, loops = ANIMATIONS[state]
+        self.ticks += 1
+        if self.ticks >= rate:
+            self.ticks = 0
+            if self.frame + 1 < count:
+                self.frame += 1
+            elif loops:
+                self.frame = 0
+
+    def image(self, facing):
+        return self.atlas.frames[self.state, facing][self.frame]
+
+    def draw(self, surf, rect, facing):
+        # anchor the frame on the bottom centre of the entity's rect
+        surf.blit(self.image(facing),
+                  (rect.centerx - FRAME_W // 2, rect.bottom - FRAME_H))
+
+
+def stress(count, seconds, naive=False):
+    """Draw `count` animated entities for `seconds`; return frame timings."""
+    pygame.init()
+    screen = pygame.display.set_mode((1000, 600))
+    pygame.display.set_caption('Sprite stress scene')
+    clock = pygame.time.Clock()
+    palette = [(200, 80, 80), (80, 120, 200), (90, 190, 110), (220, 180, 60)]
+    atlases = [SpriteAtlas.placeholder(c) for c in palette]
+    rng = random.Random(0)
+    entities = []
+    for i in range(count):
+        anim = Animator(atlases[i % len(atlases)])
+        anim.state = rng.choice(ROWS)
+        pos = [rng.uniform(0, 1000 - FRAME_W), rng.uniform(0, 600 - FRAME_H)]
+        vel = rng.choice((-2, -1, 1, 2))
+        entities.append((anim, pos, vel))
+
+    frame_ms = []
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        t0 = time.perf_counter()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                end = 0
+        screen.fill((30, 30, 40))
+        blits = []
+        for i, (anim, pos, vel) in enumerate(entities):
+            pos[0] += vel
+            if pos[0] < 0 or pos[0] > 1000 - FRAME_W:
+                vel = -vel
+                entities[i] = (anim, pos, vel)
+            facing = Facing.RIGHT if vel > 0 else Facing.LEFT
+            anim.update(anim.state if rng.random() > 0.01
+                        else rng.choice(ROWS))
+            if naive:
+                img = anim.atlas.frames[anim.state, Facing.RIGHT][anim.frame]
+                if facing == Facing.LEFT:
+                    img = pygame.transform.flip(img, True, False)
+            else:
+                img = anim.image(facing)
+            blits.append((img, pos))
+        screen.blits(blits, doreturn=False)
+        pygame.display.flip()
+        frame_ms.append((time.perf_counter() - t0) * 1000.0)
+        clock.tick(0)
+    pygame.quit()
+    return frame_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description='sprite atlas stress scene')
+    parser.add_argument('--stress', type=int, default=1000,
+                        help='number of animated entities')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--naive', action='store_true',
+                        help='flip LEFT frames every blit, for comparison')
+    args = parser.parse_args()
+    frames = sorted(stress(args.stress, args.seconds, args.naive))
+    if not frames:
+        return
+    mean = sum(frames) / len(frames)
+    p99 = frames[min(len(frames) - 1, int(len(frames) * 0.99))]
+    print(f'{args.stress} entities, {len(frames)} frames: '
+          f'mean {mean:.2f} ms ({1000.0 / mean:.0f} FPS), p99 {p99:.2f} ms, '
+          f'{sum(f > 1000.0 / 60 for f in frames)} frames over 16.7 ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,157 +1,124 @@
 '''A simple Tetris game implemented using Pygame.'''
+import argparse
+import os
 import random
-import pygame
+import time
 
+import pygame
 
-# Initialize Pygame
-pygame.init()
+from tetris_engine import (BLACK, BOARD_HEIGHT, BOARD_WIDTH, COLORS, GRAVITY,
+                           GRAY, HARD_DROP, LEFT, RED, RIGHT, ROTATE,
+                           ROTATIONS, SOFT_DROP, WHITE, TetrisEngine)
+from tetris_replay import Recorder, save
 
 # Constants
 SCREEN_WIDTH = 400
 SCREEN_HEIGHT = 600
 BLOCK_SIZE = 30
-BOARD_WIDTH = 10
-BOARD_HEIGHT = 20
+PREVIEW_BLOCK = 12
 FPS = 60
-
-# Colors
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-GRAY = (128, 128, 128)
-CYAN = (0, 255, 255)
-YELLOW = (255, 255, 0)
-PURPLE = (128, 0, 128)
-GREEN = (0, 255, 0)
-RED = (255, 0, 0)
-BLUE = (0, 0, 255)
-ORANGE = (255, 165, 0)
-
-# Tetromino shapes
-SHAPES = {
-    'I': [[1, 1, 1, 1]],
-    'O': [[1, 1], [1, 1]],
-    'T': [[0, 1, 0], [1, 1, 1]],
-    'S': [[0, 1, 1], [1, 1, 0]],
-    'Z': [[1, 1, 0], [0, 1, 1]],
-    'J': [[1, 0, 0], [1, 1, 1]],
-    'L': [[0, 0, 1], [1, 1, 1]]
-}
-
-COLORS = {
-    'I': CYAN,
-    'O': YELLOW,
-    'T': PURPLE,
-    'S': GREEN,
-    'Z': RED,
-    'J': BLUE,
-    'L': ORANGE
-}
-
-"""Class representing a Tetromino piece."""
-
-
-class Tetromino:
-    """Class representing a Tetromino piece."""
-
-    def __init__(self):
-        self.type = random.choice(list(SHAPES.keys()))
-        self.shape = [row[:] for row in SHAPES[self.type]]
-        self.color = COLORS[self.type]
-        self.x = BOARD_WIDTH // 2 - len(self.shape[0]) // 2
-        self.y = 0
-
-    def rotate(self):
-        self.shape = [[self.shape[j][i] for j in range(len(self.shape))]
-                      for i in range(len(self.shape[0]) - 1, -1, -1)]
-
-
-class TetrisGame:
+PANEL_X = BOARD_WIDTH * BLOCK_SIZE + 10
+CONTROLS = [
+    'Controls:',
+    '← → : Move',
+    '↑ : Rotate',
+    '↓ : Soft Drop',
+    'Space: Hard Drop'
+]
+
+
+class TetrisRenderer:
+    """Cached drawing for TetrisGame.
+
+    The grid is drawn once, locked cells live on their own surface and only
+    rows the board marks dirty are repainted, and text is only re-rendered
+    when its value changes.
+    """
+
+    def __init__(self, screen, small_font):
+        self.screen = screen
+        self.small_font = small_font
+        size = (BOARD_WIDTH * BLOCK_SIZE, BOARD_HEIGHT * BLOCK_SIZE)
+        # full-screen background, so it also stands in for screen.fill()
+        self.grid = pygame.Surface(screen.get_size()).convert()
+        self.grid.fill(BLACK)
+        for y in range(BOARD_HEIGHT):
+            for x in range(BOARD_WIDTH):
+                rect = pygame.Rect(x * BLOCK_SIZE, y * BLOCK_SIZE,
+                                   BLOCK_SIZE, BLOCK_SIZE)
+                pygame.draw.rect(self.grid, GRAY, rect, 1)
+        self.cells = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+        self.board = None
+        self.labels = {}  # slot -> (text, rendered surface)
+        self.controls = [small_font.render(text, True, WHITE)
+                         for text in CONTROLS]
+
+    def sync(self, board):
+        if board is not self.board:
+            # new board after a reset: repaint everything
+            self.board = board
+            board.dirty.update(range(BOARD_HEIGHT))
+        for y in board.dirty:
+            self.cells.fill((0, 0, 0, 0), (0, y * BLOCK_SIZE,
+                                           BOARD_WIDTH * BLOCK_SIZE,
+                                           BLOCK_SIZE))
+            for x in range(BOARD_WIDTH):
+                color = board.cell(x, y)
+                if color is not None:
+                    rect = pygame.Rect(x * BLOCK_SIZE, y * BLOCK_SIZE,
+                                       BLOCK_SIZE, BLOCK_SIZE)
+                    pygame.draw.rect(self.cells, color, rect)
+                    pygame.draw.rect(self.cells, WHITE, rect, 2)
+        board.dirty.clear()
+
+    def label(self, slot, text):
+        cached = self.labels.get(slot)
+        if cached is None or cached[0] != text:
+            cached = (text, self.small_font.render(text, True, WHITE))
+            self.labels[slot] = cached
+        return cached[1]
+
+    def draw(self, game):
+        self.sync(game.board)
+        self.screen.blit(self.grid, (0, 0))
+        self.screen.blit(self.cells, (0, 0))
+        if not game.game_over:
+            game.draw_piece()
+        self.screen.blit(self.label('score', f'Score: {game.score}'),
+                         (PANEL_X, 20))
+        self.screen.blit(self.label('level', f'Level: {game.level}'),
+                         (PANEL_X, 50))
+        self.screen.blit(self.label('lines', f'Lines: {game.lines}'),
+                         (PANEL_X, 80))
+        for i, surf in enumerate(self.controls):
+            self.screen.blit(surf, (PANEL_X, 150 + i * 25))
+        self.draw_preview(game.preview())
+
+    def draw_preview(self, kinds):
+        self.screen.blit(self.label('next', 'Next:'), (PANEL_X, 290))
+        for i, kind in enumerate(kinds):
+            top = 315 + i * 3 * PREVIEW_BLOCK
+            for x, y in ROTATIONS[kind][0].cells:
+                rect = pygame.Rect(PANEL_X + x * PREVIEW_BLOCK,
+                                   top + y * PREVIEW_BLOCK,
+                                   PREVIEW_BLOCK, PREVIEW_BLOCK)
+                pygame.draw.rect(self.screen, COLORS[kind], rect)
+                pygame.draw.rect(self.screen, WHITE, rect, 1)
+
+
+class TetrisGame(TetrisEngine):
     """Class representing the Tetris game."""
 
-    def __init__(self):
+    def __init__(self, seed=None, record=None):
+        self.record_path = record
+        pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption('Tetris')
         self.clock = pygame.time.Clock()
-        self.board = [[None for _ in range(BOARD_WIDTH)]
-                      for _ in range(BOARD_HEIGHT)]
-        self.current_piece = Tetromino()
-        self.score = 0
-        self.level = 1
-        self.lines = 0
-        self.game_over = False
-        self.fall_time = 0
-        self.fall_speed = 500  # milliseconds
         self.font = pygame.font.Font(None, 36)
         self.small_font = pygame.font.Font(None, 24)
-
-    def check_collision(self, piece, offset_x=0, offset_y=0):
-        for y, row in enumerate(piece.shape):
-            for x, cell in enumerate(row):
-                if cell:
-                    new_x = piece.x + x + offset_x
-                    new_y = piece.y + y + offset_y
-                    if new_x < 0 or new_x >= BOARD_WIDTH or new_y >= BOARD_HEIGHT:
-                        return True
-                    if new_y >= 0 and self.board[new_y][new_x] is not None:
-                        return True
-        return False
-
-    def merge_piece(self):
-        for y, row in enumerate(self.current_piece.shape):
-            for x, cell in enumerate(row):
-                if cell:
-                    board_y = self.current_piece.y + y
-                    board_x = self.current_piece.x + x
-                    if board_y >= 0:
-                        self.board[board_y][board_x] = self.current_piece.color
-
-    def clear_lines(self):
-        lines_cleared = 0
-        y = BOARD_HEIGHT - 1
-        while y >= 0:
-            if all(cell is not None for cell in self.board[y]):
-                del self.board[y]
-                self.board.insert(0, [None for _ in range(BOARD_WIDTH)])
-                lines_cleared += 1
-            else:
-                y -= 1
-
-        if lines_cleared > 0:
-            points = [0, 100, 300, 500, 800][lines_cleared] * self.level
-            self.score += points
-            self.lines += lines_cleared
-            self.level = self.lines // 10 + 1
-            self.fall_speed = max(100, 500 - (self.level - 1) * 50)
-
-    def new_piece(self):
-        self.current_piece = Tetromino()
-        if self.check_collision(self.current_piece):
-            self.game_over = True
-
-    def move(self, dx):
-        if not self.check_collision(self.current_piece, dx, 0):
-            self.current_piece.x += dx
-
-    def rotate_piece(self):
-        old_shape = [row[:] for row in self.current_piece.shape]
-        self.current_piece.rotate()
-        if self.check_collision(self.current_piece):
-            self.current_piece.shape = old_shape
-
-    def drop(self):
-        if not self.check_collision(self.current_piece, 0, 1):
-            self.current_piece.y += 1
-            return False
-        else:
-            self.merge_piece()
-            self.clear_lines()
-            self.new_piece()
-            return True
-
-    def hard_drop(self):
-        while not self.check_collision(self.current_piece, 0, 1):
-            self.current_piece.y += 1
-        self.drop()
+        self.renderer = TetrisRenderer(self.screen, self.small_font)
+        super().__init__(seed)
 
     def draw_board(self):
         # Draw grid
@@ -160,8 +127,9 @@ class TetrisGame:
                 rect = pygame.Rect(x * BLOCK_SIZE, y *
                                    BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
                 pygame.draw.rect(self.screen, GRAY, rect, 1)
-                if self.board[y][x] is not None:
-                    pygame.draw.rect(self.screen, self.board[y][x], rect)
+                color = self.board.cell(x, y)
+                if color is not None:
+                    pygame.draw.rect(self.screen, color, rect)
                     pygame.draw.rect(self.screen, WHITE, rect, 2)
 
     def draw_piece(self):
@@ -189,14 +157,7 @@ class TetrisGame:
         self.screen.blit(level_text, (BOARD_WIDTH * BLOCK_SIZE + 10, 50))
         self.screen.blit(lines_text, (BOARD_WIDTH * BLOCK_SIZE + 10, 80))
 
-        controls = [
-            'Controls:',
-            '← → : Move',
-            '↑ : Rotate',
-            '↓ : Soft Drop',
-            'Space: Hard Drop'
-        ]
-        for i, text in enumerate(controls):
+        for i, text in enumerate(CONTROLS):
             control_text = self.small_font.render(text, True, WHITE)
             self.screen.blit(control_text, (BOARD_WIDTH *
                              BLOCK_SIZE + 10, 150 + i * 25))
@@ -220,15 +181,18 @@ class TetrisGame:
                          (SCREEN_WIDTH // 2 - restart_text.get_width() // 2, 320))
 
     def reset(self):
-        self.board = [[None for _ in range(BOARD_WIDTH)]
-                      for _ in range(BOARD_HEIGHT)]
-        self.current_piece = Tetromino()
-        self.score = 0
-        self.level = 1
-        self.lines = 0
-        self.game_over = False
+        super().reset()
         self.fall_time = 0
-        self.fall_speed = 500
+        self.frame = 0
+        self.recorder = Recorder(self) if self.record_path else None
+
+    def input(self, code):
+        if self.recorder:
+            locked = self.recorder.input(self.frame, code)
+            if self.game_over:
+                save(self.recorder.replay, self.record_path)
+            return locked
+        return self.apply_input(code)
 
     def run(self):
         running = True
@@ -246,34 +210,79 @@ class TetrisGame:
                             self.reset()
                     else:
                         if event.key == pygame.K_LEFT:
-                            self.move(-1)
+                            self.input(LEFT)
                         elif event.key == pygame.K_RIGHT:
-                            self.move(1)
+                            self.input(RIGHT)
                         elif event.key == pygame.K_DOWN:
-                            self.drop()
+                            self.input(SOFT_DROP)
                         elif event.key == pygame.K_UP:
-                            self.rotate_piece()
+                            self.input(ROTATE)
                         elif event.key == pygame.K_SPACE:
-                            self.hard_drop()
+                            self.input(HARD_DROP)
 
             if not self.game_over and self.fall_time >= self.fall_speed:
-                self.drop()
+                self.input(GRAVITY)
                 self.fall_time = 0
+            self.frame += 1
 
-            self.screen.fill(BLACK)
-            self.draw_board()
-            if not self.game_over:
-                self.draw_piece()
-            self.draw_ui()
-
-            if self.game_over:
-                self.draw_game_over()
-
+            self.draw()
             pygame.display.flip()
 
+        if self.recorder and not self.game_over:
+            save(self.recorder.replay, self.record_path)
         pygame.quit()
 
+    def draw(self):
+        self.renderer.draw(self)
+        if self.game_over:
+            self.draw_game_over()
+
+    def draw_uncached(self):
+        # the original every-frame drawing, kept for benchmark comparison
+        self.screen.fill(BLACK)
+        self.draw_board()
+        if not self.game_over:
+            self.draw_piece()
+        self.draw_ui()
+        if self.game_over:
+            self.draw_game_over()
+
+
+def bench_render(frames, seed=0):
+    '''Time uncached vs cached drawing on a half-filled board.'''
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    game = TetrisGame(seed)
+    rng = random.Random(seed)
+    while (not game.game_over and
+           game.board.aggregate_height() < BOARD_WIDTH * BOARD_HEIGHT // 2):
+        game.move(rng.randrange(-4, 5))
+        game.hard_drop()
+    results = {}
+    for name, draw in (('uncached', game.draw_uncached),
+                       ('cached', game.draw)):
+        start = time.perf_counter()
+        for i in range(frames):
+            if i % 30 == 0:
+                game.drop()  # board / score changes now and then
+            draw()
+        results[name] = (time.perf_counter() - start) * 1000 / frames
+    pygame.quit()
+    for name, ms in results.items():
+        print(f'{name:>9}: {ms:.3f} ms/frame')
+    print(f'speedup: {results["uncached"] / results["cached"]:.1f}x')
+
 
 if __name__ == '__main__':
-    game = TetrisGame()
-    game.run()
+    parser = argparse.ArgumentParser(description='Tetris')
+    parser.add_argument('--bench-render', type=int, metavar='FRAMES',
+                        help='time cached vs uncached drawing and exit')
+    parser.add_argument('--seed', type=int,
+                        help='piece seed (default: random per game)')
+    parser.add_argument('--record', metavar='PATH',
+                        help='save a replay of the game (tetris_replay.py)')
+    args = parser.parse_args()
+    if args.bench_render:
+        bench_render(args.bench_render)
+    else:
+        game = TetrisGame(args.seed, args.record)
+        game.run()
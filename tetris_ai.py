@@ -0,0 +1,136 @@
+'''Placement-search Tetris AI on top of the headless tetris_engine.
+
+For every piece the AI enumerates each reachable (rotation, column)
+placement: rotate at the spawn point (with wall kicks), slide sideways until
+blocked, then hard drop. Each resulting board is scored with the usual
+linear features - aggregate height, holes, bumpiness and completed lines -
+and the best placement is played.
+
+Run:
+  python tetris_ai.py --games 32 --workers 4 --max-pieces 2000
+
+Games with different seeds run in parallel worker processes; the report
+gives per-game results and overall pieces/second.
+'''
+import argparse
+import time
+from multiprocessing import Pool
+
+from tetris_engine import TetrisEngine, Tetromino
+
+# Feature weights (Yiyuan Lee's tuned values)
+HEIGHT_WEIGHT = -0.510066
+LINES_WEIGHT = 0.760666
+HOLES_WEIGHT = -0.35663
+BUMPINESS_WEIGHT = -0.184483
+
+
+def evaluate(board, masks, x, y):
+    '''Score locking masks at (x, y); the board is restored afterwards.
+
+    Uses the BitBoard's incremental metrics with apply/undo, so no board
+    copy or full rescan is needed per candidate.
+    '''
+    rec = board.apply(masks, x, y)
+    score = (HEIGHT_WEIGHT * board.aggregate_height() +
+             LINES_WEIGHT * rec.lines +
+             HOLES_WEIGHT * board.holes() +
+             BUMPINESS_WEIGHT * board.bumpiness())
+    board.undo(rec)
+    return score
+
+
+def placements(engine, piece):
+    '''Yield (rotation, x, y) for every reachable resting position.'''
+    seen = set()
+    for turns in range(4):
+        probe = Tetromino(piece.type)
+        probe.x, probe.y = piece.x, piece.y
+        ok = True
+        for _ in range(turns):
+            if not engine.try_rotate(probe):
+                ok = False
+                break
+        if not ok or engine.check_collision(probe):
+            continue
+        state = probe.rotations[probe.rotation]
+        # identical states (O, and I/S/Z pairs) give duplicate placements
+        for dx in (-1, 1):
+            x = probe.x if dx < 0 else probe.x + 1
+            while not engine.board.collides(state.masks, x, probe.y):
+                key = (state.masks, x)
+                if key not in seen:
+                    seen.add(key)
+                    y = probe.y
+                    while not engine.board.collides(state.masks, x, y + 1):
+                        y += 1
+                    yield probe.rotation, x, y
+                x += dx
+
+
+def best_placement(engine):
+    piece = engine.current_piece
+    best = None
+    best_score = None
+    for rotation, x, y in placements(engine, piece):
+        score = evaluate(engine.board, piece.rotations[rotation].masks, x, y)
+        if best_score is None or score > best_score:
+            best, best_score = (rotation, x, y), score
+    return best
+
+
+def play_game(seed, max_pieces=1000):
+    '''Play one AI game; return (seed, pieces, lines, score, seconds).'''
+    engine = TetrisEngine(seed)
+    pieces = 0
+    start = time.perf_counter()
+    while not engine.game_over and pieces < max_pieces:
+        choice = best_placement(engine)
+        if choice is None:
+            break
+        piece = engine.current_piece
+        piece.rotation, piece.x, piece.y = choice
+        engine.hard_drop()
+        pieces += 1
+    return seed, pieces, engine.lines, engine.score, time.perf_counter() - start
+
+
+def _play(args):
+    return play_game(*args)
+
+
+def run(seeds, max_pieces=1000, workers=None):
+    jobs = [(seed, max_pieces) for seed in seeds]
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_play(job) for job in jobs]
+    else:
+        with Pool(workers) as pool:
+            results = pool.map(_play, jobs, chunksize=1)
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tetris placement-search AI')
+    parser.add_argument('--games', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0,
+                        help='first seed; games use seed, seed+1, ...')
+    parser.add_argument('--max-pieces', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: all cores)')
+    args = parser.parse_args()
+
+    seeds = range(args.seed, args.seed + args.games)
+    results, wall = run(seeds, args.max_pieces, args.workers)
+    print(f'{"seed":>6} {"pieces":>7} {"lines":>6} {"score":>8} {"pc/s":>8}')
+    for seed, pieces, lines, score, secs in results:
+        print(f'{seed:>6} {pieces:>7} {lines:>6} {score:>8} '
+              f'{pieces / secs if secs else 0:>8.0f}')
+    total = sum(r[1] for r in results)
+    cpu = sum(r[4] for r in results)
+    print(f'{total} pieces in {wall:.2f}s wall: {total / wall:.0f} pieces/s '
+          f'overall, {total / cpu:.0f} pieces/s per process')
+
+
+if __name__ == '__main__':
+    main()
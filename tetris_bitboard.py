@@ -0,0 +1,326 @@
+'''Bitboard backend for the Tetris board (see tetris_engine.py).
+
+Each board row is an int whose bit x is set when column x is filled, and a
+piece is a tuple of row masks (one per row of its shape). Collision is a
+shift and an AND per piece row, and a row is full when it equals
+(1 << width) - 1. Colors are only needed for drawing, so they live in a
+parallel grid of palette indices (one bytearray per row, 0 = empty).
+
+Run `python tetris_bitboard.py` to check the bitboard against the original
+list-of-lists logic on random games.
+'''
+import random
+from collections import namedtuple
+
+
+def shape_masks(shape):
+    '''Row bitmasks for a 0/1 shape matrix (bit x set for column x).'''
+    return tuple(sum(1 << x for x, cell in enumerate(row) if cell)
+                 for row in shape)
+
+
+Rotation = namedtuple('Rotation', 'shape cells masks width height')
+
+
+def build_rotations(shape):
+    '''All four rotation states of a shape, each turned once more than the
+    last (the same direction Tetromino.rotate always used).
+
+    Every state carries its shape rows, (x, y) cell offsets and row masks,
+    so rotating a piece at runtime is just an index change.
+    '''
+    states = []
+    cur = [list(row) for row in shape]
+    for _ in range(4):
+        states.append(Rotation(
+            shape=tuple(tuple(row) for row in cur),
+            cells=tuple((x, y) for y, row in enumerate(cur)
+                        for x, cell in enumerate(row) if cell),
+            masks=shape_masks(cur),
+            width=len(cur[0]),
+            height=len(cur)))
+        cur = [[cur[j][i] for j in range(len(cur))]
+               for i in range(len(cur[0]) - 1, -1, -1)]
+    return tuple(states)
+
+
+Undo = namedtuple('Undo', 'masks x y heights rows row_fill lines')
+
+
+class BitBoard:
+    '''Board rows as int bitmasks plus a compact color grid for rendering.
+
+    Column heights, per-row and per-column fill counts and the total filled
+    count are kept up to date by place/clear_full_rows and by apply/undo,
+    so evaluation never has to rescan the whole board.
+    '''
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.full = (1 << width) - 1
+        self.rows = [0] * height
+        self.colors = [bytearray(width) for _ in range(height)]
+        self.palette = [None]  # palette index -> color, 0 is empty
+        self.heights = [0] * width
+        self.col_fill = [0] * width
+        self.row_fill = [0] * height
+        self.filled = 0
+        # rows whose colors changed since a renderer last looked
+        self.dirty = set(range(height))
+
+    def collides(self, masks, x, y):
+        '''True if a piece with these row masks overlaps a wall or a block.'''
+        rows = self.rows
+        for i, mask in enumerate(masks):
+            if not mask:
+                continue
+            if x < 0:
+                if mask & ((1 << -x) - 1):
+                    return True  # a cell left of column 0
+                mask >>= -x
+            else:
+                mask <<= x
+                if mask > self.full:
+                    return True  # a cell right of the last column
+            row = y + i
+            if row >= self.height:
+                return True
+            if row >= 0 and rows[row] & mask:
+                return True
+        return False
+
+    def _lock(self, masks, x, y, sign=1):
+        # add (sign=1) or remove (sign=-1) a piece's cells and their counts
+        rows = self.rows
+        heights = self.heights
+        col_fill = self.col_fill
+        row_fill = self.row_fill
+        for i, mask in enumerate(masks):
+            row = y + i
+            if row < 0 or not mask:
+                continue
+            mask = mask << x if x >= 0 else mask >> -x
+            rows[row] ^= mask
+            n = mask.bit_count()
+            row_fill[row] += sign * n
+            self.filled += sign * n
+            h = self.height - row
+            while mask:
+                low = mask & -mask
+                col = low.bit_length() - 1
+                col_fill[col] += sign
+                if sign > 0 and heights[col] < h:
+                    heights[col] = h
+                mask ^= low
+
+    def _clear(self, with_colors):
+        full = self.full
+        kept = [i for i, row in enumerate(self.rows) if row != full]
+        cleared = self.height - len(kept)
+        if cleared:
+            # fresh lists, so apply() can keep the old ones for undo()
+            self.rows = [0] * cleared + [self.rows[i] for i in kept]
+            self.row_fill = [0] * cleared + [self.row_fill[i] for i in kept]
+            if with_colors:
+                self.colors = ([bytearray(self.width) for _ in range(cleared)]
+                               + [self.colors[i] for i in kept])
+                # everything above the lowest cleared row moved down
+                lowest = max(set(range(self.height)) - set(kept))
+                self.dirty.update(range(lowest + 1))
+            self.filled -= cleared * self.width
+            for col in range(self.width):
+                self.col_fill[col] -= cleared
+            self._scan_heights()
+        return cleared
+
+    def _scan_heights(self):
+        heights = [0] * self.width
+        todo = self.full
+        for y, row in enumerate(self.rows):
+            hit = row & todo
+            while hit:
+                low = hit & -hit
+                heights[low.bit_length() - 1] = self.height - y
+                hit ^= low
+            todo &= ~row
+            if not todo:
+                break
+        self.heights = heights
+
+    def place(self, masks, x, y, color):
+        '''Lock a piece into the board (rows above the top are dropped).'''
+        if color not in self.palette:
+            self.palette.append(color)
+        code = self.palette.index(color)
+        self._lock(masks, x, y)
+        for i, mask in enumerate(masks):
+            row = y + i
+            if row < 0 or not mask:
+                continue
+            colors = self.colors[row]
+            self.dirty.add(row)
+            bits = mask
+            col = x
+            while bits:
+                if bits & 1:
+                    colors[col] = code
+                bits >>= 1
+                col += 1
+
+    def clear_full_rows(self):
+        '''Remove full rows, shifting the rest down; return how many.'''
+        return self._clear(True)
+
+    def apply(self, masks, x, y):
+        '''Lock a piece and clear lines for look-ahead only.
+
+        Colors are left alone. Returns an Undo record; undo() it (in reverse
+        order when nesting) before the board is used for anything else.
+        '''
+        heights = self.heights[:]
+        self._lock(masks, x, y)
+        rows, row_fill = self.rows, self.row_fill
+        lines = self._clear(False)
+        return Undo(masks, x, y, heights, rows, row_fill, lines)
+
+    def undo(self, rec):
+        if rec.lines:
+            self.rows = rec.rows
+            self.row_fill = rec.row_fill
+            self.filled += rec.lines * self.width
+            for col in range(self.width):
+                self.col_fill[col] += rec.lines
+        self._lock(rec.masks, rec.x, rec.y, -1)
+        self.heights = rec.heights
+
+    def aggregate_height(self):
+        return sum(self.heights)
+
+    def holes(self):
+        # every cell under a column's top that is not filled is a hole
+        return sum(self.heights) - self.filled
+
+    def bumpiness(self):
+        h = self.heights
+        return sum(abs(h[i] - h[i + 1]) for i in range(self.width - 1))
+
+    def cell(self, x, y):
+        '''Color at (x, y), or None when empty.'''
+        return self.palette[self.colors[y][x]]
+
+    def to_lists(self):
+        '''The board in the original list-of-lists form.'''
+        return [[self.palette[code] for code in row] for row in self.colors]
+
+
+def _check_metrics(bits):
+    # incremental metrics must match a full rescan
+    heights = [0] * bits.width
+    for x in range(bits.width):
+        for y in range(bits.height):
+            if bits.rows[y] >> x & 1:
+                heights[x] = bits.height - y
+                break
+    assert bits.heights == heights
+    assert bits.row_fill == [row.bit_count() for row in bits.rows]
+    assert bits.col_fill == [sum(row >> x & 1 for row in bits.rows)
+                             for x in range(bits.width)]
+    assert bits.filled == sum(bits.row_fill)
+
+
+# ----- equivalence check against the original list-based logic -----
+
+def _list_collision(board, shape, px, py, width, height):
+    for y, row in enumerate(shape):
+        for x, cell in enumerate(row):
+            if cell:
+                new_x = px + x
+                new_y = py + y
+                if new_x < 0 or new_x >= width or new_y >= height:
+                    return True
+                if new_y >= 0 and board[new_y][new_x] is not None:
+                    return True
+    return False
+
+
+def _list_merge(board, shape, px, py, color):
+    for y, row in enumerate(shape):
+        for x, cell in enumerate(row):
+            if cell and py + y >= 0:
+                board[py + y][px + x] = color
+
+
+def _list_clear(board, width, height):
+    lines_cleared = 0
+    y = height - 1
+    while y >= 0:
+        if all(cell is not None for cell in board[y]):
+            del board[y]
+            board.insert(0, [None for _ in range(width)])
+            lines_cleared += 1
+        else:
+            y -= 1
+    return lines_cleared
+
+
+def check_equivalence(shapes, games=200, pieces=150, width=10, height=20,
+                      seed=0):
+    '''Play random games on both backends and compare after every step.
+
+    Also checks the incremental metrics and apply/undo on every placement.
+    '''
+    rng = random.Random(seed)
+    types = sorted(shapes)
+    for _ in range(games):
+        ref = [[None] * width for _ in range(height)]
+        bits = BitBoard(width, height)
+        # garbage rows with one hole each, so line clears actually happen
+        for row in range(height - rng.randrange(height // 2), height):
+            hole = rng.randrange(width)
+            ref[row] = ['G' if x != hole else None for x in range(width)]
+            bits.place((bits.full ^ (1 << hole),), 0, row, 'G')
+        for _ in range(pieces):
+            kind = rng.choice(types)
+            shape = [row[:] for row in shapes[kind]]
+            for _ in range(rng.randrange(4)):
+                shape = [[shape[j][i] for j in range(len(shape))]
+                         for i in range(len(shape[0]) - 1, -1, -1)]
+            masks = shape_masks(shape)
+            px, py = width // 2 - len(shape[0]) // 2, 0
+            if _list_collision(ref, shape, px, py, width, height):
+                assert bits.collides(masks, px, py)
+                break
+            # walk towards a random column, probing walls on the way
+            target = rng.randrange(-2, width)
+            for _ in range(abs(target - px)):
+                dx = 1 if target > px else -1
+                hit = _list_collision(ref, shape, px + dx, py, width, height)
+                assert hit == bits.collides(masks, px + dx, py)
+                if not hit:
+                    px += dx
+            while not _list_collision(ref, shape, px, py + 1, width, height):
+                assert not bits.collides(masks, px, py + 1)
+                py += 1
+            assert bits.collides(masks, px, py + 1)
+            # look-ahead apply/undo must leave the board exactly as it was
+            before = (bits.rows[:], bits.heights[:], bits.row_fill[:],
+                      bits.col_fill[:], bits.filled)
+            rec = bits.apply(masks, px, py)
+            _check_metrics(bits)
+            bits.undo(rec)
+            assert before == (bits.rows, bits.heights, bits.row_fill,
+                              bits.col_fill, bits.filled)
+            _list_merge(ref, shape, px, py, kind)
+            bits.place(masks, px, py, kind)
+            lines = _list_clear(ref, width, height)
+            assert lines == bits.clear_full_rows() == rec.lines
+            assert ref == bits.to_lists()
+            _check_metrics(bits)
+    return True
+
+
+if __name__ == '__main__':
+    from tetris_engine import SHAPES
+    check_equivalence(SHAPES)
+    print('bitboard matches the list board on all random games')
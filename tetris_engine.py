@@ -0,0 +1,236 @@
+'''Display-free Tetris rules shared by test.py, the AI and benchmarks.
+
+Nothing here imports pygame: TetrisEngine holds the board, the falling
+piece and the score. Pieces come from a seeded 7-bag, so a game can be
+replayed exactly from its seed and its inputs (see tetris_replay.py).
+'''
+import random
+from collections import deque
+from itertools import islice
+
+from tetris_bitboard import BitBoard, build_rotations
+
+BOARD_WIDTH = 10
+BOARD_HEIGHT = 20
+NEXT_PREVIEW = 3  # upcoming pieces shown to the player
+
+# Inputs, as recorded in replays
+LEFT, RIGHT, ROTATE, SOFT_DROP, HARD_DROP, GRAVITY = range(6)
+
+# Colors
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+GRAY = (128, 128, 128)
+CYAN = (0, 255, 255)
+YELLOW = (255, 255, 0)
+PURPLE = (128, 0, 128)
+GREEN = (0, 255, 0)
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+ORANGE = (255, 165, 0)
+
+# Tetromino shapes
+SHAPES = {
+    'I': [[1, 1, 1, 1]],
+    'O': [[1, 1], [1, 1]],
+    'T': [[0, 1, 0], [1, 1, 1]],
+    'S': [[0, 1, 1], [1, 1, 0]],
+    'Z': [[1, 1, 0], [0, 1, 1]],
+    'J': [[1, 0, 0], [1, 1, 1]],
+    'L': [[0, 0, 1], [1, 1, 1]]
+}
+
+COLORS = {
+    'I': CYAN,
+    'O': YELLOW,
+    'T': PURPLE,
+    'S': GREEN,
+    'Z': RED,
+    'J': BLUE,
+    'L': ORANGE
+}
+
+# All four rotation states per piece, built once at import
+ROTATIONS = {kind: build_rotations(shape) for kind, shape in SHAPES.items()}
+
+# SRS wall kicks, written as on the Tetris wiki: x right, y *up*, states
+# 0 / R (one clockwise turn) / 2 / L. A rotation tries each offset in order.
+_SRS_JLSTZ = {
+    ('0', 'R'): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+    ('R', '0'): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+    ('R', '2'): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+    ('2', 'R'): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+    ('2', 'L'): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+    ('L', '2'): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+    ('L', '0'): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+    ('0', 'L'): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+}
+_SRS_I = {
+    ('0', 'R'): ((0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)),
+    ('R', '0'): ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),
+    ('R', '2'): ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)),
+    ('2', 'R'): ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),
+    ('2', 'L'): ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),
+    ('L', '2'): ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),
+    ('L', '0'): ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),
+    ('0', 'L'): ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)),
+}
+# Our rotation index counts turns in Tetromino.rotate's direction, which is
+# counter-clockwise, so index 1 is SRS state L and index 3 is R.
+_SRS_STATE = {'0': 0, 'L': 1, '2': 2, 'R': 3}
+
+
+def _kick_table(srs):
+    # convert to board coordinates (y down) keyed by rotation index
+    return {(_SRS_STATE[a], _SRS_STATE[b]): tuple((dx, -dy) for dx, dy in kicks)
+            for (a, b), kicks in srs.items()}
+
+
+WALL_KICKS = {kind: _kick_table(_SRS_I if kind == 'I' else _SRS_JLSTZ)
+              for kind in SHAPES}
+WALL_KICKS['O'] = {(a, b): ((0, 0),) for a, b in WALL_KICKS['O']}
+
+
+class SevenBag:
+    """Seeded 7-bag randomizer: each run of 7 pieces is a shuffled set.
+
+    Every piece type appears once per bag, so droughts are bounded (at most
+    12 pieces between two of the same kind).
+    """
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.queue = deque()
+
+    def _fill(self, n):
+        while len(self.queue) < n:
+            bag = list(SHAPES)
+            self.rng.shuffle(bag)
+            self.queue.extend(bag)
+
+    def next(self):
+        self._fill(1)
+        return self.queue.popleft()
+
+    def peek(self, n=NEXT_PREVIEW):
+        self._fill(n)
+        return list(islice(self.queue, n))
+
+
+class Tetromino:
+    """Class representing a Tetromino piece."""
+
+    def __init__(self, kind=None, rng=random):
+        self.type = kind if kind is not None else rng.choice(list(SHAPES))
+        self.rotations = ROTATIONS[self.type]
+        self.rotation = 0
+        self.color = COLORS[self.type]
+        self.x = BOARD_WIDTH // 2 - self.rotations[0].width // 2
+        self.y = 0
+
+    @property
+    def shape(self):
+        return self.rotations[self.rotation].shape
+
+    @property
+    def masks(self):
+        return self.rotations[self.rotation].masks
+
+    def rotate(self, direction=1):
+        self.rotation = (self.rotation + direction) % 4
+
+
+class TetrisEngine:
+    """Tetris game state and rules, without any display."""
+
+    def __init__(self, seed=None):
+        self.seed = seed
+        self.reset()
+
+    def check_collision(self, piece, offset_x=0, offset_y=0):
+        return self.board.collides(piece.masks, piece.x + offset_x,
+                                   piece.y + offset_y)
+
+    def merge_piece(self):
+        piece = self.current_piece
+        self.board.place(piece.masks, piece.x, piece.y, piece.color)
+
+    def clear_lines(self):
+        lines_cleared = self.board.clear_full_rows()
+
+        if lines_cleared > 0:
+            points = [0, 100, 300, 500, 800][lines_cleared] * self.level
+            self.score += points
+            self.lines += lines_cleared
+            self.level = self.lines // 10 + 1
+            self.fall_speed = max(100, 500 - (self.level - 1) * 50)
+
+    def new_piece(self):
+        self.current_piece = Tetromino(self.bag.next())
+        if self.check_collision(self.current_piece):
+            self.game_over = True
+
+    def move(self, dx):
+        if not self.check_collision(self.current_piece, dx, 0):
+            self.current_piece.x += dx
+
+    def rotate_piece(self, direction=1):
+        return self.try_rotate(self.current_piece, direction)
+
+    def try_rotate(self, piece, direction=1):
+        """Rotate piece, trying each wall kick in order; False if none fit."""
+        old = piece.rotation
+        piece.rotate(direction)
+        for dx, dy in WALL_KICKS[piece.type][old, piece.rotation]:
+            if not self.check_collision(piece, dx, dy):
+                piece.x += dx
+                piece.y += dy
+                return True
+        piece.rotation = old
+        return False
+
+    def drop(self):
+        if not self.check_collision(self.current_piece, 0, 1):
+            self.current_piece.y += 1
+            return False
+        else:
+            self.merge_piece()
+            self.clear_lines()
+            self.new_piece()
+            return True
+
+    def hard_drop(self):
+        while not self.check_collision(self.current_piece, 0, 1):
+            self.current_piece.y += 1
+        return self.drop()
+
+    def preview(self, n=NEXT_PREVIEW):
+        return self.bag.peek(n)
+
+    def apply_input(self, code):
+        """Apply one input code; return True if it locked a piece."""
+        if code == LEFT:
+            self.move(-1)
+        elif code == RIGHT:
+            self.move(1)
+        elif code == ROTATE:
+            self.rotate_piece()
+        elif code == SOFT_DROP or code == GRAVITY:
+            return self.drop()
+        elif code == HARD_DROP:
+            return self.hard_drop()
+        return False
+
+    def reset(self):
+        # a restart with a fixed seed replays the same pieces; without one,
+        # each game still gets a concrete seed so it can be recorded
+        self.game_seed = (self.seed if self.seed is not None
+                          else random.randrange(1 << 32))
+        self.bag = SevenBag(self.game_seed)
+        self.board = BitBoard(BOARD_WIDTH, BOARD_HEIGHT)
+        self.current_piece = Tetromino(self.bag.next())
+        self.score = 0
+        self.level = 1
+        self.lines = 0
+        self.game_over = False
+        self.fall_speed = 500  # milliseconds
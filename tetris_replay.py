@@ -0,0 +1,236 @@
+'''Compact, verifiable Tetris replays.
+
+A replay is the game seed plus the stream of inputs (tetris_engine input
+codes) with the frame each one happened on, and the stream of lock events
+(which input locked a piece and how many lines it cleared), followed by
+the final score. Since pieces come from the seeded 7-bag, feeding the same
+inputs to a fresh TetrisEngine reproduces the game exactly, headless.
+
+File layout (all integers are unsigned LEB128 varints, zlib compressed):
+  b'TRP1' magic
+  seed, input count, then per input: (frame delta << 3) | input code
+  event count, then per event: input index delta, lines cleared
+  final score, final lines
+
+Run:
+  python tetris_replay.py record-ai game.trp --seed 7 --pieces 2000
+  python tetris_replay.py verify game.trp
+  python tetris_replay.py bench game.trp --repeat 20
+  python test.py --record game.trp     (record a human game)
+'''
+import argparse
+import time
+import zlib
+
+from tetris_engine import HARD_DROP, LEFT, RIGHT, ROTATE, TetrisEngine
+
+MAGIC = b'TRP1'
+
+
+class Replay:
+    def __init__(self, seed, inputs=None, events=None, score=0, lines=0):
+        self.seed = seed
+        self.inputs = inputs if inputs is not None else []  # (frame, code)
+        self.events = events if events is not None else []  # (index, lines)
+        self.score = score
+        self.lines = lines
+
+
+class Recorder:
+    '''Applies inputs to an engine and records them as a Replay.'''
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.replay = Replay(engine.game_seed)
+
+    def input(self, frame, code):
+        engine = self.engine
+        lines = engine.lines
+        locked = engine.apply_input(code)
+        self.replay.inputs.append((frame, code))
+        if locked:
+            self.replay.events.append((len(self.replay.inputs) - 1,
+                                       engine.lines - lines))
+        self.replay.score = engine.score
+        self.replay.lines = engine.lines
+        return locked
+
+
+# ----- encoding -----
+
+def _put(out, n):
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _get(data, pos):
+    n = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return n, pos
+        shift += 7
+
+
+def encode(replay):
+    out = bytearray(MAGIC)
+    _put(out, replay.seed)
+    _put(out, len(replay.inputs))
+    prev = 0
+    for frame, code in replay.inputs:
+        _put(out, (frame - prev) << 3 | code)
+        prev = frame
+    _put(out, len(replay.events))
+    prev = 0
+    for index, lines in replay.events:
+        _put(out, index - prev)
+        _put(out, lines)
+        prev = index
+    _put(out, replay.score)
+    _put(out, replay.lines)
+    return zlib.compress(bytes(out), 9)
+
+
+def decode(blob):
+    data = zlib.decompress(blob)
+    if data[:4] != MAGIC:
+        raise ValueError('not a Tetris replay')
+    pos = 4
+    seed, pos = _get(data, pos)
+    count, pos = _get(data, pos)
+    inputs = []
+    frame = 0
+    for _ in range(count):
+        word, pos = _get(data, pos)
+        frame += word >> 3
+        inputs.append((frame, word & 7))
+    count, pos = _get(data, pos)
+    events = []
+    index = 0
+    for _ in range(count):
+        delta, pos = _get(data, pos)
+        lines, pos = _get(data, pos)
+        index += delta
+        events.append((index, lines))
+    score, pos = _get(data, pos)
+    lines, pos = _get(data, pos)
+    return Replay(seed, inputs, events, score, lines)
+
+
+def save(replay, path):
+    with open(path, 'wb') as f:
+        f.write(encode(replay))
+
+
+def load(path):
+    with open(path, 'rb') as f:
+        return decode(f.read())
+
+
+# ----- re-simulation -----
+
+def simulate(replay):
+    '''Replay the inputs on a fresh engine; return (engine, lock events).'''
+    engine = TetrisEngine(replay.seed)
+    events = []
+    for index, (_, code) in enumerate(replay.inputs):
+        lines = engine.lines
+        if engine.apply_input(code):
+            events.append((index, engine.lines - lines))
+    return engine, events
+
+
+def verify(replay):
+    '''Return a list of mismatches between the replay and a re-simulation.'''
+    engine, events = simulate(replay)
+    problems = []
+    if events != replay.events:
+        for got, want in zip(events, replay.events):
+            if got != want:
+                problems.append(f'lock event {want} re-simulated as {got}')
+                break
+        else:
+            problems.append(f'{len(replay.events)} lock events recorded, '
+                            f'{len(events)} re-simulated')
+    if engine.score != replay.score:
+        problems.append(f'score {replay.score} re-simulated as {engine.score}')
+    if engine.lines != replay.lines:
+        problems.append(f'lines {replay.lines} re-simulated as {engine.lines}')
+    return problems
+
+
+def record_ai(seed, pieces):
+    '''Record an AI game as plain inputs (rotate, slide, hard drop).'''
+    from tetris_ai import best_placement
+    engine = TetrisEngine(seed)
+    rec = Recorder(engine)
+    frame = 0
+    placed = 0
+    while not engine.game_over and placed < pieces:
+        choice = best_placement(engine)
+        if choice is None:
+            break
+        rotation, x, _ = choice
+        piece = engine.current_piece
+        # the AI searched exactly this sequence, so each input succeeds
+        while piece.rotation != rotation:
+            rec.input(frame, ROTATE)
+            frame += 1
+        while piece.x != x:
+            rec.input(frame, LEFT if x < piece.x else RIGHT)
+            frame += 1
+        rec.input(frame, HARD_DROP)
+        frame += 1
+        placed += 1
+    return rec.replay
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tetris replays')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p = sub.add_parser('record-ai', help='record an AI game')
+    p.add_argument('path')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--pieces', type=int, default=1000)
+    p = sub.add_parser('verify', help='re-simulate and check a replay')
+    p.add_argument('path')
+    p = sub.add_parser('bench', help='re-simulation throughput')
+    p.add_argument('path')
+    p.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.cmd == 'record-ai':
+        replay = record_ai(args.seed, args.pieces)
+        save(replay, args.path)
+        size = len(encode(replay))
+        print(f'{len(replay.inputs)} inputs, {len(replay.events)} pieces, '
+              f'score {replay.score}: {size} bytes '
+              f'({size / max(1, len(replay.inputs)):.2f} bytes/input)')
+    elif args.cmd == 'verify':
+        problems = verify(load(args.path))
+        for problem in problems:
+            print(problem)
+        print('replay verified' if not problems else 'replay MISMATCH')
+        raise SystemExit(1 if problems else 0)
+    else:
+        replay = load(args.path)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            simulate(replay)
+        secs = time.perf_counter() - start
+        n = len(replay.inputs) * args.repeat
+        pieces = len(replay.events) * args.repeat
+        print(f'{n} inputs in {secs:.2f}s: {n / secs:.0f} inputs/s, '
+              f'{pieces / secs:.0f} pieces/s')
+
+
+if __name__ == '__main__':
+    main()
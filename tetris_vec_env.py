@@ -0,0 +1,352 @@
+'''Vectorized Tetris environment for training agents on many boards at once.
+
+N boards are stored as one (N, rows) uint32 NumPy array of BitBoard-style
+row bitmasks, and every step is a handful of array operations across all of
+them: moves, rotations with the same wall kicks as TetrisEngine, drops (a
+hard drop is one gather, not a loop), locking, line clears and scoring all
+follow tetris_engine's drop/clear_lines rules exactly. Each env has its own
+7-bag. Finished boards are reset automatically. Observations are
+(N, H, W) uint8 grids: 1 for locked cells, 2 for the falling piece.
+
+Actions: 0 nothing, 1 left, 2 right, 3 rotate, 4 soft drop, 5 hard drop.
+After the action every board gets one gravity drop, i.e. one step is the
+engine's apply_input(action) followed by apply_input(GRAVITY).
+
+Run:
+  python tetris_vec_env.py --envs 4096 --steps 200   (steps/s vs engine)
+  python tetris_vec_env.py --check                   (compare with engine)
+'''
+import argparse
+import random
+import time
+
+import numpy as np
+
+from tetris_engine import (
+    BOARD_HEIGHT,
+    BOARD_WIDTH,
+    GRAVITY,
+    HARD_DROP,
+    LEFT,
+    RIGHT,
+    ROTATE,
+    ROTATIONS,
+    SHAPES,
+    SOFT_DROP,
+    WALL_KICKS,
+    TetrisEngine,
+)
+
+N_ACTIONS = 6
+# vectorized action index -> engine input code
+ACTION_INPUTS = {1: LEFT, 2: RIGHT, 3: ROTATE, 4: SOFT_DROP, 5: HARD_DROP}
+
+KINDS = list(SHAPES)
+SPAWN_X = np.array([BOARD_WIDTH // 2 - ROTATIONS[k][0].width // 2
+                    for k in KINDS], dtype=np.int64)
+# KICKS[kind, rotation] -> (5, 2) offsets for rotation -> rotation + 1;
+# pieces with fewer kicks repeat (0, 0), which changes nothing
+KICKS = np.zeros((len(KINDS), 4, 5, 2), dtype=np.int64)
+for _k, _kind in enumerate(KINDS):
+    for _r in range(4):
+        _tests = WALL_KICKS[_kind][_r, (_r + 1) % 4]
+        KICKS[_k, _r, :len(_tests)] = _tests
+LINE_SCORES = np.array([0, 100, 300, 500, 800], dtype=np.int64)
+
+# Rows are uint32 bitmasks like BitBoard's, with column x at bit x + PAD.
+# PAD wall bits on both sides and PAD solid rows under the floor make every
+# out-of-bounds cell an ordinary collision; PAD empty rows above the top
+# cover pieces kicked above row 0 (rows further out are clipped to these).
+PAD = 4
+# MASKS[kind, rotation, x + PAD] -> 4 row masks already shifted to x
+# (shorter pieces padded with 0), so placing a piece is one lookup
+_masks = np.zeros((len(KINDS), 4, 1, 4), dtype=np.uint32)
+for _k, _kind in enumerate(KINDS):
+    for _r, _state in enumerate(ROTATIONS[_kind]):
+        _masks[_k, _r, 0, :len(_state.masks)] = _state.masks
+MASKS = _masks << np.arange(32 - 4, dtype=np.uint32)[:, None]
+ROW4 = np.arange(4)
+# CELLS[kind, rotation] -> (4, 2) array of (x, y) cell offsets
+CELLS = np.array([[state.cells for state in ROTATIONS[k]] for k in KINDS])
+
+
+class VecTetris:
+    '''n independent Tetris games stepped together.
+
+    reset() and step() follow the usual gym-style vector env shape:
+    step(actions) takes an (n,) array of action indices and returns
+    (obs, reward, done, info), where reward is the points scored this step
+    and info holds the score and lines each game had when the step ended.
+    '''
+
+    def __init__(self, n, seed=None, height=BOARD_HEIGHT, width=BOARD_WIDTH):
+        assert width + 2 * PAD <= 32
+        self.n = n
+        self.h = height
+        self.w = width
+        self.rng = np.random.default_rng(seed)
+        self.idx = np.arange(n)
+        walls = ((1 << 32) - 1) ^ (((1 << width) - 1) << PAD)
+        self.empty_row = np.uint32(walls)
+        self.full_row = np.uint32((1 << 32) - 1)
+        self.rows = np.full((n, height + 2 * PAD), walls, dtype=np.uint32)
+        self.rows[:, PAD + height:] = self.full_row
+        self.kind = np.zeros(n, dtype=np.int64)
+        self.rot = np.zeros(n, dtype=np.int64)
+        self.x = np.zeros(n, dtype=np.int64)
+        self.y = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lines = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.bag = np.zeros((n, 7), dtype=np.int64)
+        self.bag_pos = np.full(n, 7, dtype=np.int64)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.reset()
+
+    # ----- helpers -----
+
+    def _next_kinds(self, mask):
+        empty = mask & (self.bag_pos >= 7)
+        if empty.any():
+            k = int(empty.sum())
+            self.bag[empty] = self.rng.permuted(
+                np.tile(np.arange(7), (k, 1)), axis=1)
+            self.bag_pos[empty] = 0
+        kinds = self.bag[self.idx, np.minimum(self.bag_pos, 6)]
+        self.bag_pos[mask] += 1
+        return kinds
+
+    def _spawn(self, mask):
+        if not mask.any():
+            return
+        self.kind[mask] = self._next_kinds(mask)[mask]
+        self.rot[mask] = 0
+        self.x[mask] = SPAWN_X[self.kind[mask]]
+        self.y[mask] = 0
+        self.game_over |= mask & self._collides(0, 0)
+
+    def _piece(self, dx=0, dy=0, rot=None):
+        # row indices (n, 4) and shifted row masks (n, 4) of every piece
+        masks = MASKS[self.kind, self.rot if rot is None else rot,
+                      self.x + dx + PAD]
+        return (self.y + dy + PAD)[:, None] + ROW4, masks
+
+    def _collides(self, dx=0, dy=0, rot=None):
+        '''Per-env collision of the current piece moved by (dx, dy); the
+        offsets may be scalars or per-env arrays.'''
+        rows, masks = self._piece(dx, dy, rot)
+        # clipped rows are padding too: walls above the top, solid below
+        rows = rows.clip(0, self.rows.shape[1] - 1)
+        return (self.rows[self.idx[:, None], rows] & masks).any(axis=1)
+
+    def _rotate(self, mask):
+        new_rot = (self.rot + 1) % 4
+        kicks = KICKS[self.kind, self.rot]           # (n, 5, 2)
+        todo = mask.copy()
+        for t in range(kicks.shape[1]):
+            if not todo.any():
+                break
+            dx, dy = kicks[:, t, 0], kicks[:, t, 1]
+            ok = todo & ~self._collides(dx, dy, new_rot)
+            self.x[ok] += dx[ok]
+            self.y[ok] += dy[ok]
+            self.rot[ok] = new_rot[ok]
+            todo &= ~ok
+
+    def _lock(self, mask):
+        '''merge_piece + clear_lines + new_piece for the masked envs.'''
+        reward = np.zeros(self.n, dtype=np.int64)
+        if not mask.any():
+            return reward
+        rows, masks = self._piece()
+        n_idx = np.broadcast_to(self.idx[:, None], rows.shape)
+        # cells above the top are dropped, as in BitBoard.place
+        put = mask[:, None] & (rows >= PAD)
+        self.rows[n_idx[put], rows[put]] |= masks[put]
+
+        board = self.rows[:, PAD:PAD + self.h]
+        full = (board == self.full_row) & mask[:, None]
+        cleared = full.sum(axis=1)
+        hit = cleared > 0
+        if hit.any():
+            # stable sort puts full rows first, then the kept rows in order
+            order = np.argsort(~full[hit], axis=1, kind='stable')
+            b = np.take_along_axis(board[hit], order, axis=1)
+            b[np.arange(self.h) < cleared[hit][:, None]] = self.empty_row
+            board[hit] = b
+            reward = LINE_SCORES[cleared] * self.level
+            self.score += reward
+            self.lines += cleared
+            self.level = self.lines // 10 + 1
+        self._spawn(mask)
+        return reward
+
+    def _drop_distance(self, mask):
+        '''How far each masked piece falls before it rests, found with one
+        gather of its rows at every depth instead of a loop of drops.'''
+        rows, masks = self._piece()
+        rows, masks = rows[mask], masks[mask]
+        depth = np.arange(1, self.h + 1)[None, :, None]
+        rows = (rows[:, None, :] + depth).clip(0, self.rows.shape[1] - 1)
+        board = self.rows[self.idx[mask][:, None, None], rows]
+        hit = (board & masks[:, None, :]).any(axis=2)
+        # the floor padding guarantees a hit within height rows
+        return hit.argmax(axis=1)
+
+    def _drop(self, mask):
+        '''TetrisEngine.drop for the masked envs; returns points scored.'''
+        blocked = self._collides(0, 1)
+        self.y[mask & ~blocked] += 1
+        return self._lock(mask & blocked)
+
+    # ----- gym-style API -----
+
+    def reset(self, mask=None):
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        self.rows[mask, PAD:PAD + self.h] = self.empty_row
+        self.score[mask] = 0
+        self.lines[mask] = 0
+        self.level[mask] = 1
+        self.bag_pos[mask] = 7
+        self.game_over[mask] = False
+        self._spawn(mask)
+        return self.observe()
+
+    def boards(self):
+        '''Locked cells as an (n, height, width) uint8 array.'''
+        rows = self.rows[:, PAD:PAD + self.h].astype('<u4')
+        bits = np.unpackbits(rows.view(np.uint8), axis=1, bitorder='little')
+        return bits.reshape(self.n, self.h, 32)[:, :, PAD:PAD + self.w]
+
+    def observe(self):
+        '''boards() with the falling piece drawn in as 2.'''
+        obs = self.boards()
+        live = ~self.game_over
+        cells = CELLS[self.kind[live], self.rot[live]]
+        cx = self.x[live, None] + cells[..., 0]
+        cy = self.y[live, None] + cells[..., 1]
+        on = cy >= 0
+        n_idx = np.broadcast_to(self.idx[live, None], cx.shape)
+        obs[n_idx[on], cy[on], cx[on]] = 2
+        return obs
+
+    def step(self, actions, auto_reset=True):
+        '''Apply one action per env; return (obs, reward, done, info).'''
+        actions = np.asarray(actions)
+        live = ~self.game_over
+        reward = np.zeros(self.n, dtype=np.int64)
+
+        for dx, act in ((-1, 1), (1, 2)):
+            m = live & (actions == act) & ~self._collides(dx, 0)
+            self.x[m] += dx
+        self._rotate(live & (actions == 3))
+        reward += self._drop(live & (actions == 4))
+
+        hard = live & (actions == 5)
+        if hard.any():
+            self.y[hard] += self._drop_distance(hard)
+            reward += self._lock(hard)
+
+        # gravity, for boards that did not just top out
+        reward += self._drop(~self.game_over)
+
+        done = self.game_over.copy()
+        info = {'score': self.score.copy(), 'lines': self.lines.copy()}
+        if auto_reset and done.any():
+            self.reset(done)
+        return self.observe(), reward, done, info
+
+
+class _EngineFed(VecTetris):
+    # takes its pieces, in order, from a list filled by an engine
+
+    def __init__(self, feed):
+        self.feed = feed
+        super().__init__(1)
+
+    def _next_kinds(self, mask):
+        return np.full(self.n, KINDS.index(self.feed.pop(0)), dtype=np.int16)
+
+
+def check_against_engine(steps=5000, seed=0):
+    '''Drive one VecTetris env and a TetrisEngine with the same pieces and
+    random actions; assert board, piece, score and lines agree after every
+    step.'''
+    rng = random.Random(seed)
+    engine = TetrisEngine(seed)
+    env = _EngineFed([engine.current_piece.type])
+    restart = False
+    for _ in range(steps):
+        if restart:
+            # start both games on the same piece
+            env.feed = [engine.current_piece.type]
+            env.reset()
+        action = rng.randrange(N_ACTIONS)
+        codes = [ACTION_INPUTS[action]] if action else []
+        for code in codes + [GRAVITY]:
+            if not engine.game_over and engine.apply_input(code):
+                env.feed.append(engine.current_piece.type)
+        _, _, done, info = env.step([action], auto_reset=False)
+        assert not env.feed
+        assert bool(done[0]) == engine.game_over
+        assert info['score'][0] == engine.score
+        assert info['lines'][0] == engine.lines
+        rows = (env.rows[0, PAD:PAD + env.h] >> PAD) & ((1 << env.w) - 1)
+        assert rows.tolist() == engine.board.rows
+        if not engine.game_over:
+            piece = engine.current_piece
+            grid = [[row >> x & 1 for x in range(env.w)]
+                    for row in engine.board.rows]
+            for x, y in piece.rotations[piece.rotation].cells:
+                if piece.y + y >= 0:
+                    grid[piece.y + y][piece.x + x] = 2
+            assert env.observe()[0].tolist() == grid
+        restart = engine.game_over
+        if restart:
+            engine.reset()
+    return True
+
+
+def bench(n, steps, seed=0):
+    env = VecTetris(n, seed=seed)
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    for _ in range(steps):
+        env.step(rng.integers(0, N_ACTIONS, n))
+    vec = n * steps / (time.perf_counter() - start)
+
+    engine = TetrisEngine(seed)
+    py_rng = random.Random(seed)
+    count = min(n * steps, 50000)
+    start = time.perf_counter()
+    for _ in range(count):
+        action = py_rng.randrange(N_ACTIONS)
+        if action:
+            engine.apply_input(ACTION_INPUTS[action])
+        if not engine.game_over:
+            engine.apply_input(GRAVITY)
+        if engine.game_over:
+            engine.reset()
+    single = count / (time.perf_counter() - start)
+    print(f'VecTetris x{n}: {vec:,.0f} steps/s')
+    print(f'TetrisEngine:  {single:,.0f} steps/s')
+    print(f'speedup: {vec / single:.1f}x')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='vectorized Tetris')
+    parser.add_argument('--envs', type=int, default=4096)
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--check', action='store_true',
+                        help='compare against TetrisEngine and exit')
+    args = parser.parse_args()
+    if args.check:
+        check_against_engine()
+        print('VecTetris matches TetrisEngine')
+    else:
+        bench(args.envs, args.steps)
+
+
+if __name__ == '__main__':
+    main()